@@ -0,0 +1,254 @@
+import numpy as np
+
+from machineBehaviour import tr_component, cv_component, gn_component, gb_component
+from machineBehaviour import transformerLosses, converterLosses, generatorLosses, gearboxLosses
+from runSpec import resolveSpec
+
+# Broadcasts a scalar or a vector parameter to a float vector of length N
+def batchParameter(value, N):
+    return np.array(np.broadcast_to(np.asarray(value, dtype=float), (N,)))
+# Broadcasts an exchanger coefficient list (or one list per variant) to an N x modes matrix
+def batchCoeffs(value, N):
+    value = np.asarray(value, dtype=float)
+    return np.array(np.broadcast_to(value, (N, value.shape[-1])))
+# Vectorised version of the exchCoeffFunc hysteresis shared by all components, exchLag is the lag set when switching
+# up. Returns the new modes and lags
+def hysteresisModes(T, mode, lag, limitsUp, limitsDown, exchLag):
+    lag  = lag - 1
+    up   = T > limitsUp[mode]
+    down = ~up & (T < limitsDown[mode]) & (lag < 1)
+    upMode   = (T[:, None] > limitsUp[None, :]).sum(axis=1) - 1
+    steps    = np.arange(1, len(limitsDown))
+    downMode = ((T[:, None] >= limitsDown[None, 1:]) & (steps[None, :] <= mode[:, None])).sum(axis=1)
+    mode = np.where(up, upMode, np.where(down, downMode, mode))
+    lag  = np.where(up, exchLag, lag)
+    return [mode, lag]
+
+# Common state handling for the batched components, every parameter and state variable is a vector of length N
+class batchComponent(object):
+    scalarClass = None
+    parameters  = []
+    states      = []
+    imposedMode = None      # Cooling mode of the next step instead of the hysteresis, set by componentCalibration
+    sharedModes = False     # Every variant takes the cooling mode of variant 0, for finite differences (componentCalibration)
+    def __init__(self, N, T_0=0, spec=None, **params):
+        self.N    = N
+        self.spec = resolveSpec(spec)
+        for name in self.parameters:
+            setattr(self, name, batchParameter(params.pop(name, getattr(self.scalarClass, name)), N))
+        self.exchCoeffs = batchCoeffs(params.pop('exchCoeffs', self.scalarClass.exchCoeffs), N)
+        if params:
+            raise TypeError('Unknown parameters for %s: %s' % (type(self).__name__, ', '.join(params)))
+        for name in self.states:
+            setattr(self, name, batchParameter(T_0, N))
+        self.powerIN   = np.zeros(N)
+        self.losses    = np.zeros(N)
+        self.lossesAir = np.zeros(N)
+        self.powerOUT  = np.zeros(N)
+        self.heatOut   = np.zeros(N)
+        self.water_air_trans = np.zeros(N)
+        self.alarm     = np.zeros(N, dtype=bool)
+        self.exchMode  = np.zeros(N, dtype=int)
+        self.exchLag   = np.zeros(N, dtype=int)
+    # Chooses the cooling mode of every variant from its control temperature
+    def exchCoeffFunc(self):
+        if self.imposedMode is not None:
+            self.exchMode = np.full(self.N, self.imposedMode, dtype=int)
+        else:
+            [self.exchMode, self.exchLag] = hysteresisModes(getattr(self, self.controlVariable), self.exchMode, self.exchLag,
+                                                            self.limitsUp, self.limitsDown, self.spec.exchLag)
+        if self.sharedModes:
+            self.exchMode[:] = self.exchMode[0]
+            self.exchLag[:]  = self.exchLag[0]
+        self.water_air_trans = self.exchCoeffs[np.arange(self.N), self.exchMode]
+    # Activate alarm where the control temperature excedes the limit
+    def alarmFunc(self):
+        self.alarm = getattr(self, self.alarmVariable) > getattr(self, self.alarmLimit)
+
+# Batched TRANSFORMER, same model as tr_component
+class tr_batch(batchComponent):
+    scalarClass     = tr_component
+    parameters      = ['solid_oil_trans', 'oil_water_trans', 'solid_int', 'oil_int', 'water_int', 'oilC', 'waterC', 'split', 'oilHot_tempLimit']
+    states          = ['solid', 'oilHot', 'oilCold', 'waterHot', 'waterCold']
+    limitsUp        = np.array([ 0, 80, 85, 90, 95])
+    limitsDown      = np.array([ 0, 77, 82, 87, 92])
+    controlVariable = 'oilHot'
+    alarmVariable   = 'oilHot'
+    alarmLimit      = 'oilHot_tempLimit'
+    def __init__(self, N, T_0=0, spec=None, **params):
+        batchComponent.__init__(self, N, T_0, spec, **params)
+        self.oilWater = np.zeros(N)
+    def lossFunction(self, PF, V):
+        self.losses  = transformerLosses(self.powerOUT, PF, V)
+        self.powerIN = self.powerOUT + self.losses
+    def maxOut(self, Tamb):
+        maxLoss = (self.oilHot_tempLimit - Tamb)*1.5
+        return 1000*(np.sqrt(np.maximum(maxLoss, 0))*0.79)
+    def timeStep(self, power, PF, V, Tamb):
+        self.powerOUT = power
+        self.lossFunction(PF, V)
+        self.exchCoeffFunc()
+
+        solid_oil     = (self.solid    - self.oilCold) * self.solid_oil_trans
+        self.oilWater = (self.oilHot   - self.waterCold) * self.oil_water_trans
+        self.heatOut  = (self.waterHot - Tamb) * self.water_air_trans
+
+        self.solid     = self.solid + (self.losses * self.split - solid_oil) * self.spec.dt / self.solid_int
+        self.lossesAir = self.losses * (1- self.split)
+        self.oilCold   = self.oilCold + (solid_oil - self.oilWater)    * self.spec.dt / self.oil_int
+        self.waterCold = self.waterCold + (self.oilWater - self.heatOut) * self.spec.dt / self.water_int
+
+        self.oilHot    = self.oilCold   + solid_oil     / self.oilC
+        self.waterHot  = self.waterCold + self.oilWater / self.waterC
+        self.alarmFunc()
+
+# Batched CONVERTER, same model as cv_component
+class cv_batch(batchComponent):
+    scalarClass     = cv_component
+    parameters      = ['solid_water_trans', 'solid_int', 'water_int', 'waterC', 'split', 'waterCold_tempLimit']
+    states          = ['solid', 'waterHot', 'waterCold']
+    limitsUp        = np.array([ 0, 31, 35, 39, 43])
+    limitsDown      = np.array([ 0, 27, 31, 35, 39])
+    controlVariable = 'waterCold'
+    alarmVariable   = 'waterCold'
+    alarmLimit      = 'waterCold_tempLimit'
+    def __init__(self, N, T_0=0, spec=None, **params):
+        batchComponent.__init__(self, N, T_0, spec, **params)
+        self.solidWater = np.zeros(N)
+    def lossFunction(self, PF, V):
+        self.losses  = converterLosses(self.powerOUT, PF, V)
+        self.powerIN = self.powerOUT + self.losses
+    def maxOut(self, Tamb):
+        maxLoss = (self.waterCold_tempLimit - Tamb)*self.exchCoeffs[:, -1]
+        return 1000*(maxLoss*0.06704/0.85-3.2)
+    def timeStep(self, power, PF, V, Tamb):
+        self.powerOUT = power
+        self.lossFunction(PF, V)
+        self.exchCoeffFunc()
+
+        self.solidWater = (self.solid    - self.waterCold) * self.solid_water_trans
+        self.heatOut    = (self.waterHot - Tamb) * self.water_air_trans
+
+        self.solid     = self.solid + (self.losses * self.split - self.solidWater) * self.spec.dt / self.solid_int
+        self.lossesAir = self.losses * (1- self.split)
+        self.waterCold = self.waterCold + (self.solidWater - self.heatOut) * self.spec.dt / self.water_int
+
+        self.waterHot  = self.waterCold + self.solidWater / self.waterC
+        self.alarmFunc()
+
+# Batched GENERATOR, same model as gn_component
+class gn_batch(batchComponent):
+    scalarClass     = gn_component
+    parameters      = ['rotor_air_trans', 'stator_air_trans', 'stator_water_trans', 'airIn_water_trans', 'rotor_int', 'stator_int',
+                       'water_int', 'airInC', 'waterC', 'split', 'waterCold_tempLimit']
+    states          = ['rotor', 'stator', 'airHot', 'airCold', 'waterHot', 'waterCold']
+    limitsUp        = np.array([ 0, 35, 38, 41, 44])
+    limitsDown      = np.array([ 0, 31, 34, 37, 40])
+    controlVariable = 'waterCold'
+    alarmVariable   = 'waterCold'
+    alarmLimit      = 'waterCold_tempLimit'
+    def lossFunction(self):
+        self.losses  = generatorLosses(self.powerOUT)
+        self.powerIN = self.powerOUT + self.losses
+    def maxOut(self, Tamb):
+        maxLoss = (self.waterCold_tempLimit - Tamb)*self.exchCoeffs[:, -1]
+        return maxLoss*45-1000
+    def timeStep(self, power, Tamb):
+        self.powerOUT = power
+        self.lossFunction()
+        self.exchCoeffFunc()
+
+        rotor_air     = (self.rotor  - self.airCold)   * self.rotor_air_trans
+        stator_air    = (self.stator - self.airCold)   * self.stator_air_trans
+        stator_water  = (self.stator - self.waterCold) * self.stator_water_trans
+        self.heatOut  = (self.waterHot - Tamb) * self.water_air_trans
+
+        lossesRotor    = 0.4 * self.losses*self.split
+        lossesStator   = self.losses*self.split - lossesRotor
+        self.lossesAir = self.losses * (1- self.split)
+
+        self.rotor     = self.rotor + (lossesRotor  - rotor_air) * self.spec.dt / self.rotor_int
+        self.stator    = self.stator + (lossesStator - stator_air - stator_water) * self.spec.dt / self.stator_int
+        self.waterCold = self.waterCold + (stator_water + stator_air + rotor_air - self.heatOut) * self.spec.dt / self.water_int
+
+        self.waterHot = self.waterCold + (stator_water + stator_air + rotor_air)/self.waterC
+        self.airHot   = self.waterCold + (stator_air   + rotor_air)/self.airIn_water_trans
+        self.airCold  = self.airHot    - (stator_air   + rotor_air)/self.airInC
+        self.alarmFunc()
+
+# Batched GEARBOX, same model as gb_component
+class gb_batch(batchComponent):
+    scalarClass     = gb_component
+    parameters      = ['solid_oil_trans', 'oil_water_trans', 'solid_int', 'oil_int', 'water_int', 'oilC', 'waterC', 'split', 'oilCold_tempLimit']
+    states          = ['solid', 'oilHot', 'oilCold', 'waterHot', 'waterCold']
+    limitsUp        = np.array([ 0, 39, 41, 43, 45])
+    limitsDown      = np.array([ 0, 37, 39, 41, 43])
+    controlVariable = 'oilCold'
+    alarmVariable   = 'oilCold'
+    alarmLimit      = 'oilCold_tempLimit'
+    def __init__(self, N, T_0=0, spec=None, **params):
+        batchComponent.__init__(self, N, T_0, spec, **params)
+        self.oilWater = np.zeros(N)
+    def lossFunction(self):
+        self.losses  = gearboxLosses(self.powerOUT)
+        self.powerIN = self.powerOUT + self.losses
+    def maxOut(self, Tamb):
+        maxLoss = (self.oilCold_tempLimit - Tamb)*self.exchCoeffs[:, -1]
+        return maxLoss/0.02
+    def timeStep(self, power, Tamb):
+        self.powerOUT = power
+        self.lossFunction()
+        self.exchCoeffFunc()
+
+        solid_oil     = (self.solid    - self.oilCold) * self.solid_oil_trans
+        self.oilWater = (self.oilHot   - self.waterCold) * self.oil_water_trans
+        self.heatOut  = (self.waterHot - Tamb) * self.water_air_trans
+
+        self.solid     = self.solid + (self.losses * self.split - solid_oil) * self.spec.dt / self.solid_int
+        self.lossesAir = self.losses * (1- self.split)
+        self.oilCold   = self.oilCold + (solid_oil - self.oilWater)    * self.spec.dt / self.oil_int
+        self.waterCold = self.waterCold + (self.oilWater - self.heatOut) * self.spec.dt / self.water_int
+
+        self.oilHot    = self.oilCold   + solid_oil / self.oilC
+        self.waterHot  = self.waterCold + self.oilWater / self.waterC
+        self.alarmFunc()
+
+# N drivetrains stepped together: the component chain of machineState with vectorised derating, without the air network
+class drivetrainBatch(object):
+    def __init__(self, N, T_0=0, transformer={}, converter={}, generator={}, gearbox={}, spec=None):
+        self.N           = N
+        self.spec        = resolveSpec(spec)
+        self.transformer = tr_batch(N, T_0, self.spec, **transformer)
+        self.converter   = cv_batch(N, T_0, self.spec, **converter)
+        self.generator   = gn_batch(N, T_0, self.spec, **generator)
+        self.gearbox     = gb_batch(N, T_0, self.spec, **gearbox)
+        self.power       = np.zeros(N)
+        self.potential   = np.zeros(N)
+        self.PF          = np.ones(N)
+        self.V           = np.ones(N)
+    # Vector of alarm states per variant, True where any component is in alarm
+    def anyAlarm(self):
+        return self.transformer.alarm | self.converter.alarm | self.generator.alarm | self.gearbox.alarm
+    # Same rules as machineState.derateIfNeeded applied with masks
+    def derateIfNeeded(self, power, PF, V, Tamb):
+        power   = batchParameter(power, self.N)
+        alarm   = self.anyAlarm()
+        achievable = np.minimum.reduce([self.transformer.maxOut(Tamb), self.converter.maxOut(Tamb),
+                                        self.generator.maxOut(Tamb),   self.gearbox.maxOut(Tamb)])
+        reachable  = alarm & (achievable > power)
+        limited    = alarm & ~reachable
+        with np.errstate(divide='ignore', invalid='ignore'):
+            combFactor = power/achievable
+        lowFactor  = reachable & (combFactor < PF)
+        highFactor = reachable & ~lowFactor
+        self.power = np.where(limited, achievable, power)
+        self.PF    = np.where(limited, 1, np.where(highFactor, combFactor, PF))
+        self.V     = np.where(limited | highFactor, 1, np.where(lowFactor, np.maximum(0.9, combFactor/PF), V))
+    # Advances every variant one time step for the given potential power and ambient conditions
+    def timeStep(self, potential, PF, V, Tamb):
+        self.potential = batchParameter(potential, self.N)
+        self.derateIfNeeded(self.potential, PF, V, Tamb)
+        self.transformer.timeStep(self.power, self.PF, self.V, Tamb)
+        self.converter.timeStep(self.transformer.powerIN, self.PF, self.V, Tamb)
+        self.generator.timeStep(self.converter.powerIN, Tamb)
+        self.gearbox.timeStep(self.generator.powerIN, Tamb)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import datetime
+import subprocess
+import numpy as np
+
+from runSpec import runSpec
+
+# Deterministic synthetic met-mast data of the given number of steps: wind is a mean reverting random walk around a
+# daily cycle, cut to [0, 30] m/s, and temperature a seasonal plus daily cycle with noise. Same seed, same series
+def syntheticSeries(steps, seed=0, meanWind=8.0, meanTemperature=10.0, dt=60):
+    random = np.random.RandomState(seed)
+    days   = np.arange(steps)*dt/86400.0
+    noise  = random.normal(0, 0.35, steps)
+    gusts  = np.empty(steps)
+    level  = 0.0
+    for k in range(steps):
+        level    = 0.995*level + noise[k]
+        gusts[k] = level
+    winds        = np.clip(meanWind + 2*np.sin(2*np.pi*days) + gusts, 0, 30)
+    temperatures = (meanTemperature - 8*np.cos(2*np.pi*days/365.0) - 4*np.cos(2*np.pi*days)
+                    + random.normal(0, 0.3, steps))
+    return [winds, temperatures]
+
+# Full machineState.machineTimeStep loop (deepcopy, components and air network) over the series
+def benchTimeStep(winds, temperatures, steps, spec, PF=0.9, V=0.925):
+    from machineBehaviour import machineState
+    state = machineState(temperatures[0], spec)
+    begin = time.perf_counter()
+    for k in range(steps):
+        state = state.machineTimeStep(winds[k], PF, V, temperatures[k])
+    seconds = time.perf_counter() - begin
+    return {'steps': steps, 'seconds': seconds, 'stepsPerSecond': steps/seconds,
+            'gbmSolves': len(state.context.GBM.solveTimes)}
+# Streamed in-place stepping into a results store in directory, the path main.py takes
+def benchStream(winds, temperatures, steps, directory, spec, PF=0.9, V=0.925):
+    from machineBehaviour import machineState
+    from simulationStream import simulationSteps, runPipeline
+    from resultsStore     import resultsStoreWriter
+    state   = machineState(temperatures[0], spec)
+    store   = resultsStoreWriter.forState(directory, state, steps + 2)
+    begin   = time.perf_counter()
+    runPipeline(simulationSteps(state, winds, temperatures, PF, V, steps), [store])
+    seconds = time.perf_counter() - begin
+    return {'steps': steps, 'seconds': seconds, 'stepsPerSecond': steps/seconds}
+# Latency of the air network solve for every backend, from the same initial state with the ambient temperature moved
+# between solves. A backend that can not run here (e.g. no ipopt executable) is reported with its error
+def benchGBM(backends, solves, spec, Tamb=10.0):
+    from machineBehaviour import machineState
+    results = {}
+    for backend in backends:
+        GBM = machineState(Tamb, spec.replace(gbmBackend=backend)).context.GBM
+        try:
+            for i in range(solves):
+                GBM.instance.tempExt['Air_treatment_system'] = Tamb + 5*np.sin(i)
+                GBM.solve()
+        except Exception as error:
+            results[backend] = {'error': repr(error)}
+            continue
+        times = np.array(GBM.solveTimes)
+        results[backend] = {'solves': len(times), 'mean': times.mean(), 'median': np.median(times),
+                            'p95': np.percentile(times, 95), 'max': times.max(), 'first': times[0]}
+    return results
+# Component stepping without the air network: the four scalar components chained as in machineState, and N
+# drivetrains stepped together by drivetrainBatch
+def benchComponents(winds, temperatures, steps, spec, variants=256, PF=0.9, V=0.925):
+    from machineBehaviour  import tr_component, cv_component, gn_component, gb_component
+    from batchedComponents import drivetrainBatch
+    potentials = np.interp(winds[:steps], spec.powerCurve[0], spec.powerCurve[1])
+    [transformer, converter, generator, gearbox] = [tr_component(temperatures[0], spec), cv_component(temperatures[0], spec),
+                                                    gn_component(temperatures[0], spec), gb_component(temperatures[0], spec)]
+    begin = time.perf_counter()
+    for k in range(steps):
+        transformer.timeStep(potentials[k], PF, V, temperatures[k])
+        converter.timeStep(transformer.powerIN, PF, V, temperatures[k])
+        generator.timeStep(converter.powerIN, temperatures[k])
+        gearbox.timeStep(generator.powerIN, temperatures[k])
+    scalarSeconds = time.perf_counter() - begin
+    batch = drivetrainBatch(variants, temperatures[0], spec=spec)
+    begin = time.perf_counter()
+    for k in range(steps):
+        batch.timeStep(potentials[k], PF, V, temperatures[k])
+    batchSeconds = time.perf_counter() - begin
+    return {'steps': steps, 'scalarStepsPerSecond': steps/scalarSeconds,
+            'variants': variants, 'batchVariantStepsPerSecond': steps*variants/batchSeconds}
+# Time to build every graph, one after another, from the results store in directory
+def benchGraphs(directory, spec):
+    try:
+        import graphTools
+    except ImportError as error:
+        return {'error': repr(error)}
+    from resultsStore import openResults
+    begin   = time.perf_counter()
+    timings = graphTools.outputRequestedGraphs(openResults(directory), workers=1,
+                                               spec=spec.replace(currentLocation=os.path.join(directory, '')))
+    seconds = time.perf_counter() - begin
+    return {'seconds': seconds, 'graphs': dict(timings)}
+
+# Versions of the code and of the libraries the figures were taken with
+def benchmarkEnvironment():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {'revision': revision, 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'cpus': os.cpu_count()}
+# Runs the whole suite on synthetic series of the given number of steps and returns one record. The stepping
+# benchmarks solve the air network with stepBackend, every backend in backends gets its solve latency measured.
+# The power curve is the one next to this file so the figures do not depend on config.currentLocation
+def runBenchmarks(steps=2000, seed=0, stepBackend='sparse', backends=('sparse', 'ipopt_persistent', 'ipopt'), solves=50,
+                  variants=256, graphs=True):
+    from thermal_inertia_tools import loadPowerCurve
+    powerCurve = loadPowerCurve(9000, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PowerCurve.csv'))
+    spec       = runSpec.fromConfig(powerCurve=powerCurve, gbmBackend=stepBackend)
+    [winds, temperatures] = syntheticSeries(steps, seed, dt=spec.dt)
+    directory = tempfile.mkdtemp(prefix='benchmark')
+    try:
+        results = {'timeStep':   benchTimeStep(winds, temperatures, steps, spec),
+                   'stream':     benchStream(winds, temperatures, steps, directory, spec),
+                   'gbm':        benchGBM(backends, solves, spec),
+                   'components': benchComponents(winds, temperatures, steps, spec, variants)}
+        if graphs:
+            results['graphs'] = benchGraphs(directory, spec)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'environment': benchmarkEnvironment(),
+            'parameters': {'steps': steps, 'seed': seed, 'solves': solves, 'variants': variants, 'dt': spec.dt,
+                           'stepBackend': stepBackend, 'integrator': spec.integrator},
+            'results': results}
+
+# Benchmark history: one JSON record per line, appended by every run
+def saveBenchmark(filename, record):
+    folder = os.path.dirname(filename)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    with open(filename, 'a') as historyFile:
+        historyFile.write(json.dumps(record, default=float) + '\n')
+def loadBenchmarks(filename):
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r') as historyFile:
+        return [json.loads(line) for line in historyFile if line.strip()]
+# Headline figures of a record: throughputs (higher is better) and latencies (lower is better)
+def benchmarkFigures(record):
+    results = record['results']
+    figures = {'timeStep steps/s':          results['timeStep']['stepsPerSecond'],
+               'stream steps/s':            results['stream']['stepsPerSecond'],
+               'components steps/s':        results['components']['scalarStepsPerSecond'],
+               'batch variant-steps/s':     results['components']['batchVariantStepsPerSecond']}
+    for (backend, timing) in results['gbm'].items():
+        if 'error' not in timing:
+            figures['gbm %s median s' % backend] = timing['median']
+    if 'seconds' in results.get('graphs', {}):
+        figures['graphs s'] = results['graphs']['seconds']
+    return figures
+# Prints the figures of a record next to those of a previous one, if any, with the relative change
+def benchmarkReport(record, previous=None):
+    figures = benchmarkFigures(record)
+    before  = benchmarkFigures(previous) if previous is not None else {}
+    for (name, value) in figures.items():
+        if name in before and before[name]:
+            print('%-28s %14.6g   %+7.1f %% vs %s' % (name, value, 100*(value/before[name] - 1),
+                                                     previous['environment']['revision'] or previous['date']))
+        else:
+            print('%-28s %14.6g' % (name, value))
+    for (backend, timing) in record['results']['gbm'].items():
+        if 'error' in timing:
+            print('%-28s skipped: %s' % ('gbm ' + backend, timing['error']))
+    if 'error' in record['results'].get('graphs', {}):
+        print('%-28s skipped: %s' % ('graphs', record['results']['graphs']['error']))
+
+if __name__ == '__main__':
+    steps    = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    history  = sys.argv[2] if len(sys.argv) > 2 else os.path.join('results', 'benchmarks.jsonl')
+    previous = loadBenchmarks(history)
+    record   = runBenchmarks(steps)
+    saveBenchmark(history, record)
+    benchmarkReport(record, previous[-1] if previous else None)
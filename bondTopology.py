@@ -0,0 +1,43 @@
+import numpy as np
+
+# CSR layout of the bonds grouped by one of their nodes: bonds of node i are index[pointer[i]:pointer[i+1]], in bond order
+def compressedRows(bondNodes, nodes):
+    pointer = np.r_[0, np.cumsum(np.bincount(bondNodes, minlength=nodes))]
+    return [pointer, np.argsort(bondNodes, kind='stable')]
+
+# Node/bond topology of the air network compiled once into index arrays: name <-> index maps, the start and end node of
+# every bond, the bonds arriving at and leaving every node (CSR, see compressedRows) and the node x bond incidence in
+# CSR arrays. The pyomo rules, the sparse solver and the results layout share it instead of scanning the bond list per
+# node. Never modified once built, so copies of a network or a GBM share it
+class bondTopology(object):
+    def __init__(self, nodes, bonds):
+        self.nodes     = list(nodes)
+        self.bonds     = [tuple(bond) for bond in bonds]
+        self.nodeIndex = dict((node, i) for (i, node) in enumerate(self.nodes))
+        self.bondIndex = dict((bond, b) for (b, bond) in enumerate(self.bonds))
+        self.starts    = np.array([self.nodeIndex[s] for (s, e) in self.bonds], dtype=np.intp)
+        self.ends      = np.array([self.nodeIndex[e] for (s, e) in self.bonds], dtype=np.intp)
+        [self.inPointer,  self.inBonds]  = compressedRows(self.ends,   len(self.nodes))
+        [self.outPointer, self.outBonds] = compressedRows(self.starts, len(self.nodes))
+        # Neighbour names per node, in bond order, as the pyomo rules index the flows
+        self.predecessors = dict((node, [self.bonds[b][0] for b in self.incoming(i)]) for (i, node) in enumerate(self.nodes))
+        self.successors   = dict((node, [self.bonds[b][1] for b in self.outgoing(i)]) for (i, node) in enumerate(self.nodes))
+        self.buildIncidence()
+    # Indices of the bonds ending / starting at node i
+    def incoming(self, i):
+        return self.inBonds[self.inPointer[i]:self.inPointer[i+1]]
+    def outgoing(self, i):
+        return self.outBonds[self.outPointer[i]:self.outPointer[i+1]]
+    # Node x bond incidence, +1 where the bond ends and -1 where it starts, as CSR data, column indices and row pointer
+    def buildIncidence(self):
+        bonds   = np.arange(len(self.bonds))
+        rows    = np.r_[self.starts, self.ends]
+        columns = np.r_[bonds, bonds]
+        order   = np.lexsort((columns, rows))
+        self.incidenceData    = np.r_[-np.ones(len(bonds)), np.ones(len(bonds))][order]
+        self.incidenceIndices = columns[order]
+        self.incidencePointer = np.r_[0, np.cumsum(np.bincount(rows, minlength=len(self.nodes)))]
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo):
+        return self
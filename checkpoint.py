@@ -0,0 +1,93 @@
+import os
+import pickle
+import numpy as np
+import pyomo.environ as pyoenv
+
+from graphBondModel   import air_volume_GBM
+from stepProfiler     import stepProfiler
+
+checkpointVersion = 4          # 3: the pickled runSpec has checkpointEvery, 4: requestedGraphs and graphWorkers
+gbmParams  = ['tempExt', 'tempPre', 'heatFlow', 'forced', 'minExterior', 'maxExterior']
+gbmVars    = ['flow', 'pressure', 'exterior', 'temper']
+
+# Compact copy of everything the GBM carries from one solve to the next: controller scalars (exchMode, exchLag, dt...),
+# the mutable parameters and variable values of the instance, the sparse solver warm start and the solution cache
+def captureGBM(GBM):
+    instance = GBM.instance
+    return {'scalars':    dict((name, value) for (name, value) in vars(GBM).items()
+                               if isinstance(value, (bool, int, float, np.number))),
+            'params':     dict((name, [pyoenv.value(getattr(instance, name)[index]) for index in getattr(instance, name)])
+                               for name in gbmParams),
+            'vars':       dict((name, [getattr(instance, name)[index].value for index in getattr(instance, name)])
+                               for name in gbmVars),
+            'network':    dict((name, getattr(GBM.network, name).copy()) for name in gbmVars),
+            'cache':      GBM.cache,
+            'solveTimes': list(GBM.solveTimes)}
+# Writes a captured GBM back into a GBM whose instance is already built from the same tab files
+def restoreGBM(GBM, snapshot):
+    instance = GBM.instance
+    for (name, value) in snapshot['scalars'].items():
+        setattr(GBM, name, value)
+    for (name, values) in snapshot['params'].items():
+        param = getattr(instance, name)
+        for (index, value) in zip(list(param), values):
+            param[index] = value
+    for (name, values) in snapshot['vars'].items():
+        var = getattr(instance, name)
+        for (index, value) in zip(list(var), values):
+            var[index].value = value
+    for (name, values) in snapshot['network'].items():
+        setattr(GBM.network, name, values.copy())
+    GBM.cache      = snapshot['cache']
+    GBM.solveTimes = snapshot['solveTimes']
+    GBM.session    = None       # A persistent solver session is rebuilt from the restored instance on the next solve
+
+# Saves the whole simulation after `cursor` steps: the machine state with its context (coupling scheduler and step
+# counters), the GBM of that context, the sinks (a results store only pickles its layout and length) and the run parameters.
+# The file is replaced atomically so a crash while writing leaves the previous checkpoint
+def saveCheckpoint(filename, state, cursor, sinks, run):
+    checkpoint = {'version':  checkpointVersion,
+                  'cursor':   cursor,
+                  'state':    state,
+                  'GBM':      captureGBM(state.context.GBM),
+                  'sinks':    sinks,
+                  'run':      run}
+    temporary = filename + '.tmp'
+    with open(temporary, 'wb') as checkpointFile:
+        pickle.dump(checkpoint, checkpointFile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, filename)
+# Loads a checkpoint and gives the context of the saved state its GBM back as it was when it was saved.
+# Returns the checkpoint dictionary: continue stepping checkpoint['state'] from checkpoint['cursor'] into checkpoint['sinks']
+def resumeCheckpoint(filename, nodesfile='nodes.tab', bondsfile='bonds.tab'):
+    with open(filename, 'rb') as checkpointFile:
+        checkpoint = pickle.load(checkpointFile)
+    if checkpoint['version'] != checkpointVersion:
+        raise ValueError('Checkpoint version %s is not supported' % checkpoint['version'])
+    [state, GBM]     = [checkpoint['state'], air_volume_GBM(checkpoint['state'].spec)]    # Built with the settings the run started with
+    GBM.loadModelData(nodesfile, bondsfile)
+    restoreGBM(GBM, checkpoint['GBM'])
+    state.context.GBM      = GBM
+    state.context.profiler = stepProfiler(state.spec.profileSteps)             # Profiles the resumed part of the run
+    return checkpoint
+
+# Sink that saves a checkpoint every given number of steps. It must be the last sink of the pipeline so the other
+# sinks already consumed the state being saved. cursor is the number of steps already done when the pipeline starts
+class checkpointSink(object):
+    def __init__(self, filename, every, sinks, run, cursor=0):
+        self.filename = filename
+        self.every    = every
+        self.sinks    = sinks
+        self.run      = run
+        self.cursor   = cursor if cursor > 0 else -1    # A new run starts with the initial state, a resumed one does not
+        self.state    = None
+    def consume(self, state):
+        previous     = self.cursor
+        self.cursor += state.span
+        self.state   = state
+        if self.every and self.cursor > 0 and self.cursor//self.every != previous//self.every:
+            saveCheckpoint(self.filename, state, self.cursor, self.sinks, self.run)
+    # The finished run is checkpointed as well, resuming it only repeats the reports
+    def close(self):
+        if self.every and self.state is not None:
+            saveCheckpoint(self.filename, self.state, self.cursor, self.sinks, self.run)
+        return self.cursor
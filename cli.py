@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+import time
+launched = time.perf_counter()          # Taken before any other import, the startup report counts from here
+
+import os
+import sys
+import ast
+import json
+import argparse
+import datetime
+
+# Seconds spent importing the modules of every phase, in the order the phases ran
+importTimes = []
+# Times the imports done inside the block. The heavy modules (pyomo in the GBM, plotly in graphTools, scipy in the
+# calibration) are imported by the phase that needs them, so a command only pays for what it uses
+class phaseImports(object):
+    def __init__(self, phase):
+        self.phase = phase
+    def __enter__(self):
+        self.start = time.perf_counter()
+    def __exit__(self, *error):
+        importTimes.append((self.phase, time.perf_counter() - self.start))
+# Time from launch until the command line was parsed, and the imports of every phase that ran
+def startupReport(ready):
+    print('Startup              :   %.2f s to parse the command, imports %s' %
+          (ready - launched, ', '.join('%s %.2f s' % item for item in importTimes) or 'none'))
+
+# name=value of --set, the value is read as a python literal when it is one (10, 0.5, True, 'sparse') and as text otherwise
+def runSetting(text):
+    [name, value] = text.split('=', 1)
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return (name, value)
+# component=file of calibrate
+def componentTrace(text):
+    [component, filename] = text.split('=', 1)
+    return (component, filename)
+# Comma separated names of --graphs
+def graphNames(text):
+    return [name for name in text.split(',') if name]
+
+# Simulates the turbine over the series of spec.currentLocation into the results store, with checkpoints, and builds
+# the graphs afterwards. --resume continues from the last checkpoint with the settings the run started with, --set can
+# only change the graph settings
+def simulate(options):
+    with phaseImports('simulate'):
+        import graphBondModel                                       # pyomo, otherwise imported by the first machineState
+        from runSpec               import runSpec, graphSettings
+        from thermal_inertia_tools import loadPowerCurve, loadWindTemperatureSeries
+        from machineBehaviour      import machineState
+        from simulationStream      import simulationSteps, runPipeline, windowMaxSink, aepSink, alarmSink, progressSink
+        from resultsStore          import resultsStoreWriter
+        from checkpoint            import checkpointSink, resumeCheckpoint
+
+    print( "Loading data series, power curve and starting conditions")
+    checkpointFile            = os.path.join(options.results, 'checkpoint.pkl')
+    timeToSimulate            = datetime.timedelta(days = options.days)
+
+    if options.resume:
+        checkpoint                = resumeCheckpoint(checkpointFile)
+        [initialState, cursor]    = [checkpoint['state'], checkpoint['cursor']]
+        spec                      = initialState.spec                  # With the power curve the run started with
+        requested                 = spec.replace(**dict(options.settings))
+        changed                   = [name for name in spec._fields
+                                     if name not in graphSettings and getattr(requested, name) != getattr(spec, name)]
+        if changed:
+            sys.exit('--resume continues with the settings of the checkpoint, --set changes %s' % ', '.join(changed))
+        spec                      = spec.replace(**dict((name, getattr(requested, name)) for name in graphSettings))
+        [winds, temperatures]     = loadWindTemperatureSeries(testing = False, spec = spec)
+        parameters                = checkpoint['run']
+        [steps, powerFactor, gridVoltage] = [parameters['steps'], parameters['powerFactor'], parameters['gridVoltage']]
+        [store, aep, alarms, progress] = checkpoint['sinks']
+        print("Resuming the simulation from step %i of %i" % (cursor, steps))
+    else:
+        spec                      = runSpec.fromConfig(**dict(options.settings))
+        spec                      = spec.replace(powerCurve = loadPowerCurve(9000, spec = spec))
+        [winds, temperatures]     = loadWindTemperatureSeries(testing = False, spec = spec)
+        [powerFactor,gridVoltage] = [0.9, 0.925]
+        initialState              = machineState(temperatures[0], spec)
+        cursor                    = 0
+        steps                     = min(int(timeToSimulate.total_seconds()//spec.dt), len(winds), len(temperatures))
+        parameters                = {'dt': spec.dt, 'strechFactor': spec.strechFactor, 'streamDecimation': spec.streamDecimation,
+                                     'timeToSimulate': timeToSimulate.total_seconds(), 'steps': steps, 'powerFactor': powerFactor,
+                                     'gridVoltage': gridVoltage, 'gbmBackend': spec.gbmBackend, 'integrator': spec.integrator}
+        storeFactory              = lambda state: resultsStoreWriter.forState(options.results, state, steps//spec.streamDecimation + 2, parameters)
+        [store, aep, alarms, progress] = [windowMaxSink(spec.streamDecimation, storeFactory), aepSink(), alarmSink(), progressSink(14400)]
+        print("Simulation will calculate %i days or until ambient data runs out" % timeToSimulate.days)
+
+    calc_begining_time        = time.time()
+    stream                    = simulationSteps(initialState, winds, temperatures, powerFactor, gridVoltage, steps, cursor)
+    checkpoints               = checkpointSink(checkpointFile, spec.checkpointEvery, [store, aep, alarms, progress], parameters, cursor)
+    [stateSeries, _, _, _, _] = runPipeline(stream, [store, aep, alarms, progress, checkpoints])
+
+    aep.report()
+    alarms.report()
+    calc_end_time             = time.time()
+    context                   = initialState.context
+    print('Calculation took     :   %i seconds'  % (calc_end_time - calc_begining_time))
+    print('GBM solves (%(backend)s)  :   %(solves)i calls, %(total).1f s total, %(mean).4f s mean, %(max).4f s max, %(outsideBounds)i outside the bounds' % context.GBM.solveTimingReport())
+    print('GBM coupling         :   %(solves)i solves, %(skipped)i steps skipped, max accepted drift %(maxHeatDrift).0f W / %(maxTambDrift).2f C' % context.coupling.report())
+    if context.GBM.cache is not None:
+        print('GBM cache            :   %(hits)i hits, %(misses)i misses, %(hitRate).2f hit rate' % context.GBM.cache.stats())
+    if context.profiler.enabled:
+        print('Step stages          :')
+        context.profiler.report()
+        context.profiler.save(os.path.join(options.results, 'profile.json'))
+    if options.graphs != []:
+        buildGraphs(stateSeries, options.graphs, options.workers, spec)
+# Builds the graphs of a results store written by simulate, without importing the model
+def graph(options):
+    with phaseImports('graph'):
+        from runSpec               import runSpec
+        from thermal_inertia_tools import calculateAEP
+        from resultsStore          import openResults
+    stateSeries = openResults(options.results)              # Columns are memory mapped on first use
+    calculateAEP(stateSeries)
+    buildGraphs(stateSeries, options.graphs or None, options.workers, runSpec.fromConfig(**dict(options.settings)))
+def buildGraphs(stateSeries, graphs, workers, spec):
+    with phaseImports('graphs'):
+        from graphTools import outputRequestedGraphs, graphTimingReport
+    begin = time.time()
+    graphTimingReport(outputRequestedGraphs(stateSeries, graphs, workers, spec))
+    print('Building graphs took :   %i seconds'  % (time.time() - begin))
+# Fits the thermal parameters of the components to measured traces, one component=trace.csv per component
+def calibrate(options):
+    with phaseImports('calibrate'):
+        from componentCalibration import componentBatches, loadMeasuredTrace, calibrateAll, calibrationReport
+    unknown = [component for (component, filename) in options.traces if component not in componentBatches]
+    if unknown:
+        sys.exit('Unknown components %s, available: %s' % (unknown, list(componentBatches)))
+    problems = dict((component, {'trace': loadMeasuredTrace(filename), 'maxEvaluations': options.evaluations})
+                    for (component, filename) in options.traces)
+    reports  = calibrateAll(problems, options.workers)
+    calibrationReport(reports)
+    if options.output:
+        with open(options.output, 'w') as reportFile:
+            json.dump(reports, reportFile, indent=1)
+# Runs the benchmark suite and compares it with the last record of the history
+def bench(options):
+    with phaseImports('bench'):
+        from benchmarks import runBenchmarks, saveBenchmark, loadBenchmarks, benchmarkReport
+    previous = loadBenchmarks(options.history)
+    record   = runBenchmarks(options.steps, options.seed, graphs = options.graphs)
+    saveBenchmark(options.history, record)
+    benchmarkReport(record, previous[-1] if previous else None)
+
+def commandParser():
+    parser   = argparse.ArgumentParser(description='Thermal inertia simulation of a wind turbine')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    settings = argparse.ArgumentParser(add_help=False)
+    settings.add_argument('--set', dest='settings', type=runSetting, action='append', default=[], metavar='NAME=VALUE',
+                          help='run setting (see runSpec), default from config.py; repeatable')
+    graphs   = argparse.ArgumentParser(add_help=False)
+    graphs.add_argument('--results', default='results', help='results store folder (default results)')
+    graphs.add_argument('--workers', type=int, default=None, help='processes building graphs, default the graphWorkers run setting')
+
+    command = commands.add_parser('simulate', parents=[settings, graphs], help='run the simulation and build the graphs')
+    command.add_argument('--days', type=int, default=20, help='days to simulate, or until the series run out (default 20)')
+    command.add_argument('--resume', action='store_true', help='continue from the last checkpoint')
+    command.add_argument('--graphs', type=graphNames, default=None, help='graphs to build, comma separated, default the requestedGraphs run setting')
+    command.add_argument('--no-graphs', dest='graphs', action='store_const', const=[], help='do not build graphs')
+    command.set_defaults(run=simulate)
+
+    command = commands.add_parser('graph', parents=[settings, graphs], help='build graphs from a results store')
+    command.add_argument('graphs', nargs='*', default=None, help='graphs to build, default the requestedGraphs run setting')
+    command.set_defaults(run=graph)
+
+    command = commands.add_parser('calibrate', help='fit component thermal parameters to measured traces')
+    command.add_argument('traces', nargs='+', type=componentTrace, metavar='COMPONENT=TRACE',
+                         help='; separated trace with a header: power;Tamb;<measured states>')
+    command.add_argument('--evaluations', type=int, default=200, help='max residual evaluations per fit (default 200)')
+    command.add_argument('--workers', type=int, default=None, help='processes, default one per component')
+    command.add_argument('--output', default=None, help='JSON file for the fitted parameters')
+    command.set_defaults(run=calibrate)
+
+    command = commands.add_parser('bench', help='run the benchmark suite on synthetic series')
+    command.add_argument('steps', type=int, nargs='?', default=2000, help='steps of the synthetic series (default 2000)')
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--history', default=os.path.join('results', 'benchmarks.jsonl'), help='JSONL benchmark history')
+    command.add_argument('--no-graphs', dest='graphs', action='store_false', help='skip the graph benchmark')
+    command.set_defaults(run=bench)
+    return parser
+
+def main(argv=None):
+    parser  = commandParser()
+    options = parser.parse_args(argv)
+    if getattr(options, 'settings', None):
+        from runSpec import runSpec
+        unknown = [name for (name, value) in options.settings if name not in runSpec._fields]
+        if unknown:
+            parser.error('unknown run settings: %s' % ', '.join(unknown))
+    ready   = time.perf_counter()
+    begin   = time.time()
+    options.run(options)
+    startupReport(ready)
+    print('Total                :   %i seconds' % (time.time() - begin))
+    print( "--------- DONE !!! ---------")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+import time
+import datetime
+import operator
+import numpy as np
+
+
+# Scalar attributes of each component that are stored as one column per variable
+componentFields = {
+    'transformer': ['solid', 'oilHot', 'oilCold', 'waterHot', 'waterCold', 'powerIN', 'losses', 'lossesAir', 'powerOUT',
+                    'water_air_trans', 'alarm', 'exchMode', 'exchLag', 'oilWater', 'heatOut'],
+    'converter':   ['solid', 'waterHot', 'waterCold', 'powerIN', 'losses', 'lossesAir', 'powerOUT',
+                    'water_air_trans', 'alarm', 'exchMode', 'exchLag', 'heatOut', 'solidWater'],
+    'generator':   ['rotor', 'stator', 'airHot', 'airCold', 'waterHot', 'waterCold', 'powerIN', 'losses', 'lossesAir', 'powerOUT',
+                    'water_air_trans', 'alarm', 'exchMode', 'exchLag', 'heatOut'],
+    'gearbox':     ['solid', 'oilHot', 'oilCold', 'waterHot', 'waterCold', 'powerIN', 'losses', 'lossesAir', 'powerOUT',
+                    'water_air_trans', 'alarm', 'exchMode', 'exchLag', 'heatOut', 'oilWater']}
+# Scalar attributes of the machine itself. span is the number of time steps the row accounts for: 1, more for a block
+# advanced at once by fast-forward (it ends at the row time) or for a window merged by windowMaxSink
+machineFields = ['power', 'potential', 'PF', 'V', 'wind', 'Tamb', 'span']
+# Fields that are not stored as float64
+fieldTypes = {'alarm': np.bool_, 'exchMode': np.int32, 'exchLag': np.int32, 'span': np.int32}
+
+# Column name used for a bond of the air network, bonds are (start, end) tuples
+def bondColumnName(bond):
+    return '%s|%s' % bond
+# Inverse of bondColumnName
+def bondFromColumnName(name):
+    return tuple(name.split('|'))
+# Builds the ordered list of (column name, dtype) for a network with the given nodes and bonds
+def buildColumnSpec(nodes, bonds):
+    spec = [('time', 'datetime64[s]')]
+    spec.extend((field, fieldTypes.get(field, np.float64)) for field in machineFields)
+    for component, fields in componentFields.items():
+        spec.extend((component + '.' + field, fieldTypes.get(field, np.float64)) for field in fields)
+    spec.extend(('air.temperature.' + node, np.float64) for node in nodes)
+    spec.extend(('air.flow.' + bondColumnName(bond), np.float64) for bond in bonds)
+    spec.extend(('air.heatFlows.' + bondColumnName(bond), np.float64) for bond in bonds)
+    spec.append(('air.exchMode', np.int32))
+    return spec
+# Steps accounted for by every row of a series, all 1 for stores written before the span column existed
+def rowSpans(series):
+    if 'span' in series.columns:
+        return series.column('span')
+    return np.ones(len(series), dtype=np.int32)
+# Returns a function that reads the value of a column from a live machineState
+def columnGetter(name):
+    if name.startswith('air.temperature.'):
+        node = name[len('air.temperature.'):]
+        return lambda state: state.air_component.temperature[node]
+    if name.startswith('air.flow.'):
+        bond = bondFromColumnName(name[len('air.flow.'):])
+        return lambda state: state.air_component.flow[bond]
+    if name.startswith('air.heatFlows.'):
+        bond = bondFromColumnName(name[len('air.heatFlows.'):])
+        return lambda state: state.air_component.heatFlows[bond]
+    if name == 'air.exchMode':
+        return lambda state: state.air_component.heatFlows['exchMode']
+    if name == 'time':
+        return lambda state: np.datetime64(state.time, 's')
+    return operator.attrgetter(name)
+
+# Struct-of-arrays store for a simulation: one preallocated array per state variable, one row per time step
+class columnarSeries(object):
+    def __init__(self, nodes, bonds, capacity=1024):
+        self.nodes    = list(nodes)
+        self.bonds    = list(bonds)
+        self.spec     = buildColumnSpec(self.nodes, self.bonds)
+        self.length   = 0
+        self.columns  = dict((name, np.zeros(max(capacity, 1), dtype=dtype)) for (name, dtype) in self.spec)
+        self._getters = [(name, columnGetter(name)) for (name, dtype) in self.spec]
+    # Creates an empty store with the air network layout (the topology of its GBM) of the given machineState
+    @classmethod
+    def forState(cls, state, capacity=1024):
+        topology = state.context.GBM.topology
+        return cls(topology.nodes, topology.bonds, capacity)
+    def capacity(self):
+        return len(self.columns['time'])
+    # Grows every column geometrically when the preallocated capacity runs out
+    def reserve(self, capacity):
+        if capacity <= self.capacity():
+            return
+        capacity = max(capacity, 2*self.capacity())
+        for name in self.columns:
+            grown = np.zeros(capacity, dtype=self.columns[name].dtype)
+            grown[:self.length] = self.columns[name][:self.length]
+            self.columns[name] = grown
+    # Writes the state of the machine in row k
+    def record(self, k, state):
+        columns = self.columns
+        for (name, getter) in self._getters:
+            columns[name][k] = getter(state)
+    # Writes the state of the machine in the next free row
+    def append(self, state):
+        self.reserve(self.length + 1)
+        self.record(self.length, state)
+        self.length += 1
+        self.rowAdded()
+    # Hook called after every new row, stores backed by files use it to flush periodically
+    def rowAdded(self):
+        pass
+    # Sink interface of simulationStream: every consumed state becomes a row
+    def consume(self, state):
+        self.append(state)
+    def close(self):
+        return self
+    # Valid part of a column, as a numpy view (no copy)
+    def column(self, name):
+        return self.columns[name][:self.length]
+    # The column getters are closures, they are rebuilt instead of pickled
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_getters']
+        return state
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._getters = [(name, columnGetter(name)) for (name, dtype) in self.spec]
+    def __len__(self):
+        return self.length
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [stateView(self, k) for k in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('columnarSeries index out of range')
+        return stateView(self, index)
+    def __iter__(self):
+        for k in range(self.length):
+            yield stateView(self, k)
+
+# Read-only view of one row of a columnarSeries that mimics the attribute layout of machineState
+class stateView(object):
+    def __init__(self, series, k):
+        self._series = series
+        self._k      = k
+        self.transformer   = componentView(series, 'transformer', k)
+        self.converter     = componentView(series, 'converter', k)
+        self.generator     = componentView(series, 'generator', k)
+        self.gearbox       = componentView(series, 'gearbox', k)
+        self.air_component = airView(series, k)
+    def __getattr__(self, name):
+        if name == 'time':
+            return self._series.columns['time'][self._k].astype(datetime.datetime)
+        if name == 'span' and 'span' not in self._series.columns:
+            return 1
+        if name in machineFields:
+            return self._series.columns[name][self._k].item()
+        raise AttributeError(name)
+    def getAlarms(self):
+        return [self.transformer.alarm, self.converter.alarm, self.generator.alarm, self.gearbox.alarm]
+
+# Read-only view of one component in one row of a columnarSeries
+class componentView(object):
+    def __init__(self, series, component, k):
+        self._series    = series
+        self._component = component
+        self._k         = k
+    def __getattr__(self, name):
+        try:
+            return self._series.columns[self._component + '.' + name][self._k].item()
+        except KeyError:
+            raise AttributeError(name)
+
+# Read-only view of the air network results in one row, exposing the same dictionaries as air_component
+class airView(object):
+    def __init__(self, series, k):
+        self.temperature = columnMapping(series, k, 'air.temperature.', series.nodes)
+        self.flow        = columnMapping(series, k, 'air.flow.',        series.bonds)
+        self.heatFlows   = columnMapping(series, k, 'air.heatFlows.',   series.bonds + ['exchMode'])
+
+# Dictionary-like access to the columns sharing a prefix, keyed by node name or bond tuple
+class columnMapping(object):
+    def __init__(self, series, k, prefix, keys):
+        self._series = series
+        self._k      = k
+        self._prefix = prefix
+        self._keys   = keys
+    def _columnName(self, key):
+        if key == 'exchMode':
+            return 'air.exchMode'
+        if isinstance(key, tuple):
+            return self._prefix + bondColumnName(key)
+        return self._prefix + key
+    def __getitem__(self, key):
+        try:
+            return self._series.columns[self._columnName(key)][self._k].item()
+        except KeyError:
+            raise KeyError(key)
+    def __contains__(self, key):
+        return key in self._keys
+    def __iter__(self):
+        return iter(self._keys)
+    def __len__(self):
+        return len(self._keys)
+    def keys(self):
+        return list(self._keys)
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+# Runs the simulation stepping a single machineState in place and storing every step as a row of a columnarSeries
+def simulateColumnar(state, winds, temperatures, PF, V, steps, progressEvery=14400):
+    series = columnarSeries.forState(state, steps + 1)
+    series.append(state)
+    start_time = time.time()
+    for k in range(steps):
+        state.advance(winds[k], PF, V, temperatures[k])
+        series.append(state)
+        if progressEvery and k % progressEvery == 0:
+            print(int((k*state.spec.dt)//86400), "days completed in ", int(time.time()-start_time), "seconds")
+    return series
@@ -0,0 +1,151 @@
+import csv
+import time
+import concurrent.futures
+import numpy as np
+import scipy.optimize
+
+from runSpec import resolveSpec
+from batchedComponents import tr_batch, cv_batch, gn_batch, gb_batch, hysteresisModes
+
+componentBatches = {'transformer': tr_batch, 'converter': cv_batch, 'generator': gn_batch, 'gearbox': gb_batch}
+
+# Measured operation of one component: the power it delivers (powerOUT, [kW]) and the ambient temperature per time step,
+# and the measured temperatures keyed by state variable, e.g. {'oilHot': [...], 'waterCold': [...]}
+def measuredTrace(power, Tamb, temperatures, PF=1, V=1):
+    return {'power': np.asarray(power, dtype=float), 'Tamb': np.asarray(Tamb, dtype=float),
+            'temperatures': dict((state, np.asarray(values, dtype=float)) for (state, values) in temperatures.items()),
+            'PF': PF, 'V': V}
+# Reads a measured trace from a ; separated file with a header line: the columns power and Tamb and one column per
+# measured state variable, named as the component attribute (oilHot, waterCold...)
+def loadMeasuredTrace(filename, PF=1, V=1):
+    with open(filename, 'r') as csvfile:
+        rows = [row for row in csv.reader(csvfile, delimiter=';', quotechar='|') if row]
+    header  = [name.strip() for name in rows[0]]
+    columns = dict((name, [float(row[i]) for row in rows[1:]]) for (i, name) in enumerate(header))
+    return measuredTrace(columns.pop('power'), columns.pop('Tamb'), columns, PF, V)
+# Thermal parameters fitted by default: heat transfers, inertias, heat carrying capacities and the split, not the alarm limits
+def calibrationParameters(component):
+    return [name for name in componentBatches[component].parameters if not name.endswith('tempLimit')]
+
+# Least squares fit of the thermal parameters of one component to a measured trace. The parameters are fitted as
+# logarithms so they stay positive (split is also kept below 1). Every evaluation of the jacobian is one batched run
+# of the component with the base point and one forward difference per parameter as variants.
+# The cooling mode makes the predictions jump when a trial point switches it a step earlier or later. When the trace
+# measures the control temperature the fit replays the modes of the measurements; otherwise the differences follow
+# the modes of the base point, a jump of the hysteresis is not a derivative
+class componentCalibration(object):
+    def __init__(self, component, trace, names=None, fixed={}, initial=None, step=1e-4, spec=None):
+        self.component  = component
+        self.spec       = resolveSpec(spec)
+        self.batchClass = componentBatches[component]
+        self.trace      = trace
+        self.names      = list(names) if names is not None else calibrationParameters(component)
+        self.fixed      = dict(fixed)
+        self.step       = step
+        self.measured   = sorted(trace['temperatures'])
+        self.target     = np.concatenate([trace['temperatures'][state] for state in self.measured])
+        # Measured states start at their first measured value, the rest at the mean of them
+        if initial is None:
+            initial = dict((state, trace['temperatures'][state][0]) for state in self.measured)
+        start = np.mean(list(initial.values()))
+        self.initial    = dict((state, initial.get(state, start)) for state in self.batchClass.states)
+        self.modes      = self.measuredModes()
+        self.evaluations = 0
+        self.history     = []
+    # Cooling mode of every step chosen by the hysteresis from the measured control temperature, None if not measured.
+    # The mode of step k is chosen from the temperature at the end of step k-1
+    def measuredModes(self):
+        control = self.batchClass.controlVariable
+        if control not in self.trace['temperatures']:
+            return None
+        temperatures = np.r_[self.initial[control], self.trace['temperatures'][control][:-1]]
+        [mode, lag]  = [np.zeros(1, dtype=int), np.zeros(1, dtype=int)]
+        modes = np.empty(len(temperatures), dtype=int)
+        for (k, T) in enumerate(temperatures):
+            [mode, lag] = hysteresisModes(np.array([T]), mode, lag, self.batchClass.limitsUp, self.batchClass.limitsDown,
+                                          self.spec.exchLag)
+            modes[k] = mode[0]
+        return modes
+    # Simulates the component for every row of logParameters (N x parameters) and returns the N x samples predictions.
+    # With sharedModes every row switches cooling mode when the first one does
+    def simulate(self, logParameters, sharedModes=False):
+        logParameters = np.atleast_2d(logParameters)
+        N      = len(logParameters)
+        params = dict(self.fixed)
+        params.update((name, np.exp(logParameters[:, i])) for (i, name) in enumerate(self.names))
+        model  = self.batchClass(N, 0, self.spec, **params)
+        model.sharedModes = sharedModes
+        for (state, value) in self.initial.items():
+            setattr(model, state, np.full(N, value, dtype=float))
+        trace  = self.trace
+        steps  = len(trace['power'])
+        output = dict((state, np.empty((N, steps))) for state in self.measured)
+        # Trial points where the explicit step is unstable blow up, they are returned as large finite errors
+        with np.errstate(over='ignore', invalid='ignore'):
+            for k in range(steps):
+                if self.modes is not None:
+                    model.imposedMode = self.modes[k]
+                if self.batchClass in (tr_batch, cv_batch):
+                    model.timeStep(trace['power'][k], trace['PF'], trace['V'], trace['Tamb'][k])
+                else:
+                    model.timeStep(trace['power'][k], trace['Tamb'][k])
+                for state in self.measured:
+                    output[state][:, k] = getattr(model, state)
+        self.evaluations += N
+        return np.clip(np.nan_to_num(np.concatenate([output[state] for state in self.measured], axis=1), nan=1e3), -1e3, 1e3)
+    def residuals(self, x):
+        residual = self.simulate(x)[0] - self.target
+        self.history.append(float(np.dot(residual, residual))/2)
+        return residual
+    def jacobian(self, x):
+        variants = np.vstack([x, x + self.step*np.eye(len(x))])
+        outputs  = self.simulate(variants, sharedModes=True)
+        return ((outputs[1:] - outputs[0])/self.step).T
+    # Bounds in log space: free positive parameters, split in (0, 1]
+    def bounds(self):
+        lower = [np.log(1e-3) if name == 'split' else -np.inf for name in self.names]
+        upper = [0.0          if name == 'split' else  np.inf for name in self.names]
+        return (lower, upper)
+    # Runs the optimizer from the given starting values (default the component class values) and returns the report
+    def fit(self, start={}, maxEvaluations=200, tolerance=1e-8):
+        defaults = self.batchClass.scalarClass
+        x0 = np.log([start.get(name, getattr(defaults, name)) for name in self.names])
+        (lower, upper) = self.bounds()
+        x0 = np.clip(x0, lower, upper)
+        begin  = time.time()
+        result = scipy.optimize.least_squares(self.residuals, x0, jac=self.jacobian, bounds=(lower, upper),
+                                              max_nfev=maxEvaluations, xtol=tolerance, ftol=tolerance)
+        residual = result.fun
+        return {'component':   self.component,
+                'parameters':  dict(zip(self.names, np.exp(result.x).tolist())),
+                'cost':        float(result.cost),
+                'rmse':        float(np.sqrt(np.mean(residual**2))),
+                'maxError':    float(np.max(np.abs(residual))),
+                'success':     bool(result.success),
+                'message':     result.message,
+                'iterations':  int(result.nfev),
+                'simulations': self.evaluations,
+                'history':     self.history,
+                'seconds':     time.time() - begin}
+
+# Fits one component, module level so it can run on a worker process
+def calibrateComponent(component, trace, names=None, fixed={}, initial=None, start={}, maxEvaluations=200, spec=None):
+    calibration = componentCalibration(component, trace, names, fixed, initial, spec=spec)
+    return calibration.fit(start, maxEvaluations)
+# Fits several components concurrently. problems maps the component name to the keyword arguments of
+# calibrateComponent (at least 'trace'). Returns the reports keyed by component
+def calibrateAll(problems, workers=None):
+    reports = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers or len(problems)) as pool:
+        futures = dict((pool.submit(calibrateComponent, component, **problem), component)
+                       for (component, problem) in problems.items())
+        for future in concurrent.futures.as_completed(futures):
+            reports[futures[future]] = future.result()
+    return reports
+# Prints convergence and wall time of every fit with the parameters found
+def calibrationReport(reports):
+    for (component, report) in reports.items():
+        print('%-12s %s after %i iterations (%i simulations) in %.1f s, rmse %.3f C, max error %.3f C' %
+              (component, 'converged' if report['success'] else 'NOT converged', report['iterations'],
+               report['simulations'], report['seconds'], report['rmse'], report['maxError']))
+        print('             ' + ', '.join('%s %.4g' % item for item in report['parameters'].items()))
@@ -3,8 +3,22 @@
 
 dt              = 60
 reductionFactor = 1
+streamDecimation = 1            # Steps merged (per-window max) into each stored row while streaming, 1 keeps every step
 exchLag         = 100
 strechFactor    = 10
+gbmBackend      = 'ipopt'       # Air network solver: 'ipopt' (pyomo NLP), 'ipopt_persistent' (loaded once, warm started) or 'sparse' (native Newton + sparse linear solve)
+gbmCacheSize    = 0             # Max GBM solutions kept in the LRU cache, 0 disables it
+gbmCacheQuantum = {'tempExt': 0.5, 'tempPre': 0.5, 'heatFlow': 100, 'forced': 0.01}   # Quantisation of the cache key [C, C, W, kg/s]
+couplingMinInterval   = 10      # Steps between air network solves: never fewer than min, never more than max
+couplingMaxInterval   = 10
+couplingHeatTolerance = 500     #[W] Change of the summed heat inputs that triggers a solve before the max interval
+couplingTambTolerance = 0.5     #[C] Change of ambient temperature that triggers a solve before the max interval
+integrator      = 'euler'       # Component integration: 'euler' (explicit, needs small dt) or 'exponential' (exact per cooling mode)
+fastForward     = False         # Advance constant-input blocks of stretched series in one exact step (needs integrator = 'exponential')
+profileSteps    = False         # Time every stage of the machine steps (see stepProfiler), reported and saved as results/profile.json
+requestedGraphs = None          # Graphs built after a run by name (see graphTools.graphBuilders), None builds all of them
+graphWorkers    = None          # Processes building graphs from the results store, None uses every CPU, 1 builds them in this process
+checkpointEvery = 1440          # Steps between checkpoints of the whole simulation (main.py --resume continues from the last one), 0 disables them
 powerCurve      = []
 dataSetLength   = 2000
 dummyTamb       = 25
@@ -0,0 +1,59 @@
+# Decides at every machine time step whether the air network has to be solved again. The GBM is re-solved when the
+# summed heat inputs, the ambient temperature or the nacelle exchanger mode moved beyond the tolerances since the last
+# solve, never before minInterval steps and at the latest after maxInterval steps. With minInterval == maxInterval it
+# reproduces a fixed coupling interval
+class couplingScheduler(object):
+    def __init__(self, minInterval=10, maxInterval=10, heatTolerance=500, tambTolerance=0.5):
+        self.minInterval   = minInterval
+        self.maxInterval   = maxInterval
+        self.heatTolerance = heatTolerance    #[W]
+        self.tambTolerance = tambTolerance    #[C]
+        self.sinceSolve    = 0
+        self.reference     = None
+        self.solves        = 0
+        self.skipped       = 0
+        self.forcedByMax   = 0
+        self.maxHeatDrift  = 0.0
+        self.maxTambDrift  = 0.0
+        self.sumHeatDrift  = 0.0
+    # Scheduler with the intervals and tolerances of a run spec
+    @classmethod
+    def fromSpec(cls, spec):
+        return cls(spec.couplingMinInterval, spec.couplingMaxInterval,
+                   spec.couplingHeatTolerance, spec.couplingTambTolerance)
+    # Called once per step, True when the GBM should be solved in this step
+    def shouldSolve(self, heat, Tamb, exchMode):
+        self.sinceSolve += 1
+        if self.reference is None:
+            self.reference = (heat, Tamb, exchMode)
+        [heatRef, tambRef, modeRef] = self.reference
+        heatDrift = abs(heat - heatRef)
+        tambDrift = abs(Tamb - tambRef)
+        if self.sinceSolve >= self.maxInterval:
+            self.forcedByMax += 1
+            return True
+        if (self.sinceSolve >= self.minInterval and (heatDrift > self.heatTolerance or tambDrift > self.tambTolerance
+                                                     or exchMode != modeRef)):
+            return True
+        self.skipped      += 1
+        self.maxHeatDrift  = max(self.maxHeatDrift, heatDrift)
+        self.maxTambDrift  = max(self.maxTambDrift, tambDrift)
+        self.sumHeatDrift += heatDrift
+        return False
+    # Steps advanced without asking whether to solve (a fast-forwarded block), counted as skipped
+    def skip(self, steps):
+        self.sinceSolve += steps
+        self.skipped    += steps
+    # Steps elapsed since the previous solve
+    def interval(self):
+        return self.sinceSolve
+    # Registers a solve done with the given inputs, exchMode is the nacelle mode the solve was done with
+    def solved(self, heat, Tamb, exchMode):
+        self.solves    += 1
+        self.sinceSolve = 0
+        self.reference  = (heat, Tamb, exchMode)
+    # Solves done, steps skipped and the drift accepted on the skipped steps
+    def report(self):
+        return {'solves': self.solves, 'skipped': self.skipped, 'forcedByMaxInterval': self.forcedByMax,
+                'maxHeatDrift': float(self.maxHeatDrift), 'maxTambDrift': float(self.maxTambDrift),
+                'meanHeatDrift': float(self.sumHeatDrift)/self.skipped if self.skipped else 0.0}
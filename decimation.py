@@ -0,0 +1,67 @@
+import numpy as np
+
+# Index of the first maximum of every window, for several key columns at once: keys is a list of columns of the same
+# length, the result one row of indices per key. Same choice as keeping the first point that no later point of the
+# window exceeds
+def windowArgmax(keys, factor):
+    keys  = np.atleast_2d(np.asarray(keys, dtype=float))
+    count = -(-keys.shape[1]//factor)
+    padded = np.full((keys.shape[0], count*factor), -np.inf)
+    padded[:, :keys.shape[1]] = keys
+    return padded.reshape(keys.shape[0], count, factor).argmax(axis=2) + factor*np.arange(count)
+# Index of the first minimum of every window, as windowArgmax
+def windowArgmin(keys, factor):
+    return windowArgmax(-np.asarray(keys, dtype=float), factor)
+# Same as windowArgmax for windows of unequal length: groups holds the non decreasing window number of every point
+def groupArgmax(keys, groups):
+    keys   = np.atleast_2d(np.asarray(keys, dtype=float))
+    groups = np.asarray(groups)
+    first  = np.r_[0, np.flatnonzero(np.diff(groups)) + 1]
+    order  = [np.lexsort((-key, groups)) for key in keys]
+    return np.array([rows[first] for rows in order])
+def groupArgmin(keys, groups):
+    return groupArgmax(-np.asarray(keys, dtype=float), groups)
+# Rows of the minimum and the maximum of every window in time order, one array per key: the band a dense series covers
+# at the reduced resolution. A window whose minimum and maximum are the same row keeps it once
+def envelopeRows(keys, groups):
+    return [np.unique(np.r_[low, high]) for (low, high) in zip(groupArgmin(keys, groups), groupArgmax(keys, groups))]
+# Window number of every row when the rows cover spans steps each and a window is factor steps. A row belongs to the
+# window its first step falls in
+def stepWindows(spans, factor):
+    return (np.cumsum(spans) - spans)//factor
+
+# Largest triangle three buckets: the threshold rows that best keep the visual shape of y(x). First and last points are
+# always kept, every bucket in between keeps the point forming the largest triangle with the previous pick and the
+# average of the next bucket
+def lttb(y, threshold, x=None):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    return lttbBuckets(y, np.linspace(1, n-1, threshold-1).astype(int), x)
+# Same as lttb with one bucket per window: groups holds the non decreasing window number of every point, x its position
+# (the first step of rows covering several steps)
+def groupLttb(keys, groups, x=None):
+    groups = np.asarray(groups)
+    n      = len(groups)
+    if n < 3:
+        return [np.arange(n) for key in keys]
+    edges = np.r_[1, np.flatnonzero(np.diff(groups[1:-1])) + 2, n-1]
+    return [lttbBuckets(key, edges, x) for key in keys]
+# Picks of the largest triangle three buckets, bucket i covering the rows edges[i] to edges[i+1]. The picks depend on
+# each other, the area of every point of a bucket is computed at once
+def lttbBuckets(y, edges, x=None):
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x).astype(float)
+    selected = np.empty(len(edges) + 1, dtype=int)
+    selected[0]  = 0
+    selected[-1] = n-1
+    a = 0
+    for i in range(len(edges) - 1):
+        [start, end] = [edges[i], edges[i+1]]
+        following    = slice(edges[i+1], edges[i+2]) if i+2 < len(edges) else slice(n-1, n)
+        [avgX, avgY] = [x[following].mean(), y[following].mean()]
+        area = np.abs((x[a] - avgX)*(y[start:end] - y[a]) - (x[a] - x[start:end])*(avgY - y[a]))
+        a = start + int(area.argmax())
+        selected[i+1] = a
+    return selected
@@ -0,0 +1,155 @@
+import collections
+
+import numpy as np
+import scipy.linalg
+
+# Between cooling mode switches every component is a linear RC network  dx/dt = A x + B [losses, Tamb]
+# Each model below gives the dynamic states, the parameters A and B depend on, and the right hand side of the
+# network together with its algebraic temperatures and heat flows, evaluated consistently at the state x.
+
+# TRANSFORMER and GEARBOX: windings/gears ---> oil bath ---> water circuit ---> air
+def solidOilWaterRates(c, x, losses, Tamb):
+    [solid, oilCold, waterCold] = x
+    solid_oil = (solid  - oilCold) * c.solid_oil_trans
+    oilHot    = oilCold + solid_oil / c.oilC
+    oilWater  = (oilHot - waterCold) * c.oil_water_trans
+    waterHot  = waterCold + oilWater / c.waterC
+    heatOut   = (waterHot - Tamb) * c.water_air_trans
+    rates = [(losses * c.split - solid_oil) / c.solid_int,
+             (solid_oil - oilWater)         / c.oil_int,
+             (oilWater - heatOut)           / c.water_int]
+    return [rates, {'oilHot': oilHot, 'waterHot': waterHot, 'oilWater': oilWater, 'heatOut': heatOut}]
+# CONVERTER: circuits ---> water circuit ---> air
+def solidWaterRates(c, x, losses, Tamb):
+    [solid, waterCold] = x
+    solidWater = (solid - waterCold) * c.solid_water_trans
+    waterHot   = waterCold + solidWater / c.waterC
+    heatOut    = (waterHot - Tamb) * c.water_air_trans
+    rates = [(losses * c.split - solidWater) / c.solid_int,
+             (solidWater - heatOut)          / c.water_int]
+    return [rates, {'waterHot': waterHot, 'solidWater': solidWater, 'heatOut': heatOut}]
+# GENERATOR: rotor and stator ---> internal air and water circuit ---> air. The internal air loop is algebraic
+def generatorRates(c, x, losses, Tamb):
+    [rotor, stator, waterCold] = x
+    loopCoeff    = 1.0/c.airIn_water_trans - 1.0/c.airInC
+    airCold      = ((waterCold + loopCoeff*(c.rotor_air_trans*rotor + c.stator_air_trans*stator))
+                    / (1 + loopCoeff*(c.rotor_air_trans + c.stator_air_trans)))
+    rotor_air    = (rotor  - airCold)   * c.rotor_air_trans
+    stator_air   = (stator - airCold)   * c.stator_air_trans
+    stator_water = (stator - waterCold) * c.stator_water_trans
+    waterHot     = waterCold + (stator_water + stator_air + rotor_air)/c.waterC
+    airHot       = waterCold + (stator_air   + rotor_air)/c.airIn_water_trans
+    heatOut      = (waterHot - Tamb) * c.water_air_trans
+    lossesRotor  = 0.4 * losses*c.split
+    lossesStator = losses*c.split - lossesRotor
+    rates = [(lossesRotor  - rotor_air)                            / c.rotor_int,
+             (lossesStator - stator_air - stator_water)            / c.stator_int,
+             (stator_water + stator_air + rotor_air - heatOut)     / c.water_int]
+    return [rates, {'waterHot': waterHot, 'airHot': airHot, 'airCold': airCold, 'heatOut': heatOut}]
+
+# Description of the linear network of every component class, keyed by class name
+linearModels = {
+    'tr_component': (['solid', 'oilCold', 'waterCold'],
+                     ['solid_oil_trans', 'oil_water_trans', 'solid_int', 'oil_int', 'water_int', 'oilC', 'waterC', 'split'],
+                     solidOilWaterRates),
+    'cv_component': (['solid', 'waterCold'],
+                     ['solid_water_trans', 'solid_int', 'water_int', 'waterC', 'split'],
+                     solidWaterRates),
+    'gn_component': (['rotor', 'stator', 'waterCold'],
+                     ['rotor_air_trans', 'stator_air_trans', 'stator_water_trans', 'airIn_water_trans', 'rotor_int',
+                      'stator_int', 'water_int', 'airInC', 'waterC', 'split'],
+                     generatorRates),
+    'gb_component': (['solid', 'oilCold', 'waterCold'],
+                     ['solid_oil_trans', 'oil_water_trans', 'solid_int', 'oil_int', 'water_int', 'oilC', 'waterC', 'split'],
+                     solidOilWaterRates)}
+
+# Least recently used store of transfer matrices with at most size entries. Calibration and parameter sweeps try a new
+# set of parameters on every evaluation, the matrices of the sets no longer in use are dropped
+class matrixCache(object):
+    def __init__(self, size):
+        self.size      = size
+        self.entries   = collections.OrderedDict()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+    def get(self, key):
+        matrices = self.entries.get(key)
+        if matrices is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return matrices
+    def store(self, key, matrices):
+        self.entries[key] = matrices
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    def __len__(self):
+        return len(self.entries)
+
+# Discrete transfer matrices [Ad, Bd] per (class, parameters, cooling mode, dt), built once and reused
+discreteCache = matrixCache(4096)
+# Stacked transfer matrices of 1..steps time steps, per (class, parameters, cooling mode, dt, steps)
+blockCache    = matrixCache(256)
+
+# Builds the continuous matrices by probing the linear right hand side with unit states and inputs
+def continuousMatrices(component, states, rates):
+    n = len(states)
+    A = np.zeros((n, n))
+    B = np.zeros((n, 2))
+    for i in range(n):
+        A[:, i] = rates(component, np.eye(n)[i], 0, 0)[0]
+    B[:, 0] = rates(component, np.zeros(n), 1, 0)[0]
+    B[:, 1] = rates(component, np.zeros(n), 0, 1)[0]
+    return [A, B]
+# Identifies the linear network of a component: class, parameters and the cooling mode coefficient in use
+def modelKey(component):
+    [states, parameters, rates] = linearModels[type(component).__name__]
+    return (type(component).__name__, tuple(getattr(component, p) for p in parameters), component.water_air_trans)
+# Zero order hold discretisation through the matrix exponential of the augmented system [[A, B], [0, 0]]
+def discreteMatrices(component, dt):
+    [states, parameters, rates] = linearModels[type(component).__name__]
+    key = modelKey(component) + (dt,)
+    matrices = discreteCache.get(key)
+    if matrices is None:
+        [A, B] = continuousMatrices(component, states, rates)
+        n = len(states)
+        augmented = np.zeros((n+2, n+2))
+        augmented[:n, :n] = A
+        augmented[:n, n:] = B
+        transfer = scipy.linalg.expm(augmented*dt)
+        matrices = [transfer[:n, :n], transfer[:n, n:]]
+        discreteCache.store(key, matrices)
+    return matrices
+# Advances the dynamic states of a component over dt for constant losses and ambient temperature,
+# then refreshes its algebraic temperatures and heat flows. Exact for the linear network at any dt
+def advanceExact(component, Tamb, dt):
+    [states, parameters, rates] = linearModels[type(component).__name__]
+    [Ad, Bd] = discreteMatrices(component, dt)
+    x = Ad.dot([getattr(component, name) for name in states]) + Bd.dot([component.losses, Tamb])
+    for (name, value) in zip(states, x):
+        setattr(component, name, float(value))
+    for (name, value) in rates(component, x, component.losses, Tamb)[1].items():
+        setattr(component, name, float(value))
+    component.lossesAir = component.losses * (1- component.split)
+# Transfer matrices of 1, 2 ... steps time steps of dt, stacked as [steps x n x n, steps x n x 2]
+def blockMatrices(component, dt, steps):
+    key = modelKey(component) + (dt, steps)
+    matrices = blockCache.get(key)
+    if matrices is None:
+        transfers = [discreteMatrices(component, i*dt) for i in range(1, steps+1)]
+        matrices  = [np.array([Ad for (Ad, Bd) in transfers]), np.array([Bd for (Ad, Bd) in transfers])]
+        blockCache.store(key, matrices)
+    return matrices
+# States, algebraic temperatures and heat flows of a component after each of the next steps time steps for constant
+# losses, ambient temperature and cooling mode, as arrays of length steps keyed by attribute name. The state is not changed
+def trajectoryExact(component, Tamb, dt, steps):
+    [states, parameters, rates] = linearModels[type(component).__name__]
+    [Ads, Bds] = blockMatrices(component, dt, steps)
+    x = np.array([getattr(component, name) for name in states], dtype=float)
+    X = (Ads.dot(x) + Bds.dot([component.losses, Tamb])).T
+    trajectory = dict(zip(states, X))
+    trajectory.update(rates(component, X, component.losses, Tamb)[1])
+    return trajectory
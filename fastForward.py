@@ -0,0 +1,70 @@
+import copy
+import datetime
+import numpy as np
+
+from exponentialIntegrator import trajectoryExact
+from batchedComponents import tr_batch, cv_batch, gn_batch, gb_batch
+from thermal_inertia_tools import stretchedSeries
+
+components = ['transformer', 'converter', 'generator', 'gearbox']
+# Hysteresis limits, control and alarm variables of every component class, the same tables the batched models use
+switchTables = dict((batch.scalarClass.__name__, batch) for batch in (tr_batch, cv_batch, gn_batch, gb_batch))
+
+# Steps from k on with the same wind and ambient temperature: the rest of the stretch when both series are stretched alike
+def constantBlock(winds, temperatures, k, steps):
+    if (isinstance(winds, stretchedSeries) and isinstance(temperatures, stretchedSeries)
+            and winds.factor == temperatures.factor):
+        return min(winds.factor - k % winds.factor, steps - k)
+    return 1
+
+# Trajectory of a component over the next steps of a block with the cooling mode it is in, and its exchLag at the end.
+# None when exchCoeffFunc would switch mode or the alarm would differ from the one at the start of the block anywhere in
+# it, so the derating stays the same and the block is accounted for exactly with the final state
+def blockTrajectory(component, Tamb, steps, alarm):
+    table      = switchTables[type(component).__name__]
+    trajectory = trajectoryExact(component, Tamb, component.spec.dt, steps)
+    # Temperatures seen by exchCoeffFunc in the remaining steps: the current state and all but the last
+    control = np.concatenate(([getattr(component, table.controlVariable)], trajectory[table.controlVariable][:-1]))
+    alarms  = np.concatenate(([getattr(component, table.alarmVariable)],   trajectory[table.alarmVariable]))
+    if ((alarms > getattr(component, table.alarmLimit)) != alarm).any():
+        return None
+    # Same rules as exchCoeffFunc: above the limit of the mode the lag restarts, above the next one the mode goes up,
+    # below the lower limit with the lag over the mode goes down
+    [mode, lag, limitsUp, limitsDown] = [component.exchMode, component.exchLag, table.limitsUp, table.limitsDown]
+    for T in control:
+        lag -= 1
+        if T > limitsUp[mode]:
+            if mode+1 < len(limitsUp) and T > limitsUp[mode+1]:
+                return None
+            lag = component.spec.exchLag
+        elif (T < limitsDown[mode]) and (lag < 1):
+            return None
+    return [trajectory, lag]
+
+# Advances a machineState over n steps of constant wind and ambient temperature at once: the first step as usual, the
+# other n-1 in one exact step of every component, then one pass of the air network coupling. Needs the exponential
+# integrator. Returns False and leaves the state untouched when a mode switch or alarm change happens inside the block,
+# the caller then steps it one by one
+def advanceBlock(state, n, wind, PF, V, Tamb, nominal=None):
+    if n < 2 or state.spec.integrator != 'exponential':
+        return False
+    trial = copy.copy(state)
+    for name in components:
+        setattr(trial, name, copy.copy(getattr(state, name)))
+    trial.advanceComponents(wind, PF, V, Tamb, nominal)
+    trajectories = []
+    for name in components:
+        block = blockTrajectory(getattr(trial, name), Tamb, n-1, getattr(state, name).alarm)
+        if block is None:
+            return False
+        trajectories.append([getattr(trial, name)] + block)
+    for (component, trajectory, lag) in trajectories:
+        for (variable, values) in trajectory.items():
+            setattr(component, variable, float(values[-1]))
+        component.exchLag = lag
+        component.alarmFunc()
+    trial.time += datetime.timedelta(seconds = (n-1)*state.spec.dt)
+    state.__dict__.update(trial.__dict__)
+    state.couplingStep(Tamb, n-1)
+    state.span = n
+    return True
@@ -3,15 +3,24 @@ import pandas
 import pyomo.opt
 import pyomo.environ as pyoenv
 import numpy as np
+import logging
+import copy
+import time
+import hashlib
+import collections
+import functools
 
-import config
+from runSpec import resolveSpec
+from sparseNetwork import sparseAirNetwork
 
 class air_volume_GBM:
 
 
-    def __init__(self):
-        self.dt = config.dt
-        self.createModel()
+    def __init__(self, spec=None):
+        self.spec = resolveSpec(spec)         # Settings of the run (runSpec), built from config when not given
+        self.dt = self.spec.dt
+        self.backend = self.spec.gbmBackend   # 'ipopt' solves the pyomo model, 'sparse' uses the native sparseAirNetwork
+        self.model   = None                   # Built by loadModelData, or taken from builtModels
         # self.air_int            = 400     #[kJ/K] Thermal inertia for the oil bath
         # self.airC               = 10      #[kW/K] Heat carryng capacity of the water current
         self.airCold_Limit      = 38
@@ -28,6 +37,11 @@ class air_volume_GBM:
         self.towerMode     = 0
         self.towerLag      = 0
 
+        self.session       = None
+        self.solveTimes    = []
+        self.sparseInfeasible = 0             # Sparse solutions outside the model bounds, re-solved by ipopt when installed
+        self.cache         = gbmSolutionCache(self.spec.gbmCacheSize, dict(self.spec.gbmCacheQuantum)) if self.spec.gbmCacheSize else None
+
     def createModel(self):
         self.model = pyoenv.AbstractModel()
         # Create sets
@@ -50,16 +64,17 @@ class air_volume_GBM:
         self.model.forced      = pyoenv.Param(self.model.bond_set, mutable= True)
         self.model.dropCoeff   = pyoenv.Param(self.model.bond_set)
         self.model.heatFlow    = pyoenv.Param(self.model.bond_set, mutable= True)
+        self.model.dt          = pyoenv.Param(mutable= True, initialize= self.dt)   # Set from self.dt before every solve
         # Create variables
         self.model.flow     = pyoenv.Var(self.model.bond_set, domain=pyoenv.NonNegativeReals, initialize =0)
         self.model.pressure = pyoenv.Var(self.model.node_set, domain=pyoenv.NonNegativeReals, initialize =0)
         self.model.exterior = pyoenv.Var(self.model.node_set, domain=pyoenv.Reals,            initialize = 0)
         self.model.temper   = pyoenv.Var(self.model.node_set, domain=pyoenv.NonNegativeReals, initialize = 24)
+        topology = self.topology      # Neighbours of every node, compiled once from the tab files
 #-------# Flow Ballance ruleforced
         def flow_bal_rule(model, node):
-            bonds = model.bond_set
-            preds = [i for (i,j) in bonds if j == node]#bonds[ bonds[:][1] == node ][0]
-            succs = [j for (i,j) in bonds if i == node]#bonds[ bonds[:][0] == node ][1]
+            preds = topology.predecessors[node]
+            succs = topology.successors[node]
             return sum(model.flow[(p,node)] for p in preds) + model.exterior[node] == sum(model.flow[(node,s)] for s in succs)
 #-------# Forced rule
         def forced_rule(model, n1, n2):
@@ -88,9 +103,8 @@ class air_volume_GBM:
                           for (i,j) in model.bond_set]
             heatEq = []
             for node in model.node_set:
-                bonds = model.bond_set
-                preds = [i for (i,j) in bonds if j == node]
-                succs = [j for (i,j) in bonds if i == node]
+                preds = topology.predecessors[node]
+                succs = topology.successors[node]
 
                 nexterm = 0
                 if model.inlet[node]:
@@ -101,7 +115,7 @@ class air_volume_GBM:
                 nextTerm += (  cP*sum(model.flow[(p,node)]*model.temper[p]     for p in preds)
                              - cP*sum(model.flow[(node,s)]*model.temper[node]  for s in succs)
                              +    sum(model.heatFlow[(p,node)]                 for p in preds)
-                             + cP*model.airMass[node]*(model.tempPre[node]-model.temper[node])/self.dt)
+                             + cP*model.airMass[node]*(model.tempPre[node]-model.temper[node])/model.dt)
                 heatEq.append(nextTerm)
 
             totalEq = pressureEq + heatEq
@@ -118,6 +132,24 @@ class air_volume_GBM:
     def solve(self):
 
         """Solve the model."""
+        start = time.perf_counter()
+        self.instance.dt = self.dt      # The coupling scheduler changes dt between solves
+        if self.cache is not None:
+            key = self.cache.key(self.instance, self.dt)
+            if self.cache.restore(key, self.instance):
+                self.solveTimes.append(time.perf_counter() - start)
+                return
+        if self.backend == 'sparse':
+            self.solveSparse()
+        elif self.backend == 'ipopt_persistent':
+            self.solvePersistent()
+        else:
+            self.solveIpopt()
+        if self.cache is not None:
+            self.cache.store(key, self.instance)
+        self.solveTimes.append(time.perf_counter() - start)
+    # Writes and solves the whole instance with a fresh ipopt process
+    def solveIpopt(self):
         solver = pyomo.opt.SolverFactory('ipopt')
         self.results = solver.solve(self.instance, tee=False, keepfiles=False )#, options_string="mip_tolerances_integrality=1e-9 mip_tolerances_mipgap=0")
 
@@ -125,8 +157,39 @@ class air_volume_GBM:
             logging.warning('Check solver not ok?')
         if (self.results.solver.termination_condition != pyomo.opt.TerminationCondition.optimal):
             logging.warning('Check solver optimality?')
+    # Solves through a session that keeps the current instance loaded, recreated only when the instance is rebuilt
+    def solvePersistent(self):
+        if (self.session is None) or (self.session.instance is not self.instance):
+            self.session = persistentIpoptSession(self.instance)
+        self.results = self.session.solve()
+    # Count, total, mean and max wall-clock time of the solves done so far [s], and the sparse solutions outside the bounds
+    def solveTimingReport(self):
+        times = np.array(self.solveTimes)
+        if len(times) == 0:
+            return {'backend': self.backend, 'solves': 0, 'total': 0.0, 'mean': 0.0, 'max': 0.0, 'outsideBounds': 0}
+        return {'backend': self.backend, 'solves': len(times), 'total': times.sum(), 'mean': times.mean(), 'max': times.max(),
+                'outsideBounds': self.sparseInfeasible}
 
+    # Gives this GBM its own instance and sparse network for the given tab files. They are cloned from the ones built
+    # before from files with the same contents, built on a miss. dt is a mutable parameter of the instance, set from
+    # this GBM here and again by every solve, so runs with different time steps share the build
     def loadModelData(self, nodesfile, bondsfile):
+        key   = topologyKey(nodesfile, bondsfile)
+        built = builtModels.get(key)
+        if built is None:
+            self.buildModelData(nodesfile, bondsfile)
+            built = builtModels.setdefault(key, (self.model, self.instance, self.network))
+        [self.model, template, network] = built
+        self.instance = template.clone()
+        self.instance.dt = self.dt
+        self.network  = copy.deepcopy(network)
+        self.topology = self.network.topology
+    # Builds the sparse network and its topology, then the pyomo model and its instance from the tab files through a
+    # DataPortal. The model rules take the neighbours of every node from the topology
+    def buildModelData(self, nodesfile, bondsfile):
+        self.network  = sparseAirNetwork(nodesfile, bondsfile)
+        self.topology = self.network.topology
+        self.createModel()
         data = pyoenv.DataPortal()
         data.load(filename=nodesfile,param=(self.model.minExterior,
                                             self.model.maxExterior,
@@ -147,6 +210,29 @@ class air_volume_GBM:
                                             index=self.model.bond_set)
 
         self.instance = self.model.create_instance(data)
+    # Solves the network with the native sparse backend, reading the mutable parameters from the instance and writing the results back
+    def solveSparse(self):
+        network  = self.network
+        instance = self.instance
+        nodeParam = lambda param: np.array([pyoenv.value(param[node]) for node in network.nodes], dtype=float)
+        bondParam = lambda param: np.array([pyoenv.value(param[bond]) for bond in network.bonds], dtype=float)
+        [flow, pressure, exterior, temper] = network.solve(nodeParam(instance.tempExt),     nodeParam(instance.tempPre),
+                                                           bondParam(instance.heatFlow),    bondParam(instance.forced),
+                                                           nodeParam(instance.minExterior), nodeParam(instance.maxExterior),
+                                                           self.dt)
+        for (i, node) in enumerate(network.nodes):
+            instance.pressure[node].value = float(pressure[i])
+            instance.exterior[node].value = float(exterior[i])
+            instance.temper[node].value   = float(temper[i])
+        for (b, bond) in enumerate(network.bonds):
+            instance.flow[bond].value     = float(flow[b])
+        if any(network.violations.values()):
+            self.sparseInfeasible += 1
+            if ipoptAvailable():
+                logging.warning('Sparse air network solution outside the model bounds %s, solving with ipopt' % network.violations)
+                self.solveIpopt()   # Starts from the sparse solution written above
+            elif self.sparseInfeasible == 1:    # Once per run, solveTimingReport counts the rest
+                logging.warning('Sparse air network solution outside the model bounds %s, ipopt not available to re-solve it' % network.violations)
 
     def updateAirFlows(self,machineState):
         self.instance.minExterior['Air_treatment_system']                 = self.airTreatmentInFlow(machineState)
@@ -180,6 +266,12 @@ class air_volume_GBM:
         self.instance.heatFlow[('Nacelle_bottom_front', 'Hub')]                 = 0
         self.instance.heatFlow[('Hub', 'Hub_leakage_exterior')]                 = 0
 
+    # Sum of the heat injected in the network by the components and equipment, without the air-temperature dependent coolings
+    def heatInputs(self,machineState):
+        return (self.airTreatmentHeat(machineState)      + self.converterPlatformHeat(machineState)
+                + self.switchgearPlatformHeat(machineState) + self.transformerPlatformHeat(machineState)
+                + self.driveTrainHeatLower(machineState)    + self.driveTrainHeatFront(machineState)
+                + self.driveTrainHeatUpper(machineState)    + self.driveTrainHeatRear(machineState))
     def airTreatmentHeat(self,machineState):
         return 1000
     def converterPlatformHeat(self,machineState):
@@ -204,7 +296,7 @@ class air_volume_GBM:
             for i in range(self.exchMode,len(limitsUp)):
                 if airTemp > limitsUp[i]:
                     self.exchMode = i
-                    self.exchLag  = config.exchLag
+                    self.exchLag  = self.spec.exchLag
         elif (airTemp < limitsDown[self.exchMode]) & (self.exchLag<1) :
             for i in range(self.exchMode,0,-1):
                 if self.airMiddle < limitsDown[i]:
@@ -238,16 +330,13 @@ class air_volume_GBM:
     def advanceTemperatures(self):
         for node in self.instance.node_set:
                self.instance.tempPre[node]= self.instance.temper[node].value
+    # Node temperatures, bond flows and bond heat flows keyed by name, in the order of the topology
     def resultsToDictionary(self):
-        temperatureDict={}
-        for node in self.instance.node_set:
-            temperatureDict.update({node:self.instance.temper[node].value})
-        flowDict={}
-        heatDict={}
-        for bond in self.instance.bond_set:
-            flowDict.update({bond:self.instance.flow[bond].value})
-            heatDict.update({bond:self.instance.heatFlow[bond].value})
-        heatDict.update({'exchMode':self.exchMode})
+        [instance, nodes, bonds] = [self.instance, self.topology.nodes, self.topology.bonds]
+        temperatureDict = dict(zip(nodes, [instance.temper[node].value for node in nodes]))
+        flowDict        = dict(zip(bonds, [instance.flow[bond].value for bond in bonds]))
+        heatDict        = dict(zip(bonds, [instance.heatFlow[bond].value for bond in bonds]))
+        heatDict['exchMode'] = self.exchMode
         return [temperatureDict,flowDict,heatDict]
     def printInfo(self):
         print( '\n\n---------------------------')
@@ -261,3 +350,118 @@ class air_volume_GBM:
         print('\n %-50s  %-13s  %-13s  %-13s  %-13s' % ('Node', 'Temperature', 'Temp[-1]', 'Pressure', 'Exterior'))
         for node in self.instance.node_set:
             print(s %(node, self.instance.temper[node].value, self.instance.tempPre[node].value, self.instance.pressure[node].value, self.instance.exterior[node].value))
+
+# Whether the ipopt executable is installed, looked up once per process
+@functools.lru_cache(maxsize=None)
+def ipoptAvailable():
+    return bool(pyomo.opt.SolverFactory('ipopt').available(exception_flag=False))
+
+# Models built by air_volume_GBM.loadModelData: (model, instance, sparse network) templates that are never solved, only
+# cloned, keyed on topologyKey
+builtModels = {}
+# Digest of the contents of the nodes and bonds tab files, the same topology read from another path shares its build
+def topologyKey(nodesfile, bondsfile):
+    digests = []
+    for filename in (nodesfile, bondsfile):
+        with open(filename, 'rb') as tabfile:
+            digests.append(hashlib.sha1(tabfile.read()).hexdigest())
+    return tuple(digests)
+
+# Ipopt session that keeps the GBM instance loaded between calls. Only the mutable parameters (tempExt, tempPre,
+# heatFlow, forced and the exterior bounds) are pushed on every solve and the previous primal solution is the start point
+class persistentIpoptSession(object):
+    warmStartOptions = {'warm_start_init_point':      'yes',
+                        'warm_start_bound_push':      1e-9,
+                        'warm_start_mult_bound_push': 1e-9,
+                        'mu_init':                    1e-4}
+    def __init__(self, instance):
+        self.instance   = instance
+        self.solveTimes = []
+        try:
+            from pyomo.contrib.appsi.solvers import Ipopt
+            from pyomo.contrib.appsi.base import TerminationCondition
+            self.terminationCondition = TerminationCondition
+        except ImportError:
+            Ipopt = None
+        if Ipopt is not None:
+            self.solver = Ipopt()
+            self.solver.config.load_solution = False
+            update = self.solver.update_config
+            update.check_for_new_or_removed_constraints = False
+            update.check_for_new_or_removed_vars        = False
+            update.check_for_new_or_removed_params      = False
+            update.check_for_new_objective              = False
+            update.update_constraints                   = False
+            update.update_vars                          = False
+            update.update_named_expressions             = False
+            update.update_objective                     = False
+            update.update_params                        = True
+            self.solver.ipopt_options.update(self.warmStartOptions)
+            self.persistent = True
+        else:   # Older pyomo: plain ipopt, the current variable values are still written as the start point
+            self.solver = pyomo.opt.SolverFactory('ipopt')
+            self.solver.options.update(self.warmStartOptions)
+            self.persistent = False
+        self.solves = 0
+    def solve(self):
+        start = time.perf_counter()
+        if self.persistent:
+            results = self.solver.solve(self.instance)
+            if results.termination_condition != self.terminationCondition.optimal:
+                logging.warning('Check solver optimality?')
+            if results.best_feasible_objective is not None:
+                results.solution_loader.load_vars()
+        else:
+            results = self.solver.solve(self.instance, tee=False, keepfiles=False)
+            if (results.solver.status != pyomo.opt.SolverStatus.ok):
+                logging.warning('Check solver not ok?')
+            if (results.solver.termination_condition != pyomo.opt.TerminationCondition.optimal):
+                logging.warning('Check solver optimality?')
+        self.solves += 1
+        self.solveTimes.append(time.perf_counter() - start)
+        return results
+
+# Bounded LRU memo of GBM solutions keyed on the boundary conditions quantised with the steps given per parameter.
+# Repeated operating points (night calm, steady rated wind) restore the stored solution instead of calling the solver
+class gbmSolutionCache(object):
+    def __init__(self, size, quantum):
+        self.size      = size
+        self.quantum   = quantum
+        self.entries   = collections.OrderedDict()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+    # Quantised tempExt, tempPre, heatFlow and forced plus the exact exterior bounds and time step
+    def key(self, instance, dt):
+        key = [dt]
+        for name in ('tempExt', 'tempPre', 'heatFlow', 'forced'):
+            step  = self.quantum[name]
+            param = getattr(instance, name)
+            key.extend(int(round(pyoenv.value(param[index])/step)) for index in param)
+        key.extend(pyoenv.value(instance.minExterior[node]) for node in instance.node_set)
+        key.extend(pyoenv.value(instance.maxExterior[node]) for node in instance.node_set)
+        return tuple(key)
+    # Loads a stored solution into the instance variables, returns False on a miss
+    def restore(self, key, instance):
+        solution = self.entries.get(key)
+        if solution is None:
+            self.misses += 1
+            return False
+        self.entries.move_to_end(key)
+        self.hits += 1
+        for (name, values) in solution.items():
+            var = getattr(instance, name)
+            for (index, value) in zip(var, values):
+                var[index].value = value
+        return True
+    def store(self, key, instance):
+        self.entries[key] = dict((name, [getattr(instance, name)[index].value for index in getattr(instance, name)])
+                                 for name in ('flow', 'pressure', 'exterior', 'temper'))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'entries': len(self.entries),
+                'hitRate': float(self.hits)/lookups if lookups else 0.0}
@@ -1,32 +1,111 @@
 
-import plotly.plotly as py
 import plotly.offline as pyoff
 import plotly.graph_objs as go
 import numpy as np
-from plotly import tools
+import time
+import concurrent.futures
 from datetime import datetime
 
-import config
-
-# Graphs related with component internal temperatures and ambient conditions
-def outputRequestedGraphs(stateSeries):
-    windPowerGraphs(stateSeries)
-    windTemperatureHeatMap(stateSeries)
-    lossesGraph(stateSeries)
-
-    graphTransformer(stateSeries)
-    graphConverter(stateSeries)
-    graphGenerator(stateSeries)
-    graphGearbox(stateSeries)
-    graphNacelle(stateSeries)
-    graphTower(stateSeries)
+from runSpec       import resolveSpec
+from columnarState import bondColumnName, rowSpans
+from resultsStore  import openResults
+from decimation    import windowArgmax, windowArgmin, groupArgmax, groupArgmin, envelopeRows, groupLttb, stepWindows
+
+# Column and reduction of every reduced graph, over windows of spec.reductionFactor steps: 'max' keeps the most adverse
+# point of the window, 'min' the coldest, 'envelope' both, 'lttb' the points keeping the visual shape of the column
+# (largest triangle three buckets, one bucket per window)
+reductionKeys = {'wind':        ('potential',                          'lttb'),
+                 'transformer': ('transformer.oilHot',                 'max'),
+                 'converter':   ('converter.waterCold',                'max'),
+                 'generator':   ('generator.waterCold',                'max'),
+                 'gearbox':     ('gearbox.oilCold',                    'max'),
+                 'nacelle':     ('air.temperature.Nacelle_top_rear',   'envelope'),
+                 'tower':       ('air.temperature.Converter_platform', 'envelope')}
+# Rows kept by every reduction for its key columns, the window number and the first step of every row
+reducers = {'max':      lambda keys, windows, steps: groupArgmax(keys, windows),
+            'min':      lambda keys, windows, steps: groupArgmin(keys, windows),
+            'envelope': lambda keys, windows, steps: envelopeRows(keys, windows),
+            'lttb':     lambda keys, windows, steps: groupLttb(keys, windows, steps)}
+# Rows kept by the reduced graphs, keyed as reductionKeys. The keys of a reduction are reduced together in one vectorised
+# pass. Rows covering more than one step (fast-forward, stream decimation) make the windows uneven in rows
+def reducedRows(stateSeries, graphs=None, spec=None):
+    factor = resolveSpec(spec).reductionFactor
+    graphs = list(reductionKeys) if graphs is None else graphs
+    spans  = rowSpans(stateSeries)
+    steps  = np.cumsum(spans) - spans
+    rows   = {}
+    for method in set(reductionKeys[graph][1] for graph in graphs):
+        names = [graph for graph in graphs if reductionKeys[graph][1] == method]
+        keys  = [stateSeries.column(reductionKeys[graph][0]) for graph in names]
+        if method in ('max', 'min') and (spans == 1).all():
+            reduced = (windowArgmax if method == 'max' else windowArgmin)(keys, factor)
+        else:
+            reduced = reducers[method](keys, steps//factor, steps)
+        rows.update(zip(names, reduced))
+    return rows
+# First value of every window of spec.reductionFactor steps of a column
+def sampledColumn(stateSeries, name, spec):
+    spans = rowSpans(stateSeries)
+    if (spans == 1).all():
+        return stateSeries.column(name)[0::spec.reductionFactor]
+    windows = stepWindows(spans, spec.reductionFactor)
+    return stateSeries.column(name)[np.r_[0, np.flatnonzero(np.diff(windows)) + 1]]
+# Sum of the heat flows through the given bonds of the air network at the given rows
+def heatFlowSum(stateSeries, bonds, rows):
+    return sum(stateSeries.column('air.heatFlows.' + bondColumnName(bond))[rows] for bond in bonds)
+
+# Builds the requested graphs (names of graphBuilders, spec.requestedGraphs by default, None for all of them) and
+# returns the seconds each one took. A results store on disk is shared read-only by a pool of worker processes that
+# build one graph each; series only held in memory, or workers = 1, are built one after another in this process.
+# spec (runSpec, from config when not given) sets the output folder, the reduction of the graphs and, when graphs or
+# workers are not given, spec.requestedGraphs and spec.graphWorkers
+def outputRequestedGraphs(stateSeries, graphs=None, workers=None, spec=None):
+    spec      = resolveSpec(spec)
+    graphs    = spec.requestedGraphs if graphs is None else graphs
+    graphs    = [name for (name, builder) in graphBuilders] if graphs is None else list(graphs)
+    workers   = spec.graphWorkers if workers is None else workers
+    unknown   = [name for name in graphs if name not in dict(graphBuilders)]
+    if unknown:
+        raise ValueError('Unknown graphs %s, available: %s' % (unknown, [name for (name, builder) in graphBuilders]))
+    directory = getattr(stateSeries, 'directory', None)
+    timings   = {}
+    if directory is None or workers == 1 or len(graphs) < 2:
+        rows = reducedRows(stateSeries, [name for name in graphs if name in reductionKeys], spec)
+        for name in graphs:
+            timings[name] = buildGraph(stateSeries, name, rows.get(name), spec)
+    else:
+        if hasattr(stateSeries, 'flush'):
+            stateSeries.flush()                         # Workers map the column files, pending rows must be on disk
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = dict((pool.submit(renderGraph, directory, name, spec), name) for name in graphs)
+            for future in concurrent.futures.as_completed(futures):
+                timings[futures[future]] = future.result()
+    return [(name, timings[name]) for name in graphs]
+# Builds one graph and returns how long it took, reduced graphs take their rows if already computed
+def buildGraph(stateSeries, name, rows=None, spec=None):
+    begin   = time.time()
+    builder = dict(graphBuilders)[name]
+    if rows is None:
+        builder(stateSeries, spec=spec)
+    else:
+        builder(stateSeries, rows, spec)
+    return time.time() - begin
+# Job of a graph worker: maps the results directory read-only and builds one graph with the spec of the parent process
+def renderGraph(directory, name, spec=None):
+    return buildGraph(openResults(directory), name, spec=spec)
+# Prints the time spent on every graph
+def graphTimingReport(timings):
+    for (name, seconds) in timings:
+        print('  %-16s %6.2f s' % (name, seconds))
 
 # Timeseries of wind and potential production given a certain power curve
-def windPowerGraphs(stateSeries):
+def windPowerGraphs(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
 
-    powers = [item.potential for item in stateSeries[0::config.reductionFactor]]
-    winds  = [item.wind      for item in stateSeries[0::config.reductionFactor]]
-    times  = [item.time      for item in stateSeries[0::config.reductionFactor]]
+    rows   = reducedRows(stateSeries, ['wind'], spec)['wind'] if rows is None else rows
+    powers = stateSeries.column('potential')[rows]
+    winds  = stateSeries.column('wind')[rows]
+    times  = stateSeries.column('time')[rows]
     traceWind  = go.Scatter(x=times, y=winds,  name='Wind Speed')
     tracePower = go.Scatter(x=times, y=powers, name='Produced Power', yaxis='y2')
 
@@ -47,11 +126,14 @@ def windPowerGraphs(stateSeries):
     )
     data = [tracePower, traceWind]
     fig = go.Figure(data=data, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'windSeries.html'), auto_open=False )
-# Probability distribution for wind temperature, and the combination of boht as a heatmap
-def windTemperatureHeatMap(stateSeries):
-    temperatures = [item.Tamb    for item in stateSeries]
-    winds        = [item.wind    for item in stateSeries]
+    pyoff.plot(fig, filename= (spec.currentLocation+'windSeries.html'), auto_open=False )
+# Probability distribution for wind temperature, and the combination of boht as a heatmap. Every row weighs the steps
+# it covers: the histograms sum the spans of their rows and the alarm traces count alarm steps
+def windTemperatureHeatMap(stateSeries, spec=None):
+    spec = resolveSpec(spec)
+    temperatures = stateSeries.column('Tamb')
+    winds        = stateSeries.column('wind')
+    spans        = rowSpans(stateSeries)
 
     trace_WT     = go.Scatter(x = temperatures[0::100],
                               y = winds[0::100],
@@ -60,6 +142,8 @@ def windTemperatureHeatMap(stateSeries):
                               marker = dict(color = 'black', size = 2, opacity = 0.1))
     trace_hist2D = go.Histogram2dcontour(x = temperatures,
                                          y = winds,
+                                         z = spans,
+                                         histfunc     = 'sum',
                                          name         = 'density',
                                          ncontours    = 20,
                                          colorscale   = 'Blues',
@@ -67,6 +151,8 @@ def windTemperatureHeatMap(stateSeries):
                                          showscale    = False,
                                          histnorm     = 'probability')
     trace_histT  = go.Histogram(x = temperatures,
+                                y = spans,
+                                histfunc = 'sum',
                                 name     = 'temperatures density',
                                 marker   = dict(color='powderblue'),
                                 histnorm = 'probability',
@@ -74,6 +160,9 @@ def windTemperatureHeatMap(stateSeries):
                                 autobinx = False,
                                 xbins    = dict(start = -15, end = 35, size = 0.5))
     trace_histW  = go.Histogram(y = winds,
+                                x = spans,
+                                histfunc = 'sum',
+                                orientation = 'h',
                                 name     ='winds density',
                                 marker   = dict(color='powderblue'),
                                 histnorm = 'probability',
@@ -81,30 +170,30 @@ def windTemperatureHeatMap(stateSeries):
                                 autobiny = False,
                                 ybins    = dict(start = 0, end = 30, size = 0.5))
 
-    trafoAlarms = [item    for item in stateSeries if item.transformer.alarm]
-    convAlarms  = [item    for item in stateSeries if item.converter.alarm]
-    generAlarms = [item    for item in stateSeries if item.generator.alarm]
-    gearbAlarms = [item    for item in stateSeries if item.gearbox.alarm]
+    trafoAlarms = stateSeries.column('transformer.alarm')
+    convAlarms  = stateSeries.column('converter.alarm')
+    generAlarms = stateSeries.column('generator.alarm')
+    gearbAlarms = stateSeries.column('gearbox.alarm')
 
-    trafoExcesWTScatter = go.Scatter(x = [item.Tamb    for item in trafoAlarms],
-                                     y = [item.wind    for item in trafoAlarms],
+    trafoExcesWTScatter = go.Scatter(x = temperatures[trafoAlarms],
+                                     y = winds[trafoAlarms],
                                      mode   = 'markers',
-                                     name   = 'Trafo Alarms',
+                                     name   = 'Trafo Alarms (%i steps)' % spans[trafoAlarms].sum(),
                                      marker = dict(color = 'red', size = 5, opacity = 0.4))
-    convExcesWTScatter  = go.Scatter(x = [item.Tamb    for item in convAlarms],
-                                     y = [item.wind    for item in convAlarms],
+    convExcesWTScatter  = go.Scatter(x = temperatures[convAlarms],
+                                     y = winds[convAlarms],
                                      mode   = 'markers',
-                                     name   = 'Converter Alarms',
+                                     name   = 'Converter Alarms (%i steps)' % spans[convAlarms].sum(),
                                      marker = dict(color = 'aqua', size = 4, opacity = 0.4))
-    generExcesWTScatter = go.Scatter(x = [item.Tamb    for item in generAlarms],
-                                     y = [item.wind    for item in generAlarms],
+    generExcesWTScatter = go.Scatter(x = temperatures[generAlarms],
+                                     y = winds[generAlarms],
                                      mode   = 'markers',
-                                     name   = 'Generator Alarms',
+                                     name   = 'Generator Alarms (%i steps)' % spans[generAlarms].sum(),
                                      marker = dict(color = 'lime', size = 3, opacity = 0.4))
-    gearbExcesWTScatter = go.Scatter(x = [item.Tamb    for item in gearbAlarms],
-                                     y = [item.wind    for item in gearbAlarms],
+    gearbExcesWTScatter = go.Scatter(x = temperatures[gearbAlarms],
+                                     y = winds[gearbAlarms],
                                      mode   = 'markers',
-                                     name   = 'Gearbox Alarms',
+                                     name   = 'Gearbox Alarms (%i steps)' % spans[gearbAlarms].sum(),
                                      marker = dict(color = 'magenta', size = 4, opacity = 0.4))
 
     data = [trace_hist2D, trace_histT, trace_histW,
@@ -145,14 +234,15 @@ def windTemperatureHeatMap(stateSeries):
     )
 
     fig = go.Figure(data=data, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'temp-wind-heatmap.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'temp-wind-heatmap.html'), auto_open=False)
 # Timeseries of heat losses generated by each component
-def lossesGraph(stateSeries):
-    time = [item.time for item in stateSeries[0::config.reductionFactor]]
-    traceTrafo = go.Scatter(x=time,  y=[item.transformer.losses for item in stateSeries[0::config.reductionFactor]],  name='Transformer losses')
-    traceConv  = go.Scatter(x=time,  y=[item.converter.losses   for item in stateSeries[0::config.reductionFactor]],  name='Converter losses')
-    traceGener = go.Scatter(x=time,  y=[item.generator.losses   for item in stateSeries[0::config.reductionFactor]],  name='Generator losses')
-    traceGearb = go.Scatter(x=time,  y=[item.gearbox.losses     for item in stateSeries[0::config.reductionFactor]],  name='Gearbox losses')
+def lossesGraph(stateSeries, spec=None):
+    spec = resolveSpec(spec)
+    time = sampledColumn(stateSeries, 'time', spec)
+    traceTrafo = go.Scatter(x=time,  y=sampledColumn(stateSeries, 'transformer.losses', spec),  name='Transformer losses')
+    traceConv  = go.Scatter(x=time,  y=sampledColumn(stateSeries, 'converter.losses', spec),    name='Converter losses')
+    traceGener = go.Scatter(x=time,  y=sampledColumn(stateSeries, 'generator.losses', spec),    name='Generator losses')
+    traceGearb = go.Scatter(x=time,  y=sampledColumn(stateSeries, 'gearbox.losses', spec),      name='Gearbox losses')
 
     layout = dict(
         title='Heat losses per component vs. Time',
@@ -187,22 +277,24 @@ def lossesGraph(stateSeries):
     )
     data = [traceTrafo, traceConv, traceGener, traceGearb]
     fig = go.Figure(data=data, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'lossesGraph.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'lossesGraph.html'), auto_open=False)
 # Timeseries of temperate and cooling conditions in the TRANSFORMER
-def graphTransformer(stateSeries):
-
-    trafoReducedSeries = reduceTrafoPoints(stateSeries)
-
-    trafoGraph        = [[item.transformer.solid    for item in trafoReducedSeries],
-                        [item.transformer.oilHot    for item in trafoReducedSeries],
-                        [item.transformer.oilCold   for item in trafoReducedSeries],
-                        [item.transformer.waterHot  for item in trafoReducedSeries],
-                        [item.transformer.waterCold for item in trafoReducedSeries],
-                        [item.transformer.exchMode  for item in trafoReducedSeries],
-                        [item.Tamb                  for item in trafoReducedSeries],
-                        [item.transformer.oilHot    for item in stateSeries if item.transformer.alarm]]
-    trafoReducedTimes = [item.time for item in trafoReducedSeries]
-    trafoExcesTimes   = [item.time for item in stateSeries if item.transformer.alarm]
+def graphTransformer(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
+
+    rows   = reducedRows(stateSeries, ['transformer'], spec)['transformer'] if rows is None else rows
+    alarms = stateSeries.column('transformer.alarm')
+
+    trafoGraph        = [stateSeries.column('transformer.solid')[rows],
+                         stateSeries.column('transformer.oilHot')[rows],
+                         stateSeries.column('transformer.oilCold')[rows],
+                         stateSeries.column('transformer.waterHot')[rows],
+                         stateSeries.column('transformer.waterCold')[rows],
+                         stateSeries.column('transformer.exchMode')[rows],
+                         stateSeries.column('Tamb')[rows],
+                         stateSeries.column('transformer.oilHot')[alarms]]
+    trafoReducedTimes = stateSeries.column('time')[rows]
+    trafoExcesTimes   = stateSeries.column('time')[alarms]
 
     traceTrafo=[]
     traceTrafo.append(go.Scatter(x = trafoReducedTimes,
@@ -259,19 +351,21 @@ def graphTransformer(stateSeries):
     )
 
     fig = go.Figure(data=traceTrafo, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'trafoTempsGraph.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'trafoTempsGraph.html'), auto_open=False)
 # Timeseries of temperate and cooling conditions in the CONVERTER
-def graphConverter(stateSeries):
-    converterReducedSeries= reduceConverterPoints(stateSeries)
-
-    convGraph = [[item.converter.solid     for item in converterReducedSeries],
-                 [item.converter.waterHot  for item in converterReducedSeries],
-                 [item.converter.waterCold for item in converterReducedSeries],
-                 [item.converter.exchMode  for item in converterReducedSeries],
-                 [item.Tamb                for item in converterReducedSeries],
-                 [item.converter.waterCold for item in stateSeries if item.converter.alarm]]
-    converterReducedTimes = [item.time for item in converterReducedSeries]
-    converterExcesTimes   = [item.time for item in stateSeries if item.converter.alarm]
+def graphConverter(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
+    rows   = reducedRows(stateSeries, ['converter'], spec)['converter'] if rows is None else rows
+    alarms = stateSeries.column('converter.alarm')
+
+    convGraph = [stateSeries.column('converter.solid')[rows],
+                 stateSeries.column('converter.waterHot')[rows],
+                 stateSeries.column('converter.waterCold')[rows],
+                 stateSeries.column('converter.exchMode')[rows],
+                 stateSeries.column('Tamb')[rows],
+                 stateSeries.column('converter.waterCold')[alarms]]
+    converterReducedTimes = stateSeries.column('time')[rows]
+    converterExcesTimes   = stateSeries.column('time')[alarms]
 
     traceConv = []
     traceConv.append(go.Scatter(x = converterReducedTimes,
@@ -320,23 +414,25 @@ def graphConverter(stateSeries):
     )
 
     fig = go.Figure(data=traceConv, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'converterTempsGraph.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'converterTempsGraph.html'), auto_open=False)
 # Timeseries of temperate and cooling conditions in the GENERATOR
-def graphGenerator(stateSeries):
-
-    generatorReducedSeries = reduceGeneratorPoints(stateSeries)
-
-    generatorGraph=[[item.generator.stator    for item in generatorReducedSeries],
-                    [item.generator.rotor     for item in generatorReducedSeries],
-                    [item.generator.airHot    for item in generatorReducedSeries],
-                    [item.generator.airCold   for item in generatorReducedSeries],
-                    [item.generator.waterHot  for item in generatorReducedSeries],
-                    [item.generator.waterCold for item in generatorReducedSeries],
-                    [item.generator.exchMode  for item in generatorReducedSeries],
-                    [item.Tamb                for item in generatorReducedSeries],
-                    [item.generator.waterCold for item in stateSeries if item.generator.alarm]]
-    generatorReducedTimes = [item.time for item in generatorReducedSeries]
-    generatorExcesTimes   = [item.time for item in stateSeries if item.generator.alarm]
+def graphGenerator(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
+
+    rows   = reducedRows(stateSeries, ['generator'], spec)['generator'] if rows is None else rows
+    alarms = stateSeries.column('generator.alarm')
+
+    generatorGraph=[stateSeries.column('generator.stator')[rows],
+                    stateSeries.column('generator.rotor')[rows],
+                    stateSeries.column('generator.airHot')[rows],
+                    stateSeries.column('generator.airCold')[rows],
+                    stateSeries.column('generator.waterHot')[rows],
+                    stateSeries.column('generator.waterCold')[rows],
+                    stateSeries.column('generator.exchMode')[rows],
+                    stateSeries.column('Tamb')[rows],
+                    stateSeries.column('generator.waterCold')[alarms]]
+    generatorReducedTimes = stateSeries.column('time')[rows]
+    generatorExcesTimes   = stateSeries.column('time')[alarms]
 
     traceGenerator = []
     traceGenerator.append(go.Scatter(x=generatorReducedTimes,
@@ -396,22 +492,24 @@ def graphGenerator(stateSeries):
     )
 
     fig = go.Figure(data=traceGenerator, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'generatorTempsGraph.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'generatorTempsGraph.html'), auto_open=False)
 # Timeseries of temperate and cooling conditions in the GEARBOX
-def graphGearbox(stateSeries):
-
-    gearboxReducedSeries = reduceGearboxPoints(stateSeries)
-
-    gearboxGraph=[[item.gearbox.solid     for item in gearboxReducedSeries],
-                  [item.gearbox.oilHot    for item in gearboxReducedSeries],
-                  [item.gearbox.oilCold   for item in gearboxReducedSeries],
-                  [item.gearbox.waterHot  for item in gearboxReducedSeries],
-                  [item.gearbox.waterCold for item in gearboxReducedSeries],
-                  [item.gearbox.exchMode  for item in gearboxReducedSeries],
-                  [item.Tamb              for item in gearboxReducedSeries],
-                  [item.gearbox.oilCold   for item in stateSeries if item.gearbox.alarm]]
-    gearboxReducedTimes = [item.time for item in gearboxReducedSeries]
-    gearboxExcesTimes   = [item.time for item in stateSeries if item.gearbox.alarm]
+def graphGearbox(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
+
+    rows   = reducedRows(stateSeries, ['gearbox'], spec)['gearbox'] if rows is None else rows
+    alarms = stateSeries.column('gearbox.alarm')
+
+    gearboxGraph=[stateSeries.column('gearbox.solid')[rows],
+                  stateSeries.column('gearbox.oilHot')[rows],
+                  stateSeries.column('gearbox.oilCold')[rows],
+                  stateSeries.column('gearbox.waterHot')[rows],
+                  stateSeries.column('gearbox.waterCold')[rows],
+                  stateSeries.column('gearbox.exchMode')[rows],
+                  stateSeries.column('Tamb')[rows],
+                  stateSeries.column('gearbox.oilCold')[alarms]]
+    gearboxReducedTimes = stateSeries.column('time')[rows]
+    gearboxExcesTimes   = stateSeries.column('time')[alarms]
 
     traceGear = []
     traceGear.append(go.Scatter(x = gearboxReducedTimes,
@@ -467,24 +565,25 @@ def graphGearbox(stateSeries):
     )
 
     fig = go.Figure(data=traceGear, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'gearTempsGraph.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'gearTempsGraph.html'), auto_open=False)
 # Timeseries of temperate and cooling conditions in the NACELLE
-def graphNacelle(stateSeries):
-
-    nacelleReducedSeries = reduceNacellePoints(stateSeries)
-
-    nacGraph = [[item.air_component.temperature['Nacelle_top_rear']     for item in nacelleReducedSeries],
-                [item.air_component.temperature['Nacelle_top_front']    for item in nacelleReducedSeries],
-                [item.air_component.temperature['Nacelle_bottom_rear']  for item in nacelleReducedSeries],
-                [item.air_component.temperature['Nacelle_bottom_front']  for item in nacelleReducedSeries],
-                [(item.air_component.heatFlows[('Nacelle_bottom_rear','Nacelle_top_rear')]
-                 + item.air_component.heatFlows[('Nacelle_top_front','Nacelle_top_rear')]
-                 + item.air_component.heatFlows[('Nacelle_bottom_rear','Nacelle_bottom_front')]
-                 + item.air_component.heatFlows[('Nacelle_bottom_front','Nacelle_top_front')])/1000  for item in nacelleReducedSeries],
-                [-item.air_component.heatFlows[('Nacelle_top_rear','Nacelle_bottom_rear')]/1000  for item in nacelleReducedSeries],
-                [item.Tamb                  for item in nacelleReducedSeries],
-                [item.air_component.temperature['Hub']  for item in nacelleReducedSeries]]
-    nacelleTimes = [item.time for item in nacelleReducedSeries]
+def graphNacelle(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
+
+    rows = reducedRows(stateSeries, ['nacelle'], spec)['nacelle'] if rows is None else rows
+
+    nacGraph = [stateSeries.column('air.temperature.Nacelle_top_rear')[rows],
+                stateSeries.column('air.temperature.Nacelle_top_front')[rows],
+                stateSeries.column('air.temperature.Nacelle_bottom_rear')[rows],
+                stateSeries.column('air.temperature.Nacelle_bottom_front')[rows],
+                heatFlowSum(stateSeries, [('Nacelle_bottom_rear','Nacelle_top_rear'),
+                                          ('Nacelle_top_front','Nacelle_top_rear'),
+                                          ('Nacelle_bottom_rear','Nacelle_bottom_front'),
+                                          ('Nacelle_bottom_front','Nacelle_top_front')], rows)/1000,
+                -heatFlowSum(stateSeries, [('Nacelle_top_rear','Nacelle_bottom_rear')], rows)/1000,
+                stateSeries.column('Tamb')[rows],
+                stateSeries.column('air.temperature.Hub')[rows]]
+    nacelleTimes = stateSeries.column('time')[rows]
     # nacelleExcesTimes   = [item.time for item in stateSeries if item.nacelle.alarm]
 
     traceNac = []
@@ -564,26 +663,27 @@ def graphNacelle(stateSeries):
     )
 
     fig = go.Figure(data=traceNac, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'nacelleTempsGraph.html'), auto_open=False)
+    pyoff.plot(fig, filename= (spec.currentLocation+'nacelleTempsGraph.html'), auto_open=False)
 # Timeseries of temperate and cooling conditions in the TOWER
-def graphTower(stateSeries):
-
-    towerReducedSeries = reduceTowerPoints(stateSeries)
-
-    towGraph = [[item.air_component.temperature['Tower_top']            for item in towerReducedSeries],
-                [item.air_component.temperature['Converter_platform']   for item in towerReducedSeries],
-                [item.air_component.temperature['Transformer_platform'] for item in towerReducedSeries],
-                [item.air_component.temperature['Switchgear_platform']  for item in towerReducedSeries],
-                [item.air_component.temperature['Tower_middle']         for item in towerReducedSeries],
-                [(item.air_component.heatFlows[('Switchgear_inlet','Switchgear_platform')]
-                 + item.air_component.heatFlows[('Transformer_inlet','Transformer_platform')]
-                 + item.air_component.heatFlows[('Converter_inlet','Converter_platform')])/1000  for item in towerReducedSeries],
-                [-(item.air_component.heatFlows[('Switchgear_platform','Transformer_platform')]
-                 + item.air_component.heatFlows[('Transformer_platform','Converter_platform')]
-                 + item.air_component.heatFlows[('Converter_platform', 'Tower_middle')]
-                 + item.air_component.heatFlows[('Tower_middle','Tower_top')])/1000  for item in towerReducedSeries],
-                [item.Tamb                  for item in towerReducedSeries]]
-    towerTimes = [item.time for item in towerReducedSeries]
+def graphTower(stateSeries, rows=None, spec=None):
+    spec = resolveSpec(spec)
+
+    rows = reducedRows(stateSeries, ['tower'], spec)['tower'] if rows is None else rows
+
+    towGraph = [stateSeries.column('air.temperature.Tower_top')[rows],
+                stateSeries.column('air.temperature.Converter_platform')[rows],
+                stateSeries.column('air.temperature.Transformer_platform')[rows],
+                stateSeries.column('air.temperature.Switchgear_platform')[rows],
+                stateSeries.column('air.temperature.Tower_middle')[rows],
+                heatFlowSum(stateSeries, [('Switchgear_inlet','Switchgear_platform'),
+                                          ('Transformer_inlet','Transformer_platform'),
+                                          ('Converter_inlet','Converter_platform')], rows)/1000,
+                -heatFlowSum(stateSeries, [('Switchgear_platform','Transformer_platform'),
+                                           ('Transformer_platform','Converter_platform'),
+                                           ('Converter_platform', 'Tower_middle'),
+                                           ('Tower_middle','Tower_top')], rows)/1000,
+                stateSeries.column('Tamb')[rows]]
+    towerTimes = stateSeries.column('time')[rows]
     # nacelleExcesTimes   = [item.time for item in stateSeries if item.nacelle.alarm]
 
     traceTow = []
@@ -669,74 +769,21 @@ def graphTower(stateSeries):
     )
 
     fig = go.Figure(data=traceTow, layout=layout)
-    pyoff.plot(fig, filename= (config.currentLocation+'towerTempsGraph.html'), auto_open=False)
-# Reduces the timeseries to get more manageable graphs, takes the most adverse of every 10 points based on transformer.oilHot
-def reduceTrafoPoints(inputSeries):
-    outputSeries = []
-    for i in range(len(inputSeries)-1):
-        if (i%config.reductionFactor == 0):
-            outputSeries.append(inputSeries[i])
-        if (i%config.reductionFactor != 0) & (inputSeries[i].transformer.oilHot > outputSeries[-1].transformer.oilHot):
-            outputSeries[-1] = inputSeries[i]
-    return outputSeries
-# Reduces the timeseries to get more manageable graphs, takes the most adverse of every 10 points based on converter.waterCold
-def reduceConverterPoints(inputSeries):
-    outputSeries = []
-    for i in range(len(inputSeries)-1):
-        if (i%config.reductionFactor == 0):
-            outputSeries.append(inputSeries[i])
-        if (i%config.reductionFactor != 0) & (inputSeries[i].converter.waterCold > outputSeries[-1].converter.waterCold):
-            outputSeries[-1] = inputSeries[i]
-    return outputSeries
-# Reduces the timeseries to get more manageable graphs, takes the most adverse of every 10 points based on generator.waterCold
-def reduceGeneratorPoints(inputSeries):
-    outputSeries = []
-    for i in range(len(inputSeries)-1):
-        if (i%config.reductionFactor == 0):
-            outputSeries.append(inputSeries[i])
-        if (i%config.reductionFactor != 0) & (inputSeries[i].generator.waterCold > outputSeries[-1].generator.waterCold):
-            outputSeries[-1] = inputSeries[i]
-    return outputSeries
-# Reduces the timeseries to get more manageable graphs, takes the most adverse of every 10 points based on gearbox.oilCold
-def reduceGearboxPoints(inputSeries):
-    outputSeries = []
-    for i in range(len(inputSeries)-1):
-        if (i%config.reductionFactor == 0):
-            outputSeries.append(inputSeries[i])
-        if (i%config.reductionFactor != 0) & (inputSeries[i].gearbox.oilCold > outputSeries[-1].gearbox.oilCold):
-            outputSeries[-1] = inputSeries[i]
-    return outputSeries
-# Reduces the timeseries to get more manageable graphs, takes the most adverse of every 10 points based on Nacelle_top_rear
-def reduceNacellePoints(inputSeries):
-    outputSeries = []
-    for i in range(len(inputSeries)-1):
-        if (i%config.reductionFactor == 0):
-            outputSeries.append(inputSeries[i])
-        if (i%config.reductionFactor != 0) & (inputSeries[i].air_component.temperature['Nacelle_top_rear'] > outputSeries[-1].air_component.temperature['Nacelle_top_rear']):
-            outputSeries[-1] = inputSeries[i]
-    return outputSeries
-# Reduces the timeseries to get more manageable graphs, takes the most adverse of every 10 points based on Converter_platform
-def reduceTowerPoints(inputSeries):
-    outputSeries = []
-    for i in range(len(inputSeries)-1):
-        if (i%config.reductionFactor == 0):
-            outputSeries.append(inputSeries[i])
-        if (i%config.reductionFactor != 0) & (inputSeries[i].air_component.temperature['Converter_platform'] > outputSeries[-1].air_component.temperature['Converter_platform']):
-            outputSeries[-1] = inputSeries[i]
-    return outputSeries
+    pyoff.plot(fig, filename= (spec.currentLocation+'towerTempsGraph.html'), auto_open=False)
 # Timeseries comparing achievable power production and desired grid conditions with those necessary due to derating
-def powerVsPotentialgraph(stateSeries):
-        potentialPower  = [item.potential/1000  for item in stateSeries]
-        times           = [item.time  for item in stateSeries]
-        deratedPower    = [item.power/1000 for item in stateSeries]
-        deratedPF       = [item.PF    for item in stateSeries]
-        deratedV        = [item.V     for item in stateSeries]
+def powerVsPotentialgraph(stateSeries, spec=None):
+        spec = resolveSpec(spec)
+        potentialPower  = stateSeries.column('potential')/1000
+        times           = stateSeries.column('time')
+        deratedPower    = stateSeries.column('power')/1000
+        deratedPF       = stateSeries.column('PF')
+        deratedV        = stateSeries.column('V')
 
-        tracePowerPot = go.Scatter(x=times[0::config.reductionFactor],  y=potentialPower[0::config.reductionFactor],  name='Potential Power',line = dict(color = 'blue', width = 1,dash = 'dot'))
-        tracePower    = go.Scatter(x=times[0::config.reductionFactor],  y=deratedPower[0::config.reductionFactor],  name='Derated Power')
+        tracePowerPot = go.Scatter(x=times[0::spec.reductionFactor],  y=potentialPower[0::spec.reductionFactor],  name='Potential Power',line = dict(color = 'blue', width = 1,dash = 'dot'))
+        tracePower    = go.Scatter(x=times[0::spec.reductionFactor],  y=deratedPower[0::spec.reductionFactor],  name='Derated Power')
 
-        tracePF = go.Scatter(x=times[0::config.reductionFactor], y=deratedPF[0::config.reductionFactor], name='Power Factor', yaxis='y2')
-        traceV  = go.Scatter(x=times[0::config.reductionFactor], y=deratedV[0::config.reductionFactor], name='Grid Voltage', yaxis='y2')
+        tracePF = go.Scatter(x=times[0::spec.reductionFactor], y=deratedPF[0::spec.reductionFactor], name='Power Factor', yaxis='y2')
+        traceV  = go.Scatter(x=times[0::spec.reductionFactor], y=deratedV[0::spec.reductionFactor], name='Grid Voltage', yaxis='y2')
 
         layout = dict(
             title='Power Series in Bremerhaven Airport',
@@ -756,4 +803,17 @@ def powerVsPotentialgraph(stateSeries):
         )
         data = [tracePowerPot, tracePower, tracePF, traceV]
         fig = go.Figure(data=data, layout=layout)
-        pyoff.plot(fig, filename= (config.currentLocation+'potentialPowerSeries.html'), auto_open=False)
+        pyoff.plot(fig, filename= (spec.currentLocation+'potentialPowerSeries.html'), auto_open=False)
+
+# Graphs that can be requested by name, in the order outputRequestedGraphs builds them. Reduced graphs share their
+# names with reductionKeys
+graphBuilders = [('wind',           windPowerGraphs),
+                 ('heatmap',        windTemperatureHeatMap),
+                 ('losses',         lossesGraph),
+                 ('transformer',    graphTransformer),
+                 ('converter',      graphConverter),
+                 ('generator',      graphGenerator),
+                 ('gearbox',        graphGearbox),
+                 ('nacelle',        graphNacelle),
+                 ('tower',          graphTower),
+                 ('potentialPower', powerVsPotentialgraph)]
@@ -3,35 +3,84 @@ import time
 import math
 import numpy as np
 import datetime
-import pyomo
-import pandas
-import pyomo.opt
-import pyomo.environ as pyoenv
 
-from graphBondModel import air_volume_GBM
+from exponentialIntegrator import advanceExact
+from couplingScheduler import couplingScheduler
+from stepProfiler import stepProfiler
+from runSpec import runSpec, resolveSpec
 from thermal_inertia_tools import *
 import config
 
-def counted(fn):
-    def wrapper(*args, **kwargs):
-        wrapper.called+= 1
-        return fn(*args, **kwargs)
-    wrapper.called= 0
-    wrapper.__name__= fn.__name__
-    return wrapper
+# Heat losses of each component as a function of its output power [kW] (and power factor and grid voltage for the
+# electrical ones). Plain functions of their inputs, valid for scalars and numpy arrays alike
+def transformerLosses(powerOUT, PF, V):
+    return polynomial_from_coeffs(powerOUT/PF/V/1000, [1.976, 2.181, 0.716, 0.086, 0.001])
+def converterLosses(powerOUT, PF, V):
+    return polynomial_from_coeffs(powerOUT/PF/V/1000, [41.148, 12.625, 0.211])
+def generatorLosses(powerOUT):
+    #return polynomial_from_coeffs(powerOUT/1000, [25.052, 27.678, -0.816, -0.470, 0.050])
+    return powerOUT*14.348/1000
+def gearboxLosses(powerOUT):
+    eff=np.interp(powerOUT/1000, [0.0,   0.9,    1.8,    2.97,   3.6,    4.68,   5.4,    6.3,    7.2,    7.65,   9],
+                                 [0.849, 0.9599, 0.9713, 0.9801, 0.9818, 0.9845, 0.9858, 0.9868, 0.9878, 0.9882, 0.989])
+    return (20*powerOUT/9000 + powerOUT*( 1 - eff )/eff)
+# Potential power and the losses of the transformer -> converter -> generator -> gearbox chain for a whole wind series
+# when there is no derating, computed with numpy in one pass. Stretched series are evaluated once per source sample
+class lossChain(object):
+    def __init__(self, winds, PF, V, steps, powerCurve=None):
+        powerCurve = powerCurve if powerCurve is not None else resolveSpec().powerCurve
+        if isinstance(winds, stretchedSeries):
+            [values, self.factor] = [winds.source, winds.factor]
+        else:
+            [values, self.factor] = [np.asarray(winds[:steps], dtype=float), 1]
+        self.potential   = np.interp(values, powerCurve[0], powerCurve[1])
+        self.transformer = transformerLosses(self.potential, PF, V)
+        powerIN          = self.potential + self.transformer
+        self.converter   = converterLosses(powerIN, PF, V)
+        powerIN          = powerIN + self.converter
+        self.generator   = generatorLosses(powerIN)
+        powerIN          = powerIN + self.generator
+        self.gearbox     = gearboxLosses(powerIN)
+    # Row of step k as expected by machineState.advance: potential and the four component losses
+    def row(self, k):
+        i = k//self.factor
+        return (self.potential[i], self.transformer[i], self.converter[i], self.generator[i], self.gearbox[i])
+
+# What one simulation owns besides the state of its components: the air network model with its controller state, the
+# coupling scheduler, the step profiler and the step counters. Every copy of a machineState shares the context of its
+# run, so runs side by side in one process (or in a thread pool) never touch each other's air network.
+# The GBM is not pickled with it, checkpoint.py saves and restores it explicitly. graphBondModel (pyomo, scipy) is only
+# imported by the first context, the components alone (batchedComponents, calibration) do not need it
+class simulationContext(object):
+    def __init__(self, spec, nodesfile='nodes.tab', bondsfile='bonds.tab'):
+        from graphBondModel import air_volume_GBM
+        self.GBM      = air_volume_GBM(spec)
+        self.GBM.loadModelData(nodesfile, bondsfile)
+        self.coupling = couplingScheduler.fromSpec(spec)
+        self.profiler = stepProfiler(spec.profileSteps)
+        self.steps    = 0                                                           # machineTimeStep calls
+        self.advances = 0                                                           # advance calls, in place or not
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo):
+        return self
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['GBM'] = None
+        return state
 
 # Object that represents the wind turbine generator an a certain time
 class machineState(object):
-    GBM = air_volume_GBM()
-    # self.machineTimeStep       = counter(machineTimeStep)
-    def __init__(self,T_0):
-        machineState.GBM.loadModelData('nodes.tab', 'bonds.tab')
-        self.GBM.dt      = 10*config.dt
-        self.transformer = tr_component(T_0)
-        self.converter   = cv_component(T_0)
-        self.generator   = gn_component(T_0)
-        self.gearbox     = gb_component(T_0)
-        self.air_component=air_component()
+    # spec holds the settings of the run (runSpec), built from config when not given. A new state starts a new run with
+    # its own simulationContext unless the context of another run is given
+    def __init__(self,T_0,spec=None,context=None):
+        self.spec        = resolveSpec(spec)
+        self.context     = context if context is not None else simulationContext(self.spec)
+        self.transformer = tr_component(T_0, self.spec)
+        self.converter   = cv_component(T_0, self.spec)
+        self.generator   = gn_component(T_0, self.spec)
+        self.gearbox     = gb_component(T_0, self.spec)
+        self.air_component=air_component(self.context.GBM)
         self.power       = 0
         self.potential   = 0
         self.PF          = 1
@@ -40,32 +89,84 @@ class machineState(object):
         self.wind        = 0
         self.Tamb        = T_0
         self.start_time  = time.time()
-        # self.machineTimeStep       = counter(machineState.machineTimeStep)
+        self.span        = 1                                                        # Time steps covered by the last advance
 
     # Returns a new instance of the machine state evolved for the ambient conditions given
-    @counted
     def machineTimeStep(self, wind, PF, V, Tamb):
-        newTime = copy.deepcopy(self)                                               # Copy old instance
-        newTime.time += datetime.timedelta(seconds = config.dt )                    # Advance time
-        newTime.wind = wind                                                         # Load new wind
-        newTime.potential = newTime.powerFunction()                                 # Calculate potential power production
-        newTime.derateIfNeeded(newTime.potential,PF,V,Tamb)                         # Modify production if derating required
-        newTime.transformer.timeStep(newTime.power,newTime.PF,newTime.V,Tamb)       # Calculate TRANSFORMER
-        newTime.converter.timeStep(newTime.transformer.powerIN,newTime.PF,newTime.V,Tamb) # Calculate CONVERTER
-        newTime.generator.timeStep(newTime.converter.powerIN,Tamb)                  # Calculate GENERATOR
-        newTime.gearbox.timeStep(newTime.generator.powerIN,Tamb)                    # Calculate GEARBOX
-        if  machineState.machineTimeStep.called % 10 == 0:
-            machineState.GBM.instance.tempExt['Air_treatment_system'] = Tamb
-            machineState.GBM.solve()
-            machineState.GBM.advanceTemperatures()
-            machineState.GBM.updateHeatFlows(newTime)
-            machineState.GBM.updateAirFlows(newTime)
-        newTime.air_component.dump_GBM_to_store()
-
+        self.context.steps += 1
+        profiler = self.context.profiler
+        start    = profiler.clock()
+        newTime  = copy.deepcopy(self)                                              # Copy old instance
+        profiler.record('deepcopy', start)
+        newTime.advance(wind, PF, V, Tamb)                                          # Evolve the copy
         return newTime
+    # Evolves this machine state in place for the ambient conditions given, used by the columnar engine to avoid copies.
+    # nominal is the optional lossChain row of this step: potential power and component losses without derating
+    def advance(self, wind, PF, V, Tamb, nominal=None):
+        self.context.advances += 1
+        self.advanceComponents(wind, PF, V, Tamb, nominal)
+        self.couplingStep(Tamb)
+        self.span = 1
+    # Time, production, derating and the four components of one step, everything but the air network
+    def advanceComponents(self, wind, PF, V, Tamb, nominal=None):
+        self.time += datetime.timedelta(seconds = self.spec.dt )                       # Advance time
+        self.wind = wind                                                            # Load new wind
+        [profiler, clock] = [self.context.profiler, self.context.profiler.clock]
+        start = clock()
+        if nominal is None:
+            self.potential = self.powerFunction()                                   # Calculate potential power production
+            losses = [None, None, None, None]
+        else:
+            [self.potential, losses] = [nominal[0], nominal[1:]]
+        profiler.record('powerFunction', start)
+        start = clock()
+        self.derateIfNeeded(self.potential,PF,V,Tamb)                               # Modify production if derating required
+        if (self.power != self.potential) or (self.PF != PF) or (self.V != V):      # Derated: losses of the actual operating point
+            losses = [None, None, None, None]
+        profiler.record('derateIfNeeded', start)
+        start = clock()
+        self.transformer.timeStep(self.power,self.PF,self.V,Tamb,losses[0])         # Calculate TRANSFORMER
+        profiler.record('transformer', start)
+        start = clock()
+        self.converter.timeStep(self.transformer.powerIN,self.PF,self.V,Tamb,losses[1]) # Calculate CONVERTER
+        profiler.record('converter', start)
+        start = clock()
+        self.generator.timeStep(self.converter.powerIN,Tamb,losses[2])              # Calculate GENERATOR
+        profiler.record('generator', start)
+        start = clock()
+        self.gearbox.timeStep(self.generator.powerIN,Tamb,losses[3])                # Calculate GEARBOX
+        profiler.record('gearbox', start)
+    # Solves the air network when the coupling scheduler asks for it and refreshes the air results of this state.
+    # The air nodes keep the storage term of one spec.dt whatever the interval: the heat the components exchange with
+    # the air is explicit and a longer step makes the coupling unstable, skipped steps only reuse the last solution.
+    # skippedSteps are steps advanced before this one without consulting the scheduler (see fastForward)
+    def couplingStep(self, Tamb, skippedSteps=0):
+        [GBM, coupling, profiler] = [self.context.GBM, self.context.coupling, self.context.profiler]
+        clock      = profiler.clock
+        heatInputs = GBM.heatInputs(self)
+        coupling.skip(skippedSteps)
+        if  coupling.shouldSolve(heatInputs, Tamb, GBM.exchMode):
+            solvedMode = GBM.exchMode
+            GBM.instance.tempExt['Air_treatment_system'] = Tamb
+            start = clock()
+            GBM.solve()
+            profiler.record('solve', start)
+            start = clock()
+            GBM.advanceTemperatures()
+            profiler.record('advanceTemperatures', start)
+            start = clock()
+            GBM.updateHeatFlows(self)
+            profiler.record('updateHeatFlows', start)
+            start = clock()
+            GBM.updateAirFlows(self)
+            profiler.record('updateAirFlows', start)
+            coupling.solved(heatInputs, Tamb, solvedMode)
+        start = clock()
+        self.air_component.dump_GBM_to_store(GBM)
+        profiler.record('dump_GBM_to_store', start)
     # Returns interpolation of power produtcion given a  wind speed
     def powerFunction(self):
-        return  np.interp(self.wind, config.powerCurve[0], config.powerCurve[1])
+        return  np.interp(self.wind, self.spec.powerCurve[0], self.spec.powerCurve[1])
     # Returns a vector with the alarm state for all components
     def getAlarms(self):
         return [self.transformer.alarm, self.converter.alarm, self.generator.alarm, self.gearbox.alarm]
@@ -117,7 +218,8 @@ class tr_component(object):
     split              = 0.95    #       Estimate of the losses extracted by the liquid circuit
     oilHot_tempLimit   = 120     #[C]    Alarm imposed for the oil temperature
     exchCoeffs         = [0.25, 1.18, 2.36, 3.54, 4.72] # Water Air Heat Exchager steps for progressive working points
-    def __init__(self,T_0=0):
+    def __init__(self,T_0=0,spec=None):
+        self.spec      = resolveSpec(spec)
         self.solid     = T_0
         self.oilHot    = T_0
         self.oilCold   = T_0
@@ -135,7 +237,7 @@ class tr_component(object):
         self.heatOut   = 0
     # Transformer heat losses as a function of output power, power factor and grid voltage
     def lossFunction(self,PF,V):
-        self.losses  = polynomial_from_coeffs(self.powerOUT/PF/V/1000, [1.976, 2.181, 0.716, 0.086, 0.001])
+        self.losses  = transformerLosses(self.powerOUT, PF, V)
         self.powerIN = self.powerOUT + self.losses
     # Function to chooses the cooling mode as a function of oil temperature. Presents hysteresis and a certain lag to avoid constant switching
     def exchCoeffFunc(self):
@@ -146,7 +248,7 @@ class tr_component(object):
             for i in range(self.exchMode,len(limitsUp)):
                 if self.oilHot > limitsUp[i]:
                     self.exchMode = i
-                    self.exchLag  = config.exchLag
+                    self.exchLag  = self.spec.exchLag
         elif (self.oilHot < limitsDown[self.exchMode]) & (self.exchLag<1) :
             for i in range(self.exchMode,0,-1):
                 if self.oilHot < limitsDown[i]:
@@ -163,20 +265,28 @@ class tr_component(object):
         maxLoss = (self.oilHot_tempLimit - Tamb)*1.5
         return 1000*(math.sqrt(maxLoss)*0.79)
     # Calculation o the evolution of internal variables
-    def timeStep(self,power,PF,V,Tamb):
+    def timeStep(self,power,PF,V,Tamb,losses=None):
         self.powerOUT = power
-        self.lossFunction(PF,V)
+        if losses is None:
+            self.lossFunction(PF,V)
+        else:                                                                       # Losses precomputed for the whole series
+            self.losses  = losses
+            self.powerIN = self.powerOUT + self.losses
         self.exchCoeffFunc()
+        if self.spec.integrator == 'exponential':                                      # Exact step of the linear network
+            advanceExact(self, Tamb, self.spec.dt)
+            self.alarmFunc()
+            return
 
         solid_oil     = (self.solid    - self.oilCold) * self.solid_oil_trans
         self.oilWater = (self.oilHot   - self.waterCold) * self.oil_water_trans
         self.heatOut  = (self.waterHot - Tamb) * self.water_air_trans
 
 
-        self.solid     += (self.losses * self.split - solid_oil) * config.dt  / self.solid_int
+        self.solid     += (self.losses * self.split - solid_oil) * self.spec.dt  / self.solid_int
         self.lossesAir = self.losses * (1- self.split)
-        self.oilCold   += (solid_oil - self.oilWater)    * config.dt  / self.oil_int
-        self.waterCold += (self.oilWater - self.heatOut) * config.dt  / self.water_int
+        self.oilCold   += (solid_oil - self.oilWater)    * self.spec.dt  / self.oil_int
+        self.waterCold += (self.oilWater - self.heatOut) * self.spec.dt  / self.water_int
 
         self.oilHot     = self.oilCold   + solid_oil     / self.oilC
         self.waterHot   = self.waterCold + self.oilWater / self.waterC
@@ -191,7 +301,8 @@ class cv_component(object):
     waterCold_tempLimit = 50      #[C]    Alarm imposed for the cold water temperature
     exchCoeffs          = [0.25, 1.34, 2.67, 4.01, 5.35] # Water Air Heat Exchager steps for progressive working points
 
-    def __init__(self,T_0=0):
+    def __init__(self,T_0=0,spec=None):
+        self.spec      = resolveSpec(spec)
         self.solid     = T_0
         self.waterHot  = T_0
         self.waterCold = T_0
@@ -207,7 +318,7 @@ class cv_component(object):
         self.solidWater= 0
     # Converter heat losses as a function of converter output power, power factor and grid voltage
     def lossFunction(self,PF,V):
-        self.losses  = polynomial_from_coeffs(self.powerOUT/PF/V/1000, [41.148, 12.625, 0.211])
+        self.losses  = converterLosses(self.powerOUT, PF, V)
         self.powerIN = self.powerOUT + self.losses
     # Function to chooses the cooling mode as a function of waterCold temperature. Presents hysteresis and a certain lag to avoid constant switching
     def exchCoeffFunc(self):
@@ -218,7 +329,7 @@ class cv_component(object):
             for i in range(self.exchMode,len(limitsUp)):
                 if self.waterCold > limitsUp[i]:
                     self.exchMode = i
-                    self.exchLag  = config.exchLag
+                    self.exchLag  = self.spec.exchLag
         elif (self.waterCold < limitsDown[self.exchMode]) & (self.exchLag<1):
             for i in range(self.exchMode,0,-1):
                 if self.waterCold < limitsDown[i]:
@@ -235,17 +346,25 @@ class cv_component(object):
         maxLoss = (self.waterCold_tempLimit - Tamb)*self.exchCoeffs[-1]
         return 1000*(maxLoss*0.06704/0.85-3.2)
     # Calculation o the evolution of internal variables
-    def timeStep(self,power,PF,V,Tamb):
+    def timeStep(self,power,PF,V,Tamb,losses=None):
         self.powerOUT = power
-        self.lossFunction(PF,V)
+        if losses is None:
+            self.lossFunction(PF,V)
+        else:                                                                       # Losses precomputed for the whole series
+            self.losses  = losses
+            self.powerIN = self.powerOUT + self.losses
         self.exchCoeffFunc()
+        if self.spec.integrator == 'exponential':                                      # Exact step of the linear network
+            advanceExact(self, Tamb, self.spec.dt)
+            self.alarmFunc()
+            return
 
         self.solidWater = (self.solid    - self.waterCold) * self.solid_water_trans
         self.heatOut    = (self.waterHot - Tamb) * self.water_air_trans
 
-        self.solid     += (self.losses * self.split - self.solidWater) * config.dt  / self.solid_int
+        self.solid     += (self.losses * self.split - self.solidWater) * self.spec.dt  / self.solid_int
         self.lossesAir = self.losses * (1- self.split)
-        self.waterCold += (self.solidWater - self.heatOut) * config.dt  / self.water_int
+        self.waterCold += (self.solidWater - self.heatOut) * self.spec.dt  / self.water_int
 
         self.waterHot   = self.waterCold + self.solidWater / self.waterC
         self.alarmFunc()
@@ -264,7 +383,8 @@ class gn_component(object):
     waterCold_tempLimit = 45
     exchCoeffs          = [0.25, 1.88, 3.75, 5.63, 7.50]
 
-    def __init__(self,T_0=0):
+    def __init__(self,T_0=0,spec=None):
+        self.spec      = resolveSpec(spec)
         self.rotor     = T_0
         self.stator     = T_0
         self.airHot    = T_0
@@ -282,8 +402,7 @@ class gn_component(object):
         self.heatOut   = 0
     # Generator heat losses as a function of generator output power
     def lossFunction(self):
-        #self.losses = polynomial_from_coeffs(self.powerOUT/1000, [25.052, 27.678, -0.816, -0.470, 0.050])
-        self.losses = self.powerOUT*14.348/1000
+        self.losses  = generatorLosses(self.powerOUT)
         self.powerIN = self.powerOUT + self.losses
     # Function to chooses the cooling mode as a function of waterCold temperature. Presents hysteresis and a certain lag to avoid constant switching
     def exchCoeffFunc(self):
@@ -294,7 +413,7 @@ class gn_component(object):
             for i in range(self.exchMode,len(limitsUp)):
                 if self.waterCold > limitsUp[i]:
                     self.exchMode = i
-                    self.exchLag  = config.exchLag
+                    self.exchLag  = self.spec.exchLag
         elif (self.waterCold < limitsDown[self.exchMode]) & (self.exchLag<1) :
             for i in range(self.exchMode,0,-1):
                 if self.waterCold < limitsDown[i]:
@@ -311,10 +430,18 @@ class gn_component(object):
         maxLoss =  (self.waterCold_tempLimit - Tamb)*self.exchCoeffs[-1]
         return maxLoss*45-1000
     # Calculation o the evolution of internal variables
-    def timeStep(self,power,Tamb):
+    def timeStep(self,power,Tamb,losses=None):
         self.powerOUT = power
-        self.lossFunction()
+        if losses is None:
+            self.lossFunction()
+        else:                                                                       # Losses precomputed for the whole series
+            self.losses  = losses
+            self.powerIN = self.powerOUT + self.losses
         self.exchCoeffFunc()
+        if self.spec.integrator == 'exponential':                                      # Exact step of the linear network
+            advanceExact(self, Tamb, self.spec.dt)
+            self.alarmFunc()
+            return
 
         rotor_air     = (self.rotor  - self.airCold)   * self.rotor_air_trans
         stator_air    = (self.stator - self.airCold)   * self.stator_air_trans
@@ -326,9 +453,9 @@ class gn_component(object):
         lossesStator     = self.losses*self.split - lossesRotor
         self.lossesAir = self.losses * (1- self.split)
 
-        self.rotor     += (lossesRotor  - rotor_air) * config.dt  / self.rotor_int
-        self.stator    += (lossesStator - stator_air - stator_water) * config.dt  / self.stator_int
-        self.waterCold += (stator_water + stator_air + rotor_air - self.heatOut) * config.dt  / self.water_int
+        self.rotor     += (lossesRotor  - rotor_air) * self.spec.dt  / self.rotor_int
+        self.stator    += (lossesStator - stator_air - stator_water) * self.spec.dt  / self.stator_int
+        self.waterCold += (stator_water + stator_air + rotor_air - self.heatOut) * self.spec.dt  / self.water_int
 
         self.waterHot = self.waterCold + (stator_water + stator_air + rotor_air)/self.waterC
         self.airHot   = self.waterCold + (stator_air   + rotor_air)/self.airIn_water_trans
@@ -346,7 +473,8 @@ class gb_component(object):
     split              = 0.95     #       Estimate of the losses extracted by the liquid circuit
     oilCold_tempLimit  = 46       #[C]    Alarm imposed for the oilCold temperature
     exchCoeffs         = [0.25, 1.97, 3.94, 5.91, 7.88]
-    def __init__(self,T_0=0):
+    def __init__(self,T_0=0,spec=None):
+        self.spec      = resolveSpec(spec)
         self.solid     = T_0
         self.oilHot    = T_0
         self.oilCold   = T_0
@@ -364,9 +492,7 @@ class gb_component(object):
         self.oilWater  = 0
     # Gearbox heat losses as a function of gearbox output power
     def lossFunction(self):
-        eff=np.interp(self.powerOUT/1000, [0.0,   0.9,    1.8,    2.97,   3.6,    4.68,   5.4,    6.3,    7.2,    7.65,   9],
-                                             [0.849, 0.9599, 0.9713, 0.9801, 0.9818, 0.9845, 0.9858, 0.9868, 0.9878, 0.9882, 0.989])
-        self.losses  = (20*self.powerOUT/9000 + self.powerOUT*( 1 - eff )/eff)
+        self.losses  = gearboxLosses(self.powerOUT)
         self.powerIN = self.powerOUT + self.losses
     # Function to chooses the cooling mode as a function of waterCold temperature. Presents hysteresis and a certain lag to avoid constant switching
     def exchCoeffFunc(self):
@@ -377,7 +503,7 @@ class gb_component(object):
             for i in range(self.exchMode,len(limitsUp)):
                 if self.oilCold > limitsUp[i]:
                     self.exchMode = i
-                    self.exchLag  = config.exchLag
+                    self.exchLag  = self.spec.exchLag
         elif (self.oilCold < limitsDown[self.exchMode]) & (self.exchLag<1) :
             for i in range(self.exchMode,0,-1):
                 if self.oilCold < limitsDown[i]:
@@ -394,19 +520,27 @@ class gb_component(object):
         maxLoss = (self.oilCold_tempLimit - Tamb)*self.exchCoeffs[-1]
         return maxLoss/0.02
     # Calculation o the evolution of internal variables
-    def timeStep(self,power,Tamb):
+    def timeStep(self,power,Tamb,losses=None):
         self.powerOUT = power
-        self.lossFunction()
+        if losses is None:
+            self.lossFunction()
+        else:                                                                       # Losses precomputed for the whole series
+            self.losses  = losses
+            self.powerIN = self.powerOUT + self.losses
         self.exchCoeffFunc()
+        if self.spec.integrator == 'exponential':                                      # Exact step of the linear network
+            advanceExact(self, Tamb, self.spec.dt)
+            self.alarmFunc()
+            return
 
         solid_oil     = (self.solid    - self.oilCold) * self.solid_oil_trans
         self.oilWater = (self.oilHot   - self.waterCold) * self.oil_water_trans
         self.heatOut  = (self.waterHot - Tamb) * self.water_air_trans
 
-        self.solid     += (self.losses * self.split - solid_oil) * config.dt  / self.solid_int
+        self.solid     += (self.losses * self.split - solid_oil) * self.spec.dt  / self.solid_int
         self.lossesAir = self.losses * (1- self.split)
-        self.oilCold   += (solid_oil - self.oilWater)    * config.dt  / self.oil_int
-        self.waterCold += (self.oilWater - self.heatOut) * config.dt  / self.water_int
+        self.oilCold   += (solid_oil - self.oilWater)    * self.spec.dt  / self.oil_int
+        self.waterCold += (self.oilWater - self.heatOut) * self.spec.dt  / self.water_int
 
         self.oilHot     = self.oilCold   + solid_oil / self.oilC
         self.waterHot   = self.waterCold + self.oilWater / self.waterC
@@ -469,9 +603,9 @@ class gb_component(object):
 
 # Object which holds the behaviour parameters and the variables that define the state of a AIRMASS in tower and NACELLE
 class air_component(object):
-    def __init__(self):
-        [self.temperature,self.flow,self.heatFlows] = machineState.GBM.resultsToDictionary()
-    def dump_GBM_to_store(self):
-        [self.temperature,self.flow,self.heatFlows] = machineState.GBM.resultsToDictionary()
+    def __init__(self, GBM):
+        [self.temperature,self.flow,self.heatFlows] = GBM.resultsToDictionary()
+    def dump_GBM_to_store(self, GBM):
+        [self.temperature,self.flow,self.heatFlows] = GBM.resultsToDictionary()
 
         # print(self.temperature['Hub'].value)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import csv
+import time
+import datetime
+import concurrent.futures
+
+# One met-mast dataset: the site name names its results folder
+def siteInput(name, windFile, temperatureFile):
+    return {'name': name, 'wind': windFile, 'temperature': temperatureFile}
+# Reads a ; separated list of sites, one  name;windFile;temperatureFile  per line. Relative paths are taken from the list folder
+def loadSiteList(filename):
+    folder = os.path.dirname(os.path.abspath(filename))
+    sites  = []
+    with open(filename, 'r') as csvfile:
+        for row in csv.reader(csvfile, delimiter=';', quotechar='|'):
+            if not row or row[0].startswith('#'):
+                continue
+            sites.append(siteInput(row[0], os.path.join(folder, row[1]), os.path.join(folder, row[2])))
+    return sites
+
+# Runs the whole simulation of one site in the current process and stores it in resultsRoot/<site name>.
+# The model modules are imported here, in the worker process; every site gets its own machineState context and GBM.
+# configOverrides are run settings (runSpec fields) replacing the config defaults for this site only, pool workers run
+# several sites and config is never changed. Other names raise TypeError.
+# With graphs the site graphs (requestedGraphs and graphWorkers of the overrides) are built into its results folder
+def simulateSite(site, days=20, ratedPower=9000, powerFactor=0.9, gridVoltage=0.925, resultsRoot='results',
+                 powerCurveFile=None, configOverrides={}, graphs=False):
+    from runSpec import runSpec
+    spec = runSpec.fromConfig(**configOverrides)
+    from thermal_inertia_tools import loadPowerCurve, loadWindTemperatureSeries
+    from machineBehaviour      import machineState
+    from simulationStream      import simulationSteps, runPipeline, windowMaxSink, aepSink, alarmSink
+    from resultsStore          import resultsStoreWriter
+
+    start_time            = time.time()
+    spec                  = spec.replace(powerCurve = loadPowerCurve(ratedPower, powerCurveFile, spec))
+    [winds, temperatures] = loadWindTemperatureSeries(windFile = site['wind'], temperatureFile = site['temperature'], spec = spec)
+    initialState          = machineState(temperatures[0], spec)
+    steps                 = min(int(datetime.timedelta(days = days).total_seconds()//spec.dt), len(winds), len(temperatures))
+    directory             = os.path.join(resultsRoot, site['name'])
+    parameters            = {'site': site['name'], 'wind': site['wind'], 'temperature': site['temperature'],
+                             'dt': spec.dt, 'strechFactor': spec.strechFactor, 'streamDecimation': spec.streamDecimation,
+                             'timeToSimulate': days*86400, 'steps': steps, 'powerFactor': powerFactor,
+                             'gridVoltage': gridVoltage, 'gbmBackend': spec.gbmBackend, 'integrator': spec.integrator}
+    storeFactory          = lambda state: resultsStoreWriter.forState(directory, state, steps//spec.streamDecimation + 2, parameters)
+    stream                = simulationSteps(initialState, winds, temperatures, powerFactor, gridVoltage, steps)
+    [store, aep, alarms]  = runPipeline(stream, [windowMaxSink(spec.streamDecimation, storeFactory), aepSink(), alarmSink()])
+
+    if initialState.context.profiler.enabled:
+        initialState.context.profiler.save(os.path.join(directory, 'profile.json'))
+    summary = {'site': site['name'], 'steps': steps, 'results': directory, 'seconds': time.time() - start_time}
+    if graphs:
+        from graphTools import outputRequestedGraphs
+        summary['graphs'] = dict(outputRequestedGraphs(store, spec = spec.replace(currentLocation = os.path.join(directory, ''))))
+    summary.update(aep)
+    summary.update(alarms)
+    return summary
+
+# Distributes whole site simulations over a process pool, one site at a time per worker process.
+# Returns the per site summaries in the order of sites; a failing site is reported with its error and does not stop the rest
+def runSites(sites, workers=None, **options):
+    from runSpec import runSpec
+    runSpec.fromConfig(**options.get('configOverrides', {}))          # Unknown settings fail here, not once per site
+    summaries = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = dict((pool.submit(simulateSite, site, **options), site['name']) for site in sites)
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                summaries[name] = future.result()
+                print('%-20s done in %i seconds' % (name, summaries[name]['seconds']))
+            except Exception as error:
+                summaries[name] = {'site': name, 'error': repr(error)}
+                print('%-20s failed: %r' % (name, error))
+    return [summaries[site['name']] for site in sites]
+
+# Totals over all the sites that finished: energy, derated steps and alarm steps
+def mergeSummaries(summaries):
+    finished = [summary for summary in summaries if 'error' not in summary]
+    merged   = {'sites': len(finished), 'failed': len(summaries) - len(finished)}
+    for field in ['AEP', 'AEPderated', 'steps', 'derated', 'transformer', 'converter', 'generator', 'gearbox']:
+        merged[field] = sum(summary[field] for summary in finished)
+    merged['deratedEnergyShare'] = 1 - merged['AEPderated']/merged['AEP'] if merged['AEP'] else 0.0
+    return merged
+# Writes the per site summaries and the merged totals as a ; separated table
+summaryFields = ['site', 'steps', 'AEP', 'AEPderated', 'derated', 'transformer', 'converter', 'generator', 'gearbox',
+                 'seconds', 'results', 'error']
+def writeSummary(filename, summaries):
+    merged = mergeSummaries(summaries)
+    total  = dict(merged, site='TOTAL')
+    with open(filename, 'w') as csvfile:
+        writer = csv.DictWriter(csvfile, summaryFields, delimiter=';', extrasaction='ignore')
+        writer.writeheader()
+        for summary in summaries + [total]:
+            writer.writerow(summary)
+    return merged
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('usage: multiSiteRunner.py sites.csv [days] [workers]')
+        sys.exit(1)
+    sites     = loadSiteList(sys.argv[1])
+    days      = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers   = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    print('Simulating %i sites for %i days' % (len(sites), days))
+    summaries = runSites(sites, workers, days = days)
+    merged    = writeSummary(os.path.join('results', 'sites_summary.csv'), summaries)
+    print('Expected AEP         :   %i MW h over %i sites' % (merged['AEP'], merged['sites']))
+    print('Expected AEP derated :   %i MW h, %.2f %% lost to derating' % (merged['AEPderated'], 100*merged['deratedEnergyShare']))
+    if merged['failed']:
+        print('%i sites failed, see results/sites_summary.csv' % merged['failed'])
@@ -0,0 +1,93 @@
+import itertools
+import concurrent.futures
+import numpy as np
+import pandas
+
+from runSpec import resolveSpec
+from batchedComponents import drivetrainBatch, tr_batch, cv_batch, gn_batch, gb_batch
+
+components       = ['transformer', 'converter', 'generator', 'gearbox']
+componentBatches = {'transformer': tr_batch, 'converter': cv_batch, 'generator': gn_batch, 'gearbox': gb_batch}
+
+# Full factorial design: axes maps 'component.parameter' to the list of values to try, e.g.
+# {'transformer.oil_int': [6000, 8650], 'gearbox.exchCoeffs': [[0.2, 0.4, 0.6, 0.8, 1], [0.4, 0.8, 1.2, 1.6, 2]]}
+def sweepGrid(axes):
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*[axes[name] for name in names])]
+# Latin hypercube sample: ranges maps 'component.parameter' to (low, high), every range is split in samples strata
+def sweepSample(ranges, samples, seed=0):
+    random   = np.random.RandomState(seed)
+    variants = [{} for i in range(samples)]
+    for (name, (low, high)) in ranges.items():
+        position = (random.permutation(samples) + random.uniform(size=samples))/samples
+        for (variant, x) in zip(variants, position):
+            variant[name] = low + x*(high - low)
+    return variants
+
+# Groups the variant parameters by component as the keyword arguments of drivetrainBatch, a parameter missing in a
+# variant takes the default value of the component class
+def batchArguments(variants):
+    names     = sorted(set().union(*variants))
+    arguments = dict((component, {}) for component in components)
+    for name in names:
+        [component, parameter] = name.split('.')
+        default = getattr(componentBatches[component].scalarClass, parameter)
+        arguments[component][parameter] = [variant.get(name, default) for variant in variants]
+    return arguments
+# Runs every variant over the same wind and temperature inputs as one drivetrainBatch and returns one row of KPIs per
+# variant: peak of every component temperature, time to the first alarm [s] (NaN if never), alarm steps and the energy
+# produced and lost to derating [kWh]. spec (runSpec, from config when not given) sets dt, exchLag and the power curve
+def evaluateVariants(variants, winds, temperatures, PF=0.9, V=0.925, T_0=None, powerCurve=None, spec=None):
+    spec         = resolveSpec(spec)
+    powerCurve   = powerCurve if powerCurve is not None else spec.powerCurve
+    temperatures = np.asarray(temperatures, dtype=float)
+    potentials   = np.interp(np.asarray(winds, dtype=float), powerCurve[0], powerCurve[1])
+    N     = len(variants)
+    T_0   = temperatures[0] if T_0 is None else T_0
+    batch = drivetrainBatch(N, T_0, spec=spec, **batchArguments(variants))
+
+    peaks       = dict(((component, state), np.full(N, -np.inf)) for component in components
+                       for state in componentBatches[component].states)
+    firstAlarm  = dict((component, np.full(N, np.nan)) for component in components)
+    alarmSteps  = dict((component, np.zeros(N, dtype=int)) for component in components)
+    energy      = np.zeros(N)
+    for k in range(len(potentials)):
+        batch.timeStep(potentials[k], PF, V, temperatures[k])
+        for component in components:
+            model = getattr(batch, component)
+            for state in model.states:
+                np.maximum(peaks[(component, state)], getattr(model, state), out=peaks[(component, state)])
+            alarmSteps[component] += model.alarm
+            firstAlarm[component][model.alarm & np.isnan(firstAlarm[component])] = (k + 1)*spec.dt
+        energy += batch.power
+
+    table = pandas.DataFrame([dict((name, tuple(value) if isinstance(value, list) else value)
+                                   for (name, value) in variant.items()) for variant in variants])
+    for (component, state) in peaks:
+        table['%s.%s.peak' % (component, state)] = peaks[(component, state)]
+    for component in components:
+        table[component + '.timeToAlarm'] = firstAlarm[component]
+        table[component + '.alarmSteps']  = alarmSteps[component]
+    table['potentialEnergy'] = potentials.sum()*spec.dt/3600
+    table['energy']          = energy*spec.dt/3600
+    table['deratedEnergy']   = table['potentialEnergy'] - table['energy']
+    return table
+
+# Evaluates a list of variants in chunks of chunkSize, each chunk is one drivetrainBatch on a worker process.
+# Returns the KPI table with one row per variant in the order given
+def runSweep(variants, winds, temperatures, steps, PF=0.9, V=0.925, T_0=None, powerCurve=None, workers=None, chunkSize=256,
+             spec=None):
+    spec         = resolveSpec(spec)
+    powerCurve   = powerCurve if powerCurve is not None else spec.powerCurve
+    winds        = np.asarray(winds[:steps], dtype=float)
+    temperatures = np.asarray(temperatures[:steps], dtype=float)
+    chunks = [variants[i:i+chunkSize] for i in range(0, len(variants), chunkSize)]
+    if workers == 1 or len(chunks) == 1:
+        tables = [evaluateVariants(chunk, winds, temperatures, PF, V, T_0, powerCurve, spec) for chunk in chunks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            tables = list(pool.map(evaluateVariants, chunks, *[itertools.repeat(argument) for argument in
+                                                             [winds, temperatures, PF, V, T_0, powerCurve, spec]]))
+    table = pandas.concat(tables, ignore_index=True)
+    table.index.name = 'variant'
+    return table
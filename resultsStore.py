@@ -0,0 +1,108 @@
+import os
+import json
+import numpy as np
+
+from columnarState import columnarSeries, buildColumnSpec, columnGetter
+
+manifestName = 'manifest.json'
+
+# Writes the manifest describing the columns of a results directory, replaced atomically so readers never see half of it
+def writeManifest(directory, series, parameters):
+    manifest = {'version':    1,
+                'length':     series.length,
+                'nodes':      series.nodes,
+                'bonds':      [list(bond) for bond in series.bonds],
+                'columns':    [{'name': name, 'dtype': np.dtype(dtype).str, 'file': columnFile(i)}
+                               for (i, (name, dtype)) in enumerate(series.spec)],
+                'parameters': parameters}
+    temporary = os.path.join(directory, manifestName + '.tmp')
+    with open(temporary, 'w') as manifestFile:
+        json.dump(manifest, manifestFile, indent=1, default=str)
+    os.replace(temporary, os.path.join(directory, manifestName))
+# Columns are stored by position, node and bond names are not always valid file names
+def columnFile(i):
+    return 'c%03i.npy' % i
+
+# columnarSeries whose columns are .npy files memory mapped in a directory, one contiguous array per variable.
+# Rows are written as the simulation runs and the manifest is refreshed every flushEvery rows
+class resultsStoreWriter(columnarSeries):
+    def __init__(self, directory, nodes, bonds, capacity=1024, parameters={}, flushEvery=14400):
+        self.directory  = directory
+        self.parameters = dict(parameters)
+        self.flushEvery = flushEvery
+        self.nodes      = list(nodes)
+        self.bonds      = list(bonds)
+        self.spec       = buildColumnSpec(self.nodes, self.bonds)
+        self.length     = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.columns    = dict((name, self.openColumn(i, dtype, max(capacity, 1))) for (i, (name, dtype)) in enumerate(self.spec))
+        self._getters   = [(name, columnGetter(name)) for (name, dtype) in self.spec]
+        writeManifest(self.directory, self, self.parameters)
+    # Creates an empty store with the air network layout (the topology of its GBM) of the given machineState
+    @classmethod
+    def forState(cls, directory, state, capacity=1024, parameters={}, flushEvery=14400):
+        topology = state.context.GBM.topology
+        return cls(directory, topology.nodes, topology.bonds, capacity, parameters, flushEvery)
+    def openColumn(self, i, dtype, capacity):
+        return np.lib.format.open_memmap(os.path.join(self.directory, columnFile(i)), mode='w+', dtype=dtype, shape=(capacity,))
+    # Memory maps can not grow in place: the files are rewritten with twice the size
+    def reserve(self, capacity):
+        if capacity <= self.capacity():
+            return
+        capacity = max(capacity, 2*self.capacity())
+        for (i, (name, dtype)) in enumerate(self.spec):
+            old = np.array(self.columns[name][:self.length])
+            self.columns[name] = None                   # Release the old mapping before the file is rewritten
+            self.columns[name] = self.openColumn(i, dtype, capacity)
+            self.columns[name][:self.length] = old
+    def rowAdded(self):
+        if self.length % self.flushEvery == 0:
+            self.flush()
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        writeManifest(self.directory, self, self.parameters)
+    def close(self):
+        self.flush()
+        return self
+    # Pickling (e.g. in a checkpoint) flushes the rows written so far and keeps only the layout and the length,
+    # the column files are mapped again for writing when the store is unpickled
+    def __getstate__(self):
+        self.flush()
+        state = columnarSeries.__getstate__(self)
+        del state['columns']
+        return state
+    def __setstate__(self, state):
+        columnarSeries.__setstate__(self, state)
+        self.columns = dict((name, np.load(os.path.join(self.directory, columnFile(i)), mmap_mode='r+'))
+                            for (i, (name, dtype)) in enumerate(self.spec))
+
+# Lazy dictionary of memory mapped columns: a column file is only opened the first time it is read
+class lazyColumns(dict):
+    def __init__(self, directory, files):
+        dict.__init__(self)
+        self.directory = directory
+        self.files     = files
+    def __missing__(self, name):
+        column = np.load(os.path.join(self.directory, self.files[name]), mmap_mode='r')
+        self[name] = column
+        return column
+    def __contains__(self, name):
+        return name in self.files
+
+# Opens a results directory read-only. The result behaves as a columnarSeries (views, column(), len) but only the
+# columns actually used are mapped, nothing is rebuilt as Python objects
+def openResults(directory):
+    with open(os.path.join(directory, manifestName), 'r') as manifestFile:
+        manifest = json.load(manifestFile)
+    series = columnarSeries.__new__(columnarSeries)
+    series.directory  = directory
+    series.nodes      = manifest['nodes']
+    series.bonds      = [tuple(bond) for bond in manifest['bonds']]
+    series.spec       = [(column['name'], np.dtype(column['dtype'])) for column in manifest['columns']]
+    series.length     = manifest['length']
+    series.parameters = manifest['parameters']
+    series.columns    = lazyColumns(directory, dict((column['name'], column['file']) for column in manifest['columns']))
+    series._getters   = []
+    return series
@@ -0,0 +1,53 @@
+import collections
+
+import config
+
+# Settings a simulation run reads, config.py only provides their defaults
+runSpecFields = ['dt', 'exchLag', 'strechFactor', 'reductionFactor', 'streamDecimation', 'gbmBackend', 'gbmCacheSize',
+                 'gbmCacheQuantum', 'couplingMinInterval', 'couplingMaxInterval', 'couplingHeatTolerance',
+                 'couplingTambTolerance', 'integrator', 'fastForward', 'profileSteps', 'requestedGraphs', 'graphWorkers',
+                 'checkpointEvery', 'powerCurve', 'currentLocation']
+# Settings only read by the graphs once the steps are done, a resumed run may change them
+graphSettings = ['requestedGraphs', 'graphWorkers']
+
+# Containers are frozen so a spec is hashable: the power curve becomes a pair of tuples, the cache quantum sorted pairs,
+# the requested graphs a tuple
+def frozenField(name, value):
+    if name == 'powerCurve':
+        return tuple(tuple(float(x) for x in row) for row in value)
+    if name == 'gbmCacheQuantum':
+        return tuple(sorted(dict(value).items()))
+    if name == 'requestedGraphs' and value is not None:
+        return tuple(value)
+    return value
+
+# Immutable settings of one simulation run, threaded through machineState, the components, the GBM and the graphs so
+# differently configured runs can live in the same interpreter. Equal specs hash equal, they can key caches
+class runSpec(collections.namedtuple('runSpec', runSpecFields)):
+    __slots__ = ()
+    def __new__(cls, *args, **values):
+        spec = super(runSpec, cls).__new__(cls, *args, **values)
+        return tuple.__new__(cls, [frozenField(name, value) for (name, value) in zip(cls._fields, spec)])
+    # Spec with the current values of config, changed by overrides
+    @classmethod
+    def fromConfig(cls, **overrides):
+        unknown = [name for name in overrides if name not in cls._fields]
+        if unknown:
+            raise TypeError('Unknown run settings: %s' % ', '.join(unknown))
+        values = dict((name, getattr(config, name)) for name in cls._fields)
+        values.update(overrides)
+        return cls(**values)
+    # Copy of the spec with some settings changed
+    def replace(self, **changes):
+        values = self._asdict()
+        values.update(changes)
+        return runSpec(**values)
+    # Immutable: copies of a machineState share its spec
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo):
+        return self
+
+# The spec given, or one built from config when there is none
+def resolveSpec(spec=None):
+    return spec if spec is not None else runSpec.fromConfig()
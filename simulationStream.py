@@ -0,0 +1,137 @@
+import time
+import numpy as np
+
+from columnarState import columnarSeries
+from machineBehaviour import lossChain
+from fastForward import constantBlock, advanceBlock
+
+# Generator over the simulation: yields the initial state and then the same machineState after every step.
+# State k only depends on state k-1, so nothing is kept here; sinks must take what they need when they consume it.
+# A run resumed after start steps (see checkpoint) continues from the state given without yielding it again.
+# Potential power and non-derated losses come from a lossChain computed once for the whole series.
+# With fastForward, blocks of constant inputs are advanced at once when possible and yielded as one state with span
+# set to the steps of the block
+def simulationSteps(state, winds, temperatures, PF, V, steps, start=0, fastForward=None):
+    fastForward = state.spec.fastForward if fastForward is None else fastForward
+    chain = lossChain(winds, PF, V, steps, state.spec.powerCurve)
+    if start == 0:
+        yield state
+    k = start
+    while k < steps:
+        n = constantBlock(winds, temperatures, k, steps) if fastForward else 1
+        if not advanceBlock(state, n, winds[k], PF, V, temperatures[k], chain.row(k)):
+            state.advance(winds[k], PF, V, temperatures[k], chain.row(k))
+        k += state.span
+        yield state
+# Feeds every state of the stream to all the sinks, then closes them and returns their results in order
+def runPipeline(stream, sinks):
+    for state in stream:
+        for sink in sinks:
+            sink.consume(state)
+    return [sink.close() for sink in sinks]
+
+# Accumulates potential and derated production, same figures as calculateAEP without keeping the series
+class aepSink(object):
+    def __init__(self):
+        self.potential = 0.0
+        self.power     = 0.0
+        self.steps     = 0
+    def consume(self, state):
+        self.potential += state.potential*state.span
+        self.power     += state.power*state.span
+        self.steps     += state.span
+    def close(self):
+        return {'AEP':        float(self.potential*525600/max(self.steps, 1)/1000/60),
+                'AEPderated': float(self.power    *525600/max(self.steps, 1)/1000/60)}
+    def report(self):
+        result = self.close()
+        print('Expected AEP         :   %i MW h' % result['AEP'])
+        print('Expected AEP derated :   %i MW h' % result['AEPderated'])
+
+# Counts the steps with each component in alarm and the steps with derated production
+class alarmSink(object):
+    components = ['transformer', 'converter', 'generator', 'gearbox']
+    def __init__(self):
+        self.alarms  = dict((component, 0) for component in self.components)
+        self.derated = 0
+    def consume(self, state):
+        for component in self.components:
+            if getattr(state, component).alarm:
+                self.alarms[component] += state.span
+        if state.power < state.potential:
+            self.derated += state.span
+    def close(self):
+        result = dict(self.alarms)
+        result['derated'] = self.derated
+        return result
+    def report(self):
+        print('Alarm steps          :   ' + ', '.join('%s %i' % (component, self.alarms[component]) for component in self.components)
+              + ', derated %i' % self.derated)
+
+# Prints the progress of the simulation every given number of steps
+class progressSink(object):
+    def __init__(self, every=14400):
+        self.every      = every
+        self.steps      = 0
+        self.start_time = time.time()
+    def consume(self, state):
+        if self.steps > 0 and (self.steps-1)//self.every != (self.steps-1-state.span)//self.every:
+            print(int(((self.steps-1)*state.spec.dt)//86400), "days completed in ", int(time.time()-self.start_time), "seconds")
+        self.steps += state.span
+    def close(self):
+        return self.steps
+
+# Graph decimation on the fly: keeps one row per window of reductionFactor steps with the per-window maximum of every
+# column (any() for alarms, first time of the window). Power and potential are averaged over the steps of the window and
+# span is the steps it covers, so the energy of the stored rows is the energy of the stream. A fast-forwarded block
+# longer than the window is kept whole. Memory grows with steps/reductionFactor, factor 1 keeps every state.
+# The rows go to a columnarSeries, or to the series built by factory(state) for the first state (e.g. a results store)
+class windowMaxSink(object):
+    averaged = ['power', 'potential']
+    def __init__(self, reductionFactor, factory=None):
+        self.reductionFactor = reductionFactor
+        self.factory = factory if factory is not None else columnarSeries.forState
+        self.series = None
+        self.buffer = None
+        self.steps  = 0
+    def consume(self, state):
+        if self.series is None:
+            self.series = self.factory(state)
+            self.buffer = columnarSeries.forState(state, self.reductionFactor)
+        if self.reductionFactor == 1:
+            self.series.append(state)
+            return
+        self.buffer.append(state)
+        self.steps += state.span
+        if self.steps >= self.reductionFactor:
+            self.flush()
+    def flush(self):
+        if self.buffer is None or len(self.buffer) == 0:
+            return
+        series = self.series
+        series.reserve(series.length + 1)
+        spans  = self.buffer.column('span')
+        for (name, dtype) in series.spec:
+            window = self.buffer.column(name)
+            if name == 'time':
+                series.columns[name][series.length] = window[0]
+            elif name == 'span':
+                series.columns[name][series.length] = spans.sum()
+            elif name in self.averaged:
+                series.columns[name][series.length] = np.dot(window, spans)/spans.sum()
+            elif window.dtype == np.bool_:
+                series.columns[name][series.length] = window.any()
+            else:
+                series.columns[name][series.length] = window.max()
+        series.length += 1
+        series.rowAdded()
+        self.buffer.length = 0
+        self.steps = 0
+    # The factory is only needed for the first state, it is not pickled with the sink
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['factory'] = None
+        return state
+    def close(self):
+        self.flush()
+        return self.series.close()
@@ -0,0 +1,153 @@
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+from bondTopology import bondTopology
+
+cP = 1000   #[J/kgK] Heat capacity of air, same value as the pyomo objective
+
+# Reads a whitespace separated table with a header line, as nodes.tab and bonds.tab
+def readTable(filename, keyColumns):
+    with open(filename, 'r') as tabfile:
+        lines = [line.split() for line in tabfile if line.strip()]
+    header = lines[0][keyColumns:]
+    rows   = []
+    for line in lines[1:]:
+        key = line[0] if keyColumns == 1 else tuple(line[:keyColumns])
+        rows.append((key, dict(zip(header, line[keyColumns:]))))
+    return rows
+# Parses the TRUE/FALSE and numeric entries of the tab files
+def tableValue(text):
+    if text.upper() in ('TRUE', 'FALSE'):
+        return text.upper() == 'TRUE'
+    return float(text)
+
+# Native solver for the air_volume_GBM network: flows and pressures by Newton on the sparse incidence matrix,
+# then node temperatures as one sparse linear system
+class sparseAirNetwork(object):
+    def __init__(self, nodesfile, bondsfile):
+        nodeRows = readTable(nodesfile, 1)
+        bondRows = readTable(bondsfile, 2)
+        self.topology  = bondTopology([key for (key, row) in nodeRows], [key for (key, row) in bondRows])
+        self.nodes     = self.topology.nodes
+        self.bonds     = self.topology.bonds
+        self.nodeIndex = self.topology.nodeIndex
+        self.bondIndex = self.topology.bondIndex
+        nodeColumn = lambda name: np.array([tableValue(row[name]) for (key, row) in nodeRows])
+        bondColumn = lambda name: np.array([tableValue(row[name]) for (key, row) in bondRows])
+        self.minExterior = nodeColumn('minExterior').astype(float)
+        self.maxExterior = nodeColumn('maxExterior').astype(float)
+        self.minP        = nodeColumn('minP').astype(float)
+        self.maxP        = nodeColumn('maxP').astype(float)
+        self.minT        = nodeColumn('minT').astype(float)
+        self.maxT        = nodeColumn('maxT').astype(float)
+        self.tempExt     = nodeColumn('tempExt').astype(float)
+        self.inlet       = nodeColumn('inlet').astype(bool)
+        self.outlet      = nodeColumn('outlet').astype(bool)
+        self.airMass     = nodeColumn('airmass').astype(float)
+        self.tempPre     = nodeColumn('tempPre').astype(float)
+        self.dropCoeff   = bondColumn('dropCoeff').astype(float)
+        self.fan         = bondColumn('fan').astype(bool)
+        self.heatFlow    = bondColumn('heatFlow').astype(float)
+        self.forced      = bondColumn('forced').astype(float)
+        self.buildIncidence()
+        self.flow     = np.zeros(len(self.bonds))
+        self.pressure = np.zeros(len(self.nodes))
+        self.exterior = np.zeros(len(self.nodes))
+        self.temper   = self.tempPre.copy()
+        self.iterations = 0
+        self.violations = {'flow': [], 'pressure': [], 'exterior': [], 'temper': []}
+        self.flowStructures = {}
+    # Node x bond incidence of the topology: +1 where the bond ends, -1 where it starts, so  incidence * flow  is the net
+    # inflow per node
+    def buildIncidence(self):
+        topology = self.topology
+        self.starts    = topology.starts
+        self.ends      = topology.ends
+        self.incidence = scipy.sparse.csr_matrix((topology.incidenceData, topology.incidenceIndices, topology.incidencePointer),
+                                                 shape=(len(self.nodes), len(self.bonds)))
+        self.freeBonds  = np.flatnonzero(~self.fan)
+        self.fanBonds   = np.flatnonzero(self.fan)
+        self.fanIncidence = self.incidence[:, self.fanBonds]
+        self.fixedP     = self.minP == self.maxP
+        self.freeP      = np.flatnonzero(~self.fixedP)
+        self.openNodes  = self.inlet | self.outlet
+    # Sparse blocks of the flow/pressure problem that only depend on which exterior flows are free, built once per pattern
+    def flowStructure(self, freeExterior):
+        key = tuple(freeExterior)
+        structure = self.flowStructures.get(key)
+        if structure is None:
+            A_free = self.incidence[:, self.freeBonds].tocsc()
+            E = scipy.sparse.csc_matrix((np.ones(len(freeExterior)), (freeExterior, np.arange(len(freeExterior)))),
+                                        shape=(len(self.nodes), len(freeExterior)))
+            P = scipy.sparse.csr_matrix((np.ones(len(self.freeP)), (self.freeP, np.arange(len(self.freeP)))),
+                                        shape=(len(self.nodes), len(self.freeP)))
+            pressureLHS = -(A_free.T.dot(P)).tocsc()
+            pressureRHS = A_free.T.dot(np.where(self.fixedP, self.minP, 0))
+            structure = [A_free, E, pressureLHS, pressureRHS]
+            self.flowStructures[key] = structure
+        return structure
+    # Solves the flow/pressure problem for the forced fan flows and exterior bounds given
+    def solveFlows(self, forced, minExterior, maxExterior, tolerance=1e-10, maxIterations=50):
+        fixedExterior = np.where(self.openNodes & (minExterior == maxExterior), minExterior, 0)
+        freeExterior  = np.flatnonzero(self.openNodes & (minExterior != maxExterior))
+        [A_free, E, pressureLHS, pressureRHS] = self.flowStructure(freeExterior)
+        drop    = self.dropCoeff[self.freeBonds]
+        nF, nP  = len(self.freeBonds), len(self.freeP)
+        balanceRHS = self.fanIncidence.dot(forced[self.fanBonds]) + fixedExterior
+        # Warm start from the previous solution
+        f = self.flow[self.freeBonds].copy()
+        p = self.pressure[self.freeP].copy()
+        x = self.exterior[freeExterior].copy()
+        for iteration in range(maxIterations):
+            residual = np.r_[A_free.dot(f) + E.dot(x) + balanceRHS,
+                             pressureLHS.dot(p) - pressureRHS - drop*f*np.abs(f)]
+            if np.max(np.abs(residual)) < tolerance:
+                break
+            slope    = scipy.sparse.diags(-2*drop*np.maximum(np.abs(f), 1e-3))
+            jacobian = scipy.sparse.bmat([[A_free, None,        E   ],
+                                          [slope,  pressureLHS, None]], format='csc')
+            step = scipy.sparse.linalg.spsolve(jacobian, -residual)
+            f += step[:nF]
+            p += step[nF:nF+nP]
+            x += step[nF+nP:]
+        self.iterations = iteration
+        self.flow[self.freeBonds] = f
+        self.flow[self.fanBonds]  = forced[self.fanBonds]
+        self.pressure[self.freeP] = p
+        self.pressure[self.fixedP] = self.minP[self.fixedP]
+        self.exterior[:] = fixedExterior
+        self.exterior[freeExterior] = x
+    # Heat balance of every node with the flows known, the same equations as the heat terms of the pyomo objective so
+    # the solution zeroes them: advection at the temperature of the start node of every bond, the heat of a bond into its
+    # end node, implicit storage over dt, inlets bringing air at tempExt and outlets exchanging it at tempPre
+    def solveTemperatures(self, tempExt, tempPre, heatFlow, dt):
+        nNodes   = len(self.nodes)
+        carried  = cP*self.flow
+        storage  = cP*self.airMass/dt
+        diagonal = storage + np.bincount(self.starts, carried, nNodes)
+        matrix   = scipy.sparse.csr_matrix((np.r_[diagonal, -carried],
+                                            (np.r_[np.arange(nNodes), self.ends], np.r_[np.arange(nNodes), self.starts])),
+                                           shape=(nNodes, nNodes))
+        exchanged = np.where(self.outlet, tempPre, np.where(self.inlet, tempExt, 0))
+        rhs = storage*tempPre + np.bincount(self.ends, heatFlow, nNodes) + cP*self.exterior*exchanged
+        self.temper = scipy.sparse.linalg.spsolve(matrix.tocsc(), rhs)
+    # Bonds and nodes of the last solution outside the bounds of the pyomo model: negative flows (NonNegativeReals
+    # domain), pressures outside [minP, maxP], exterior flows outside [minExterior, maxExterior] and temperatures outside
+    # [minT, maxT] or below 0 (NonNegativeReals). The balance equations are solved without them, clipping afterwards
+    # would break the energy balance, a solution outside them needs the constrained ipopt solve instead
+    def boundViolations(self, minExterior, maxExterior, tolerance=1e-6):
+        return {'flow':     [self.bonds[b] for b in np.flatnonzero(self.flow < -tolerance)],
+                'pressure': [self.nodes[i] for i in np.flatnonzero((self.pressure < self.minP - tolerance) |
+                                                                   (self.pressure > self.maxP + tolerance))],
+                'exterior': [self.nodes[i] for i in np.flatnonzero((self.exterior < minExterior - tolerance) |
+                                                                   (self.exterior > maxExterior + tolerance))],
+                'temper':   [self.nodes[i] for i in np.flatnonzero((self.temper < np.maximum(self.minT, 0) - tolerance) |
+                                                                   (self.temper > self.maxT + tolerance))]}
+    # Solves flows, pressures and temperatures for the given boundary conditions. violations holds the boundViolations
+    # of the solution, empty lists when it is feasible for the pyomo model
+    def solve(self, tempExt, tempPre, heatFlow, forced, minExterior, maxExterior, dt):
+        self.solveFlows(forced, minExterior, maxExterior)
+        self.solveTemperatures(tempExt, tempPre, heatFlow, dt)
+        self.violations = self.boundViolations(minExterior, maxExterior)
+        return [self.flow, self.pressure, self.exterior, self.temper]
@@ -0,0 +1,58 @@
+import json
+import math
+import time
+
+# Cumulative time, number of calls, slowest call and a log scale histogram of the durations of one stage of the step.
+# Bin i counts the durations in [10**(i/binsPerDecade + lowest), 10**((i+1)/binsPerDecade + lowest)) seconds, the first
+# and last bins also take everything below and above the range
+class stageTiming(object):
+    lowest        = -7              # 100 ns
+    highest       = 2               # 100 s
+    binsPerDecade = 4
+    def __init__(self):
+        self.calls     = 0
+        self.total     = 0.0
+        self.max       = 0.0
+        self.histogram = [0]*((self.highest - self.lowest)*self.binsPerDecade)
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        i = int((math.log10(seconds) - self.lowest)*self.binsPerDecade) if seconds > 0 else 0
+        self.histogram[min(max(i, 0), len(self.histogram) - 1)] += 1
+    # Lower edges of the histogram bins [s]
+    def edges(self):
+        return [10**(self.lowest + i/float(self.binsPerDecade)) for i in range(len(self.histogram) + 1)]
+    def toDictionary(self):
+        return {'calls': self.calls, 'total': self.total, 'mean': self.total/self.calls if self.calls else 0.0,
+                'max': self.max, 'edges': self.edges(), 'histogram': list(self.histogram)}
+
+# Timings of the stages of machineState steps. Call sites take start = profiler.clock() before a stage and
+# profiler.record(name, start) after it; while disabled record returns at once so the hooks can stay in the hot path
+class stepProfiler(object):
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages  = {}
+        self.clock   = time.perf_counter
+    def record(self, name, start):
+        if not self.enabled:
+            return
+        seconds = self.clock() - start
+        if name not in self.stages:
+            self.stages[name] = stageTiming()
+        self.stages[name].add(seconds)
+    def reset(self):
+        self.stages = {}
+    def toDictionary(self):
+        return dict((name, stage.toDictionary()) for (name, stage) in self.stages.items())
+    # Writes every stage (totals and histograms) as JSON
+    def save(self, filename):
+        with open(filename, 'w') as profileFile:
+            json.dump({'stages': self.toDictionary()}, profileFile, indent=1)
+    # Prints the stages by total time with their share of the time of all of them
+    def report(self):
+        overall = sum(stage.total for stage in self.stages.values()) or 1.0
+        for (name, stage) in sorted(self.stages.items(), key=lambda item: -item[1].total):
+            print('  %-20s %9i calls %9.2f s %6.1f %% %10.1f us mean %10.1f us max' %
+                  (name, stage.calls, stage.total, 100*stage.total/overall, 1e6*stage.total/stage.calls, 1e6*stage.max))
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+# The model reads nodes.tab and bonds.tab from the working directory
+@pytest.fixture(autouse=True)
+def repositoryDirectory(monkeypatch):
+    monkeypatch.chdir(root)
+
+# Spec of the shipped data with the native air network solver, so the tests do not need an ipopt executable
+@pytest.fixture
+def spec():
+    from runSpec import runSpec
+    from thermal_inertia_tools import loadPowerCurve
+    spec = runSpec.fromConfig(currentLocation=os.path.join(root, ''), gbmBackend='sparse')
+    return spec.replace(powerCurve=loadPowerCurve(9000, spec=spec))
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from machineBehaviour  import tr_component, cv_component, gn_component, gb_component
+from batchedComponents import tr_batch, cv_batch, gn_batch, gb_batch
+
+# Batched class, scalar class, whether the losses take PF and V, starting temperature just under the first cooling step
+components = [(tr_batch, tr_component, True,  79),
+              (cv_batch, cv_component, True,  30),
+              (gn_batch, gn_component, False, 34),
+              (gb_batch, gb_component, False, 38)]
+splits = [0.8, 0.9, 0.95]
+
+# Every variant of a batch follows the scalar component with the same parameters step by step, through the cooling
+# mode changes of a varying power and ambient temperature
+@pytest.mark.parametrize('batchClass, scalarClass, electrical, T_0', components)
+def test_batchMatchesScalar(spec, batchClass, scalarClass, electrical, T_0):
+    spec    = spec.replace(integrator='euler')
+    random  = np.random.RandomState(1)
+    powers  = np.repeat(random.uniform(0, 9000, 40), 50)
+    ambient = np.repeat(random.uniform(5, 35, 40), 50)
+    batch   = batchClass(len(splits), T_0, spec, split=splits)
+    scalars = []
+    for split in splits:
+        scalar = scalarClass(T_0, spec)
+        scalar.split = split
+        scalars.append(scalar)
+    modes = set()
+    for (power, Tamb) in zip(powers, ambient):
+        inputs = (power, 0.9, 0.925, Tamb) if electrical else (power, Tamb)
+        batch.timeStep(np.full(len(splits), power), *inputs[1:])
+        for (i, scalar) in enumerate(scalars):
+            scalar.timeStep(*inputs)
+            for name in batchClass.states + ['losses', 'heatOut', 'lossesAir']:
+                assert getattr(batch, name)[i] == pytest.approx(getattr(scalar, name), rel=1e-12, abs=1e-12), name
+            assert batch.exchMode[i] == scalar.exchMode
+            assert batch.alarm[i]    == scalar.alarm
+            modes.add(scalar.exchMode)
+    assert len(modes) > 1
@@ -0,0 +1,43 @@
+import os
+import shutil
+
+import numpy as np
+
+from benchmarks import syntheticSeries, runBenchmarks, saveBenchmark, loadBenchmarks, benchmarkFigures, benchmarkReport
+
+# Same seed, same series; another seed another one. Winds stay within the power curve range
+def test_syntheticSeriesDeterministic():
+    [winds, temperatures] = syntheticSeries(3000, seed=3)
+    [again, againT]       = syntheticSeries(3000, seed=3)
+    assert np.array_equal(winds, again) and np.array_equal(temperatures, againT)
+    assert not np.array_equal(winds, syntheticSeries(3000, seed=4)[0])
+    assert len(winds) == len(temperatures) == 3000
+    assert winds.min() >= 0 and winds.max() <= 30
+
+# A short run fills every section of the record, a backend that can not run here is reported with its error
+def test_recordSections():
+    record  = runBenchmarks(steps=40, solves=3, variants=4, graphs=False, backends=('sparse', 'ipopt'))
+    results = record['results']
+    assert results['timeStep']['steps'] == results['stream']['steps'] == 40
+    assert results['timeStep']['gbmSolves'] > 0
+    assert results['gbm']['sparse']['solves'] == 3
+    if shutil.which('ipopt') is None:
+        assert 'error' in results['gbm']['ipopt']
+    assert results['components']['variants'] == 4
+    assert record['parameters']['steps'] == 40
+    assert 'graphs' not in results
+
+# The history keeps every record in order and the report compares the figures with the previous one
+def test_historyAndReport(tmp_path, capsys):
+    history = os.path.join(str(tmp_path), 'results', 'benchmarks.jsonl')
+    assert loadBenchmarks(history) == []
+    first  = runBenchmarks(steps=20, solves=2, variants=2, graphs=False, backends=('sparse',))
+    second = runBenchmarks(steps=20, solves=2, variants=2, graphs=False, backends=('sparse',))
+    saveBenchmark(history, first)
+    saveBenchmark(history, second)
+    records = loadBenchmarks(history)
+    assert [record['date'] for record in records] == [first['date'], second['date']]
+    assert benchmarkFigures(records[0]) == benchmarkFigures(first)
+    benchmarkReport(records[1], records[0])
+    output = capsys.readouterr().out
+    assert output.count('% vs') == len(benchmarkFigures(second))
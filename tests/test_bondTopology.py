@@ -0,0 +1,43 @@
+import copy
+
+import numpy as np
+import pytest
+
+from bondTopology import bondTopology
+
+# Nodes and bonds of the shipped air network
+def shippedNetwork():
+    rows = lambda filename: [line.split()[:2] for line in open(filename).read().splitlines()[1:] if line.strip()]
+    return [[node for (node, value) in rows('nodes.tab')], [tuple(bond) for bond in rows('bonds.tab')]]
+# Random network with repeated and self connected bonds, the last two nodes have none
+def randomNetwork(seed):
+    random = np.random.RandomState(seed)
+    nodes  = ['node%i' % i for i in range(12)]
+    return [nodes, [(nodes[random.randint(10)], nodes[random.randint(10)]) for b in range(40)]]
+
+# Bonds arriving at / leaving every node, the neighbours and the incidence matrix equal a scan of the bond list
+@pytest.mark.parametrize('network', [shippedNetwork, lambda: randomNetwork(3), lambda: randomNetwork(4)])
+def test_topologyMatchesScan(network):
+    [nodes, bonds] = network()
+    topology = bondTopology(nodes, bonds)
+    dense    = np.zeros((len(nodes), len(bonds)))
+    for (i, node) in enumerate(nodes):
+        assert list(topology.incoming(i)) == [b for (b, (s, e)) in enumerate(bonds) if e == node]
+        assert list(topology.outgoing(i)) == [b for (b, (s, e)) in enumerate(bonds) if s == node]
+        assert topology.predecessors[node] == [s for (s, e) in bonds if e == node]
+        assert topology.successors[node]   == [e for (s, e) in bonds if s == node]
+        row = slice(topology.incidencePointer[i], topology.incidencePointer[i+1])
+        np.add.at(dense[i], topology.incidenceIndices[row], topology.incidenceData[row])
+    expected = np.zeros((len(nodes), len(bonds)))
+    for (b, (s, e)) in enumerate(bonds):
+        expected[nodes.index(s), b] -= 1
+        expected[nodes.index(e), b] += 1
+    assert (dense == expected).all()
+    assert [topology.bondIndex[bond] for bond in bonds if bonds.count(bond) == 1] == \
+           [b for (b, bond) in enumerate(bonds) if bonds.count(bond) == 1]
+
+# Copies of a network share the topology
+def test_topologyShared():
+    topology = bondTopology(*shippedNetwork())
+    assert copy.copy(topology) is topology
+    assert copy.deepcopy({'topology': topology})['topology'] is topology
@@ -0,0 +1,63 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from machineBehaviour      import machineState
+from simulationStream      import simulationSteps, runPipeline, windowMaxSink, aepSink, alarmSink
+from resultsStore          import resultsStoreWriter, openResults
+from checkpoint            import checkpointSink, resumeCheckpoint
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+steps = 1200
+
+# Runs the stream into a results store in directory. With stop, only the states up to that step are consumed and the
+# run is left in directory/checkpoint.pkl, as a crashed simulation
+def checkpointedRun(spec, directory, stop=None):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state   = machineState(temperatures[0], spec)
+    factory = lambda state: resultsStoreWriter.forState(os.path.join(str(directory), 'results'), state, steps + 2)
+    sinks   = [windowMaxSink(1, factory), aepSink(), alarmSink()]
+    stream  = simulationSteps(state, winds, temperatures, 0.9, 0.925, steps)
+    if stop is not None:
+        stream = itertools.islice(stream, stop + 1)
+    checkpoints = checkpointSink(os.path.join(str(directory), 'checkpoint.pkl'), spec.checkpointEvery, sinks, {})
+    return runPipeline(stream, sinks + [checkpoints])[:3]
+# Continues the run left in directory by checkpointedRun from its last checkpoint
+def resumedRun(spec, directory):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    filename   = os.path.join(str(directory), 'checkpoint.pkl')
+    checkpoint = resumeCheckpoint(filename)
+    sinks      = checkpoint['sinks']
+    stream     = simulationSteps(checkpoint['state'], winds, temperatures, 0.9, 0.925, steps, checkpoint['cursor'])
+    checkpoints = checkpointSink(filename, spec.checkpointEvery, sinks, {}, checkpoint['cursor'])
+    return runPipeline(stream, sinks + [checkpoints])[:3]
+
+@pytest.mark.parametrize('integrator', ['euler', 'exponential'])
+def test_resumedRunIsIdentical(spec, tmp_path, integrator):
+    spec = spec.replace(integrator=integrator, checkpointEvery=200)
+    [_, aep, alarms] = checkpointedRun(spec, tmp_path/'whole')
+    checkpointedRun(spec, tmp_path/'resumed', stop=500)
+    [_, resumedAEP, resumedAlarms] = resumedRun(spec, tmp_path/'resumed')
+    assert resumedAEP == aep
+    assert resumedAlarms == alarms
+    whole   = openResults(str(tmp_path/'whole'/'results'))
+    resumed = openResults(str(tmp_path/'resumed'/'results'))
+    assert len(resumed) == len(whole) == steps + 1
+    for (name, dtype) in whole.spec:
+        assert np.array_equal(resumed.column(name), whole.column(name)), name
+
+# --resume keeps the settings of the checkpoint, --set can only change the graph settings
+def test_resumeRejectsChangedSettings(tmp_path, capsys):
+    import cli
+    results  = str(tmp_path)
+    settings = ['--set', 'gbmBackend=sparse', '--set', 'currentLocation=%r' % os.path.join(os.getcwd(), ''),
+                '--set', 'checkpointEvery=500']
+    cli.main(['simulate', '--days', '1', '--no-graphs', '--results', results] + settings)
+    assert os.path.exists(os.path.join(results, 'checkpoint.pkl'))
+    with pytest.raises(SystemExit) as exit:
+        cli.main(['simulate', '--resume', '--no-graphs', '--results', results, '--set', 'dt=30'] + settings)
+    assert 'dt' in str(exit.value)
+    cli.main(['simulate', '--resume', '--no-graphs', '--results', results, '--set', 'graphWorkers=1'] + settings)
+    assert 'Resuming the simulation from step 1440 of 1440' in capsys.readouterr().out
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+# Runs the statements in a fresh interpreter from the repository, the modules they leave imported are printed last
+def freshInterpreter(statements):
+    script = 'import sys\nimport cli\n%s\nprint(sorted(sys.modules))\n' % statements
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=os.getcwd(), universal_newlines=True)
+    return [output, output.splitlines()[-1]]
+
+# Parsing the command line, --help included, imports none of the heavy modules
+def test_parsingImportsNothingHeavy():
+    [output, modules] = freshInterpreter("cli.commandParser().parse_args(['simulate', '--days', '1', '--set', 'dt=30'])\n"
+                                         "try:\n    cli.main(['bench', '--help'])\nexcept SystemExit:\n    pass")
+    assert 'steps of the synthetic series' in output
+    for module in ('pyomo', 'graphBondModel', 'machineBehaviour', 'scipy', 'plotly'):
+        assert "'%s'" % module not in modules, module
+
+# graph reads a results store without the model: neither pyomo nor the GBM are imported, and the startup report names
+# the phases that ran
+def test_graphSkipsModel(tmp_path):
+    import cli
+    results  = str(tmp_path)
+    settings = ['--set', 'gbmBackend=sparse', '--set', 'currentLocation=%r' % os.path.join(os.getcwd(), '')]
+    cli.main(['simulate', '--days', '1', '--no-graphs', '--results', results] + settings)
+    arguments = ['graph', '--results', results] + settings
+    [output, modules] = freshInterpreter('cli.buildGraphs = lambda *arguments: None\ncli.main(%r)' % arguments)
+    assert "'pyomo'" not in modules
+    assert "'graphBondModel'" not in modules
+    assert "'resultsStore'" in modules
+    report = [line for line in output.splitlines() if line.startswith('Startup')]
+    assert len(report) == 1
+    assert 'imports graph ' in report[0]
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from componentCalibration import componentCalibration, componentBatches, calibrationParameters, measuredTrace, calibrateAll
+
+steps  = 1500
+random = np.random.RandomState(5)
+power  = np.repeat(random.uniform(0, 9000, steps//50), 50)
+Tamb   = np.repeat(random.uniform(10, 30, steps//50), 50)
+
+# Trace of a component with the given parameters, measured on the states given, and the cooling mode of every step
+def syntheticTrace(spec, component, parameters, measured, T_0=25):
+    model = componentBatches[component](1, T_0, spec, **parameters)
+    [temperatures, modes] = [dict((state, []) for state in measured), []]
+    for k in range(steps):
+        if component in ('transformer', 'converter'):
+            model.timeStep(power[k], 1, 1, Tamb[k])
+        else:
+            model.timeStep(power[k], Tamb[k])
+        for state in measured:
+            temperatures[state].append(getattr(model, state)[0])
+        modes.append(int(model.exchMode[0]))
+    return [measuredTrace(power, Tamb, temperatures), modes]
+# Class values of the given parameters scaled by factors
+def scaled(component, factors):
+    defaults = componentBatches[component].scalarClass
+    return dict((name, getattr(defaults, name)*factor) for (name, factor) in factors.items())
+def initialStates(component):
+    return dict((state, 25) for state in componentBatches[component].states)
+
+# Every thermal parameter, up to 30 % off the class values, is found again from the class values through the cooling
+# mode changes of the trace
+def test_gearboxRecovered(spec):
+    names = calibrationParameters('gearbox')
+    true  = scaled('gearbox', dict(zip(names, [0.96, 0.72, 1.03, 1.25, 0.95, 0.9, 0.82, 0.9])))
+    [trace, modes] = syntheticTrace(spec, 'gearbox', true, ['oilCold', 'waterCold', 'solid'])
+    assert len(set(modes)) > 1
+    calibration = componentCalibration('gearbox', trace, names, initial=initialStates('gearbox'), spec=spec)
+    assert list(calibration.modes) == modes                  # Replayed from the measured control temperature
+    report = calibration.fit(maxEvaluations=50)
+    assert report['success']
+    assert report['rmse'] < 1e-6
+    for (name, value) in true.items():
+        assert report['parameters'][name] == pytest.approx(value, rel=1e-6), name
+    assert report['history'][-1] < report['history'][0]
+
+# Without the control temperature the modes follow the simulation. The hysteresis leaves local minima, the fit only
+# has to improve on the start with differences that follow the modes of the base point
+def test_unmeasuredControlFollowsSimulation(spec):
+    true = scaled('gearbox', {'oil_int': 1.05, 'water_int': 0.95})
+    [trace, modes] = syntheticTrace(spec, 'gearbox', true, ['waterCold'])
+    calibration = componentCalibration('gearbox', trace, list(true), initial=initialStates('gearbox'), spec=spec)
+    assert calibration.modes is None
+    report = calibration.fit(maxEvaluations=50)
+    assert report['history'][-1] < report['history'][0]
+    assert np.isfinite(calibration.jacobian(np.log(list(true.values())))).all()
+
+# A fit stopped by its evaluation budget says so instead of reporting convergence
+def test_budgetExhaustedReported(spec):
+    true = scaled('gearbox', {'solid_oil_trans': 1.3, 'oil_int': 0.7, 'water_int': 1.2})
+    trace  = syntheticTrace(spec, 'gearbox', true, ['oilCold', 'waterCold'])[0]
+    report = componentCalibration('gearbox', trace, list(true), spec=spec).fit(maxEvaluations=1)
+    assert not report['success']
+    assert report['iterations'] == 1
+    assert report['rmse'] > 0.1
+
+# Components fitted concurrently on worker processes, each with its own trace
+def test_componentsFittedConcurrently(spec):
+    [problems, truths] = [{}, {}]
+    for (component, factors, measured) in [('transformer', {'oil_int': 1.25, 'water_int': 0.8}, ['oilHot', 'waterCold']),
+                                           ('converter',   {'solid_water_trans': 0.75, 'water_int': 1.2}, ['waterCold'])]:
+        truths[component]   = scaled(component, factors)
+        problems[component] = {'trace': syntheticTrace(spec, component, truths[component], measured)[0],
+                               'names': list(factors), 'initial': initialStates(component), 'maxEvaluations': 50,
+                               'spec': spec}
+    reports = calibrateAll(problems, workers=2)
+    for (component, true) in truths.items():
+        assert reports[component]['success'], component
+        for (name, value) in true.items():
+            assert reports[component]['parameters'][name] == pytest.approx(value, rel=1e-6), (component, name)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from machineBehaviour      import machineState
+from simulationStream      import simulationSteps
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+# Air temperatures of every node after each step of a default run, one row per step
+def airTrajectory(spec, steps):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state = machineState(temperatures[0], spec)
+    nodes = state.context.GBM.topology.nodes
+    return np.array([[item.air_component.temperature[node] for node in nodes]
+                     for item in simulationSteps(state, winds, temperatures, 0.9, 0.925, steps)])
+
+# Solving every 10 steps must not lengthen the storage step of the air nodes: with the explicit exchange between the
+# components and the air the solves used to flip between the bounds of the model (0 and 100 C)
+def test_airTemperaturesStayBounded(spec):
+    assert spec.couplingMaxInterval > 1
+    trajectory = airTrajectory(spec, 400)
+    assert trajectory.min() > 5
+    assert trajectory.max() < 50
+    assert np.abs(np.diff(trajectory, axis=0)).max() < 8
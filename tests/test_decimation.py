@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from decimation import windowArgmax, windowArgmin, groupArgmax, groupArgmin, envelopeRows, lttb, groupLttb, stepWindows
+
+random = np.random.RandomState(0)
+keys   = random.randint(0, 5, size=(3, 103)).astype(float)                           # Ties keep the first extreme
+spans  = random.randint(1, 6, size=103)
+groups = stepWindows(spans, 10)
+
+# Rows of every window of groups, one list per window
+def windowRows(groups):
+    return [list(np.flatnonzero(groups == window)) for window in np.unique(groups)]
+# First row of every window whose key is better than all the others of the window
+def bruteArgbest(key, groups, better):
+    picks = []
+    for rows in windowRows(groups):
+        best = rows[0]
+        for row in rows[1:]:
+            if better(key[row], key[best]):
+                best = row
+        picks.append(best)
+    return picks
+# Largest triangle three buckets with the areas computed one point at a time
+def bruteLttb(y, edges, x):
+    picks = [0]
+    for i in range(len(edges) - 1):
+        following = range(edges[i+1], edges[i+2]) if i+2 < len(edges) else [len(y) - 1]
+        avgX  = sum(x[k] for k in following)/float(len(following))
+        avgY  = sum(y[k] for k in following)/float(len(following))
+        [a, best, pick] = [picks[-1], -1.0, None]
+        for k in range(edges[i], edges[i+1]):
+            area = abs((x[a] - avgX)*(y[k] - y[a]) - (x[a] - x[k])*(avgY - y[a]))
+            if area > best:
+                [best, pick] = [area, k]
+        picks.append(pick)
+    return picks + [len(y) - 1]
+
+# Rows of one step each: the step windows are the row windows and both reductions keep the same rows
+def test_groupArgmaxMatchesWindowArgmax():
+    groups = stepWindows(np.ones(103, dtype=int), 10)
+    assert (groupArgmax(keys, groups) == windowArgmax(keys, 10)).all()
+    assert (groupArgmin(keys, groups) == windowArgmin(keys, 10)).all()
+
+def test_stepWindowsFollowSpans():
+    assert list(stepWindows(np.array([1, 4, 1, 6, 2, 1]), 5)) == [0, 0, 1, 1, 2, 2]
+
+@pytest.mark.parametrize('reduction, better', [(groupArgmax, lambda a, b: a > b), (groupArgmin, lambda a, b: a < b)])
+def test_groupExtremesMatchLoop(reduction, better):
+    for (key, rows) in zip(keys, reduction(keys, groups)):
+        assert list(rows) == bruteArgbest(key, groups, better)
+
+def test_windowArgminMatchesLoop():
+    for (key, rows) in zip(keys, windowArgmin(keys, 10)):
+        assert list(rows) == bruteArgbest(key, np.arange(103)//10, lambda a, b: a < b)
+
+def test_envelopeMatchesLoop():
+    for (key, rows) in zip(keys, envelopeRows(keys, groups)):
+        low  = bruteArgbest(key, groups, lambda a, b: a < b)
+        high = bruteArgbest(key, groups, lambda a, b: a > b)
+        assert list(rows) == sorted(set(low + high))
+
+def test_lttbMatchesLoop():
+    y = random.normal(size=500).cumsum()
+    x = np.arange(500)
+    assert list(lttb(y, 40, x)) == bruteLttb(y, list(np.linspace(1, 499, 39).astype(int)), x)
+    assert list(lttb(y, 600)) == list(range(500))
+
+# One bucket per window of steps, the rows placed at their first step
+def test_groupLttbMatchesLoop():
+    y     = random.normal(size=103).cumsum()
+    steps = np.cumsum(spans) - spans
+    edges = [1] + [k for k in range(2, 102) if groups[k] != groups[k-1]] + [102]
+    assert list(groupLttb([y], groups, steps)[0]) == bruteLttb(y, edges, steps)
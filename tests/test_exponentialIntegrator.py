@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from machineBehaviour  import tr_component, cv_component, gn_component, gb_component
+from batchedComponents import tr_batch, cv_batch, gn_batch, gb_batch
+
+substeps = 200
+
+# Scalar class, whether its losses take PF and V and its temperatures
+components = [(tr_component, True,  tr_batch.states), (cv_component, True,  cv_batch.states),
+              (gn_component, False, gn_batch.states), (gb_component, False, gb_batch.states)]
+
+# One exact step of spec.dt matches Euler on a grid 200 times finer to 0.01 K, with the inputs held over the step. The
+# exact step keeps the cooling mode of its start, so both use the same exchanger coefficient in every mode
+@pytest.mark.parametrize('componentClass, electrical, temperatures', components)
+def test_exponentialMatchesFineEuler(spec, componentClass, electrical, temperatures):
+    exact  = componentClass(20, spec.replace(integrator='exponential'))
+    euler  = componentClass(20, spec.replace(integrator='euler', dt=float(spec.dt)/substeps))
+    for component in (exact, euler):
+        component.exchCoeffs = [componentClass.exchCoeffs[2]]*len(componentClass.exchCoeffs)
+    random = np.random.RandomState(2)
+    for (power, Tamb) in zip(random.uniform(0, 9000, 120), random.uniform(5, 35, 120)):
+        inputs = (power, 0.9, 0.925, Tamb) if electrical else (power, Tamb)
+        exact.timeStep(*inputs)
+        for i in range(substeps):
+            euler.timeStep(*inputs)
+        for name in temperatures:
+            assert getattr(exact, name) == pytest.approx(getattr(euler, name), abs=0.01), name
+
+# Every new parameter set of a calibration adds matrices: the caches keep the most recent ones within their size, and
+# matrices rebuilt after an eviction are the ones dropped
+def test_matrixCachesBounded(spec, monkeypatch):
+    import exponentialIntegrator
+    from exponentialIntegrator import matrixCache, discreteMatrices, trajectoryExact
+    monkeypatch.setattr(exponentialIntegrator, 'discreteCache', matrixCache(8))
+    monkeypatch.setattr(exponentialIntegrator, 'blockCache',    matrixCache(2))
+    component = gb_component(40, spec.replace(integrator='exponential'))
+    first     = [matrix.copy() for matrix in discreteMatrices(component, spec.dt)]
+    for k in range(50):
+        component.oilC *= 1.01
+        trajectoryExact(component, 20, spec.dt, 5)
+    assert len(exponentialIntegrator.discreteCache) == 8
+    assert len(exponentialIntegrator.blockCache) == 2
+    assert exponentialIntegrator.discreteCache.evictions > 0
+    component = gb_component(40, spec.replace(integrator='exponential'))
+    assert all((rebuilt == matrix).all() for (rebuilt, matrix) in zip(discreteMatrices(component, spec.dt), first))
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from machineBehaviour      import machineState
+from simulationStream      import simulationSteps, runPipeline, windowMaxSink, aepSink
+from resultsStore          import resultsStoreWriter, openResults
+from thermal_inertia_tools import loadWindTemperatureSeries, calculateAEP
+
+steps = 1200
+
+# Streams a fast-forwarded run into a results store with the given decimation and returns the stream AEP and the store
+def fastForwardRun(spec, directory, decimation):
+    spec = spec.replace(integrator='exponential', fastForward=True, streamDecimation=decimation)
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state   = machineState(temperatures[0], spec)
+    factory = lambda state: resultsStoreWriter.forState(str(directory), state, steps + 2)
+    [_, aep] = runPipeline(simulationSteps(state, winds, temperatures, 0.9, 0.925, steps),
+                           [windowMaxSink(decimation, factory), aepSink()])
+    return [aep, openResults(str(directory))]
+
+@pytest.mark.parametrize('decimation', [1, 7, 100])
+def test_storedAEPEqualsStreamAEP(spec, tmp_path, decimation):
+    [aep, stored] = fastForwardRun(spec, tmp_path, decimation)
+    assert len(stored) < steps                               # Blocks were fast-forwarded
+    assert stored.column('span').sum() == steps + 1          # Initial state plus every step
+    result = calculateAEP(stored)
+    assert result['AEP']        == pytest.approx(aep['AEP'],        rel=1e-12)
+    assert result['AEPderated'] == pytest.approx(aep['AEPderated'], rel=1e-12)
+
+def test_rowTimesFollowSpans(spec, tmp_path):
+    [aep, stored] = fastForwardRun(spec, tmp_path, 1)
+    seconds = np.diff(stored.column('time')).astype('timedelta64[s]').astype(int)
+    assert (seconds == stored.column('span')[1:]*spec.dt).all()
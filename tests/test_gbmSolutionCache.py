@@ -0,0 +1,45 @@
+import pytest
+
+# Air network of the shipped tab files solved by the native backend, with the LRU of the size given
+def cachedNetwork(spec, size):
+    from graphBondModel import air_volume_GBM
+    GBM = air_volume_GBM(spec.replace(gbmCacheSize=size))
+    GBM.loadModelData('nodes.tab', 'bonds.tab')
+    return GBM
+def solution(GBM):
+    instance = GBM.instance
+    return [instance.temper[node].value for node in instance.node_set] + [instance.flow[bond].value for bond in instance.bond_set]
+def heat(GBM, watts):
+    for bond in GBM.instance.bond_set:
+        GBM.instance.heatFlow[bond] = watts
+
+# An operating point within the quantum of a stored one restores its solution instead of solving
+def test_repeatedPointRestored(spec, monkeypatch):
+    GBM = cachedNetwork(spec, 4)
+    heat(GBM, 1000.0)
+    GBM.solve()
+    stored = solution(GBM)
+    heat(GBM, 3000.0)
+    GBM.solve()
+    monkeypatch.setattr(GBM, 'solveSparse', lambda: pytest.fail('solved a cached operating point'))
+    heat(GBM, 1000.0 + 0.2*dict(spec.gbmCacheQuantum)['heatFlow'])
+    GBM.solve()
+    assert solution(GBM) == stored
+    assert GBM.cache.stats()['hits'] == 1 and GBM.cache.stats()['misses'] == 2
+
+# The cache keeps the most recently used points within its size, the others are solved again
+def test_leastRecentlyUsedEvicted(spec):
+    GBM = cachedNetwork(spec, 2)
+    for watts in (1000.0, 2000.0, 1000.0, 3000.0, 2000.0):
+        heat(GBM, watts)
+        GBM.solve()
+    stats = GBM.cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 4, 2, 2)
+
+# The key keeps the exact time step: solutions of another dt are not reused
+def test_keyedOnDt(spec):
+    GBM = cachedNetwork(spec, 4)
+    GBM.solve()
+    GBM.dt = 10*spec.dt
+    GBM.solve()
+    assert GBM.cache.stats()['misses'] == 2
@@ -0,0 +1,84 @@
+import shutil
+
+import pytest
+
+# Air network of the shipped tab files with heat on every bond, so the temperatures depend on the time step
+def heatedNetwork(spec, backend):
+    from graphBondModel import air_volume_GBM
+    GBM = air_volume_GBM(spec.replace(gbmBackend=backend, gbmCacheSize=0))
+    GBM.loadModelData('nodes.tab', 'bonds.tab')
+    for bond in GBM.instance.bond_set:
+        GBM.instance.heatFlow[bond] = 2000.0
+    return GBM
+def temperatures(GBM):
+    return [GBM.instance.temper[node].value for node in GBM.instance.node_set]
+
+# The objective reads dt from the instance, solve() sets it from GBM.dt as the coupling scheduler changes it
+def test_objectiveFollowsDt(spec):
+    import pyomo.environ as pyoenv
+    GBM = heatedNetwork(spec, 'sparse')
+    GBM.dt = 60.0
+    GBM.solve()
+    assert pyoenv.value(GBM.instance.dt) == 60.0
+    objective = pyoenv.value(GBM.instance.OBJ)
+    GBM.instance.dt = 600.0
+    assert pyoenv.value(GBM.instance.OBJ) != pytest.approx(objective)
+    GBM.dt = 600.0
+    GBM.solve()
+    assert pyoenv.value(GBM.instance.dt) == 600.0
+
+@pytest.mark.skipif(shutil.which('ipopt') is None, reason='needs the ipopt executable')
+def test_ipoptSolutionFollowsDt(spec):
+    GBM = heatedNetwork(spec, 'ipopt')
+    GBM.dt = 60.0
+    GBM.solve()
+    short = temperatures(GBM)
+    GBM.dt = 600.0
+    GBM.solve()
+    assert temperatures(GBM) != pytest.approx(short, abs=1e-3)
+
+# GBMs with different time steps share one build, every clone carries the dt of its own GBM
+def test_buildSharedAcrossDt(spec):
+    import pyomo.environ as pyoenv
+    from graphBondModel import air_volume_GBM, builtModels, topologyKey
+    networks = []
+    for dt in (60.0, 600.0):
+        GBM = air_volume_GBM(spec.replace(dt=dt))
+        GBM.loadModelData('nodes.tab', 'bonds.tab')
+        networks.append(GBM)
+    [short, long] = networks
+    assert topologyKey('nodes.tab', 'bonds.tab') in builtModels
+    assert short.model is long.model
+    assert short.instance is not long.instance
+    assert pyoenv.value(short.instance.dt) == 60.0
+    assert pyoenv.value(long.instance.dt)  == 600.0
+
+# The persistent backend keeps one warm-started session per instance: later solves reuse it, a new instance gets a new one
+def test_persistentSessionFollowsInstance(spec, monkeypatch):
+    from graphBondModel import persistentIpoptSession
+    monkeypatch.setattr(persistentIpoptSession, 'solve', lambda session: setattr(session, 'solves', session.solves + 1))
+    GBM = heatedNetwork(spec, 'ipopt_persistent')
+    GBM.solve()
+    session = GBM.session
+    GBM.solve()
+    assert GBM.session is session and session.solves == 2
+    assert session.instance is GBM.instance
+    options = session.solver.ipopt_options if session.persistent else session.solver.options
+    assert options['warm_start_init_point'] == 'yes'
+    GBM.loadModelData('nodes.tab', 'bonds.tab')
+    GBM.solve()
+    assert GBM.session is not session and GBM.session.instance is GBM.instance
+    assert GBM.solveTimingReport()['solves'] == 3
+
+# Solves of the persistent session, after pushing new heat flows, give the solution of a fresh ipopt run
+@pytest.mark.skipif(shutil.which('ipopt') is None, reason='needs the ipopt executable')
+def test_persistentMatchesIpopt(spec):
+    [persistent, fresh] = [heatedNetwork(spec, 'ipopt_persistent'), heatedNetwork(spec, 'ipopt')]
+    for heat in (2000.0, 500.0, 3500.0):
+        for GBM in (persistent, fresh):
+            for bond in GBM.instance.bond_set:
+                GBM.instance.heatFlow[bond] = heat
+            GBM.solve()
+        assert temperatures(persistent) == pytest.approx(temperatures(fresh), abs=1e-4)
+    assert persistent.session.solves == 3
+    assert len(persistent.session.solveTimes) == 3
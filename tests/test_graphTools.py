@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('plotly')
+
+import graphTools
+from decimation import groupArgmax, envelopeRows, groupLttb, stepWindows
+
+# Columns of a series in memory, with the span column of a fast-forwarded run
+class columnSeries(object):
+    def __init__(self, columns):
+        self.columns = columns
+    def column(self, name):
+        return self.columns[name]
+    def __len__(self):
+        return len(self.columns['span'])
+
+# Every reduced graph keeps the rows of its own reduction over the step windows
+def test_reducedRowsFollowReductionKeys(spec):
+    random  = np.random.RandomState(3)
+    spans   = random.randint(1, 4, size=3000)
+    series  = columnSeries(dict([(column, random.normal(size=3000)) for (column, method) in graphTools.reductionKeys.values()]
+                                + [('span', spans)]))
+    steps   = np.cumsum(spans) - spans
+    windows = stepWindows(spans, spec.reductionFactor)
+    rows    = graphTools.reducedRows(series, spec=spec)
+    expected = {'max':      lambda key: groupArgmax([key], windows)[0],
+                'envelope': lambda key: envelopeRows([key], windows)[0],
+                'lttb':     lambda key: groupLttb([key], windows, steps)[0]}
+    for (graph, (column, method)) in graphTools.reductionKeys.items():
+        assert list(rows[graph]) == list(expected[method](series.column(column))), graph
+
+# The histograms sum the spans of their rows and the alarm traces count the steps, not the rows
+def test_heatMapWeighsSpans(spec, monkeypatch):
+    figures = []
+    monkeypatch.setattr(graphTools.pyoff, 'plot', lambda figure, **options: figures.append(figure))
+    spans   = np.array([1, 10, 10, 1, 5])
+    columns = dict(Tamb=np.arange(5.0), wind=np.arange(5.0), span=spans)
+    for component in ('transformer', 'converter', 'generator', 'gearbox'):
+        columns[component + '.alarm'] = np.array([False, True, False, True, component == 'gearbox'])
+    graphTools.windTemperatureHeatMap(columnSeries(columns), spec)
+    traces = dict((trace.name, trace) for trace in figures[0].data)
+    assert list(traces['density'].z) == list(spans)
+    assert traces['density'].histfunc == traces['temperatures density'].histfunc == 'sum'
+    assert 'Trafo Alarms (11 steps)' in traces
+    assert 'Gearbox Alarms (16 steps)' in traces
+
+# Without graphs or workers the spec picks them
+def test_requestedGraphsFromSpec(spec, monkeypatch):
+    built = []
+    monkeypatch.setattr(graphTools, 'buildGraph', lambda series, name, rows=None, spec=None: built.append(name) or 0.0)
+    series  = columnSeries(dict([(column, np.zeros(20)) for (column, method) in graphTools.reductionKeys.values()]
+                                + [('span', np.ones(20, dtype=int))]))
+    timings = graphTools.outputRequestedGraphs(series, spec=spec.replace(requestedGraphs=('tower', 'wind'), graphWorkers=4))
+    assert [name for (name, seconds) in timings] == built == ['tower', 'wind']
+
+# Unknown names are rejected before any graph is built, the timing report has one line per graph
+def test_unknownGraphsRejected(spec, monkeypatch, capsys):
+    built = []
+    monkeypatch.setattr(graphTools, 'buildGraph', lambda series, name, rows=None, spec=None: built.append(name) or 0.0)
+    with pytest.raises(ValueError) as error:
+        graphTools.outputRequestedGraphs(columnSeries({'span': np.ones(20, dtype=int)}), ['tower', 'towers'], 1, spec)
+    assert 'towers' in str(error.value)
+    assert built == []
+    graphTools.graphTimingReport([('tower', 1.5), ('wind', 0.25)])
+    assert capsys.readouterr().out.splitlines() == ['  tower              1.50 s', '  wind               0.25 s']
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from machineBehaviour      import lossChain, tr_component, cv_component, gn_component, gb_component
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+# The precomputed rows equal the potential power and the losses the components compute step by step without derating,
+# for the stretched series of the shipped data and for a plain list
+@pytest.mark.parametrize('stretched', [True, False])
+def test_lossChainMatchesComponents(spec, stretched):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    steps  = 700
+    winds  = winds if stretched else [winds[k] for k in range(steps)]
+    chain  = lossChain(winds, 0.9, 0.925, steps, spec.powerCurve)
+    [transformer, converter, generator, gearbox] = [tr_component(0, spec), cv_component(0, spec),
+                                                    gn_component(0, spec), gb_component(0, spec)]
+    for k in range(steps):
+        potential = np.interp(winds[k], spec.powerCurve[0], spec.powerCurve[1])
+        transformer.powerOUT = potential
+        transformer.lossFunction(0.9, 0.925)
+        converter.powerOUT   = transformer.powerIN
+        converter.lossFunction(0.9, 0.925)
+        generator.powerOUT   = converter.powerIN
+        generator.lossFunction()
+        gearbox.powerOUT     = generator.powerIN
+        gearbox.lossFunction()
+        expected = (potential, transformer.losses, converter.losses, generator.losses, gearbox.losses)
+        assert chain.row(k) == pytest.approx(expected, rel=1e-12)
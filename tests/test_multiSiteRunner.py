@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+import config
+from multiSiteRunner import siteInput, simulateSite, runSites
+
+def shippedSite(name):
+    return siteInput(name, os.path.join(os.getcwd(), 'WindBMHV.csv'), os.path.join(os.getcwd(), 'TemperatureBMHV.csv'))
+
+# Overrides only reach the spec of the site, a pool worker runs the next site with the config defaults
+def test_overridesDoNotLeak(tmp_path):
+    defaults = dict(vars(config))
+    summary  = simulateSite(shippedSite('a'), days=1, resultsRoot=str(tmp_path),
+                            powerCurveFile='PowerCurve.csv', configOverrides={'gbmBackend': 'sparse', 'dt': 120})
+    assert summary['steps'] == 720
+    assert dict(vars(config)) == defaults
+
+def test_unknownOverridesRejected(tmp_path):
+    with pytest.raises(TypeError):
+        simulateSite(shippedSite('a'), days=1, resultsRoot=str(tmp_path), configOverrides={'ratedPower': 8000})
+    with pytest.raises(TypeError):
+        runSites([shippedSite('a')], 1, days=1, resultsRoot=str(tmp_path), configOverrides={'dataSetLength': 10})
+
+# The graph settings are run settings: every site of a multi-site run can pick its own, frozen into the spec
+def test_graphSettingsOverridden():
+    from runSpec import runSpec
+    spec = runSpec.fromConfig(requestedGraphs=['wind', 'tower'], graphWorkers=1)
+    assert spec.requestedGraphs == ('wind', 'tower')
+    assert hash(spec) == hash(runSpec.fromConfig(requestedGraphs=('wind', 'tower'), graphWorkers=1))
+
+def test_siteGraphsBuiltInItsFolder(tmp_path):
+    pytest.importorskip('plotly')
+    summary = simulateSite(shippedSite('a'), days=1, resultsRoot=str(tmp_path), powerCurveFile='PowerCurve.csv', graphs=True,
+                           configOverrides={'gbmBackend': 'sparse', 'requestedGraphs': ['wind'], 'graphWorkers': 1})
+    assert list(summary['graphs']) == ['wind']
+    assert os.path.exists(os.path.join(str(tmp_path), 'a', 'windSeries.html'))
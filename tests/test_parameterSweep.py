@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from machineBehaviour import machineState
+from parameterSweep   import sweepGrid, sweepSample, evaluateVariants, runSweep, components, componentBatches
+
+steps = 400
+
+# Strong wind and a hot afternoon, so the low oil limit alarms and derates the turbine
+def hotInputs():
+    random = np.random.RandomState(4)
+    return [np.repeat(random.uniform(8, 16, steps//10), 10), np.repeat(random.uniform(25, 35, steps//10), 10)]
+variants = sweepGrid({'transformer.oilHot_tempLimit': [60, 120],
+                      'converter.solid_int':          [1500, 4000],
+                      'gearbox.exchCoeffs':           [[0.2, 0.4, 0.6, 0.8, 1], [0.1, 0.2, 0.3, 0.4, 0.5]]})
+
+# KPIs of one variant stepped by the components of a machineState, the chain evaluateVariants batches
+def scalarKPIs(spec, variant, winds, temperatures):
+    state = machineState(temperatures[0], spec)
+    for (name, value) in variant.items():
+        [component, parameter] = name.split('.')
+        setattr(getattr(state, component), parameter, value)
+    kpis = {'energy': 0.0}
+    for component in components:
+        kpis.update(('%s.%s.peak' % (component, name), -np.inf) for name in componentBatches[component].states)
+        kpis.update([(component + '.timeToAlarm', np.nan), (component + '.alarmSteps', 0)])
+    for k in range(steps):
+        state.advanceComponents(winds[k], 0.9, 0.925, temperatures[k])
+        for component in components:
+            model = getattr(state, component)
+            for name in componentBatches[component].states:
+                kpis['%s.%s.peak' % (component, name)] = max(kpis['%s.%s.peak' % (component, name)], getattr(model, name))
+            kpis[component + '.alarmSteps'] += model.alarm
+            if model.alarm and np.isnan(kpis[component + '.timeToAlarm']):
+                kpis[component + '.timeToAlarm'] = (k + 1)*spec.dt
+        kpis['energy'] += state.power*spec.dt/3600
+    return kpis
+
+# Every row of the batched table is the run of a scalar machineState with the parameters of its variant
+def test_variantsMatchScalarRuns(spec):
+    spec = spec.replace(integrator='euler')
+    [winds, temperatures] = hotInputs()
+    table = evaluateVariants(variants, winds, temperatures, spec=spec)
+    assert (table['transformer.alarmSteps'] > 0).any() and (table['deratedEnergy'] > 0).any()
+    for (i, variant) in enumerate(variants):
+        for (name, value) in scalarKPIs(spec, variant, winds, temperatures).items():
+            assert table[name][i] == pytest.approx(value, rel=1e-9, nan_ok=True), (i, name)
+
+# Chunks on worker processes give the table of one batch, in the order of the variants
+def test_sweepChunksMatchOneBatch(spec):
+    spec = spec.replace(integrator='euler')
+    [winds, temperatures] = hotInputs()
+    whole  = evaluateVariants(variants, winds, temperatures, spec=spec)
+    chunks = runSweep(variants, winds, temperatures, steps, workers=2, chunkSize=3, spec=spec)
+    assert list(chunks.index) == list(range(len(variants)))
+    assert np.allclose(chunks.select_dtypes('number').values, whole.select_dtypes('number').values, equal_nan=True)
+
+# The Latin hypercube puts exactly one sample in every stratum of every range
+def test_sampleStratified():
+    samples = sweepSample({'transformer.oil_int': (6000, 9000), 'gearbox.waterC': (1, 3)}, 20, seed=1)
+    for (name, (low, high)) in [('transformer.oil_int', (6000, 9000)), ('gearbox.waterC', (1, 3))]:
+        strata = sorted(int((sample[name] - low)/(high - low)*20) for sample in samples)
+        assert strata == list(range(20))
@@ -0,0 +1,55 @@
+import json
+import os
+
+import numpy as np
+
+from machineBehaviour      import machineState
+from simulationStream      import simulationSteps, runPipeline
+from columnarState         import columnarSeries
+from resultsStore          import resultsStoreWriter, openResults, manifestName
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+steps = 150
+
+# Same run recorded in memory and in a results store that starts too small and is flushed every 40 rows
+def storedRun(spec, directory):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state  = machineState(temperatures[0], spec)
+    memory = columnarSeries.forState(state)
+    store  = resultsStoreWriter.forState(directory, state, capacity=16, parameters={'dt': spec.dt}, flushEvery=40)
+    runPipeline(simulationSteps(state, winds, temperatures, 0.9, 0.925, steps), [memory, store])
+    return memory
+
+# Every column read back from the files equals the one kept in memory, as do the row views
+def test_roundTrip(spec, tmp_path):
+    memory = storedRun(spec, str(tmp_path))
+    stored = openResults(str(tmp_path))
+    assert len(stored) == len(memory) == steps + 1
+    assert stored.parameters == {'dt': spec.dt}
+    for (name, dtype) in memory.spec:
+        assert stored.column(name).dtype == memory.column(name).dtype, name
+        assert np.array_equal(stored.column(name), memory.column(name)), name
+    assert stored[-1].transformer.oilHot == memory[-1].transformer.oilHot
+    assert stored[7].air_component.temperature['Tower_top'] == memory.column('air.temperature.Tower_top')[7]
+
+# Only the columns read are mapped
+def test_columnsMappedOnUse(spec, tmp_path):
+    storedRun(spec, str(tmp_path))
+    stored = openResults(str(tmp_path))
+    assert dict.keys(stored.columns) == set()
+    stored.column('power')
+    assert list(dict.keys(stored.columns)) == ['power']
+    assert isinstance(stored.columns['power'], np.memmap)
+
+# A reader of a store still being written sees the rows of the last flush, with a complete manifest
+def test_manifestRefreshedWhileWriting(spec, tmp_path):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state = machineState(temperatures[0], spec)
+    store = resultsStoreWriter.forState(str(tmp_path), state, flushEvery=40)
+    for state in simulationSteps(state, winds, temperatures, 0.9, 0.925, 100):
+        store.append(state)
+    with open(os.path.join(str(tmp_path), manifestName)) as manifestFile:
+        assert json.load(manifestFile)['length'] == 80
+    reader = openResults(str(tmp_path))
+    assert np.array_equal(reader.column('power'), store.column('power')[:80])
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
@@ -0,0 +1,49 @@
+import concurrent.futures
+import copy
+
+import pytest
+
+import config
+from runSpec               import runSpec, resolveSpec
+from machineBehaviour      import machineState
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+def test_unknownSettingsRejected():
+    with pytest.raises(TypeError):
+        runSpec.fromConfig(dataSetLength=10)
+    with pytest.raises(TypeError):
+        runSpec.fromConfig().replace(notASetting=1)
+
+# Containers are frozen, equal settings hash equal whatever container they were given in, copies share the spec
+def test_hashableAndImmutable(spec):
+    other = spec.replace(powerCurve=[list(row) for row in spec.powerCurve], gbmCacheQuantum=dict(spec.gbmCacheQuantum))
+    assert other == spec and hash(other) == hash(spec)
+    assert {spec: 1}[other] == 1
+    assert spec.replace(dt=30) != spec
+    assert copy.deepcopy(spec) is spec
+    with pytest.raises(AttributeError):
+        spec.dt = 30
+    assert resolveSpec(spec) is spec
+    assert resolveSpec().dt == config.dt
+
+# Temperatures of a short run stepping in place
+def shortRun(spec, steps=120):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state   = machineState(temperatures[0], spec)
+    history = []
+    for k in range(steps):
+        state.advance(winds[k], 0.9, 0.925, temperatures[k])
+        history.append((state.power, state.transformer.oilHot, state.gearbox.oilCold,
+                        state.air_component.temperature['Nacelle_top_rear']))
+    return history
+
+# Differently configured runs on threads of one process give the results they give alone, config is left as it was
+def test_concurrentRunsIsolated(spec):
+    specs    = [spec.replace(dt=60), spec.replace(dt=120, exchLag=50), spec.replace(integrator='exponential')]
+    alone    = [shortRun(item) for item in specs]
+    defaults = dict(vars(config))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(specs)) as pool:
+        together = list(pool.map(shortRun, specs))
+    assert together == alone
+    assert alone[0] != alone[1]
+    assert dict(vars(config)) == defaults
@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+
+import thermal_inertia_tools
+from thermal_inertia_tools import loadSeriesColumn
+
+def seriesFile(directory):
+    filename = os.path.join(str(directory), 'series.csv')
+    with open(filename, 'w') as series:
+        series.write('1.5;a\n2.5;b\n-3;c\n')
+    return filename
+
+# The first load leaves only the finished sidecar in the cache folder, the next one reads it
+def test_sidecarWrittenWhole(tmp_path, monkeypatch):
+    filename = seriesFile(tmp_path)
+    assert list(loadSeriesColumn(filename)) == [1.5, 2.5, -3]
+    cached = os.listdir(str(tmp_path/'.seriesCache'))
+    assert len(cached) == 1 and cached[0].startswith('series.csv.') and cached[0].endswith('.npy')
+    monkeypatch.setattr(np, 'loadtxt', None)
+    assert list(loadSeriesColumn(filename)) == [1.5, 2.5, -3]
+
+# A write interrupted half way leaves no sidecar a later load could read as complete
+def test_failedWriteLeavesNoSidecar(tmp_path, monkeypatch):
+    filename = seriesFile(tmp_path)
+    def failingSave(file, values):
+        file.write(b'\x93NUMPY')
+        raise OSError('disk full')
+    monkeypatch.setattr(thermal_inertia_tools.np, 'save', failingSave)
+    assert list(loadSeriesColumn(filename)) == [1.5, 2.5, -3]
+    assert os.listdir(str(tmp_path/'.seriesCache')) == []
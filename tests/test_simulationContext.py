@@ -0,0 +1,40 @@
+from machineBehaviour      import machineState
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+steps = 150
+
+# Air temperatures, nacelle cooling mode and component temperature after every step of run
+def observed(state):
+    return (state.air_component.temperature['Nacelle_top_rear'], state.context.GBM.exchMode, state.gearbox.oilCold)
+
+# Every state owns a context with its own GBM and instance, the states of one run share it
+def test_contextPerRun(spec):
+    [first, second] = [machineState(20, spec), machineState(20, spec)]
+    assert not hasattr(machineState, 'GBM')
+    assert first.context is not second.context
+    assert first.context.GBM is not second.context.GBM
+    assert first.context.GBM.instance is not second.context.GBM.instance
+    following = first.machineTimeStep(10, 0.9, 0.925, 20)
+    assert following.context is first.context
+    assert (first.context.steps, second.context.steps) == (1, 0)
+    assert machineState(20, spec, context=first.context).context is first.context
+
+# A run stepped alone and interleaved with a hot, windy run (an adjustment study in the same process) gives the same
+# air temperatures and nacelle cooling modes
+def test_interleavedRunsIsolated(spec):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    alone = machineState(temperatures[0], spec)
+    aloneHistory = []
+    for k in range(steps):
+        alone.advance(winds[k], 0.9, 0.925, temperatures[k])
+        aloneHistory.append(observed(alone))
+    [run, other] = [machineState(temperatures[0], spec), machineState(35, spec)]
+    [history, otherModes] = [[], set()]
+    for k in range(steps):
+        other.advance(15, 0.9, 0.925, 35)
+        run.advance(winds[k], 0.9, 0.925, temperatures[k])
+        history.append(observed(run))
+        otherModes.add(other.context.GBM.exchMode)
+    assert history == aloneHistory
+    assert otherModes != set(mode for (air, mode, oil) in aloneHistory)
+    assert run.context.advances == other.context.advances == steps
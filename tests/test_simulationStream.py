@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from machineBehaviour      import machineState
+from simulationStream      import simulationSteps, runPipeline, windowMaxSink, aepSink, alarmSink
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+steps  = 600
+factor = 7
+
+# Keeps the figures the sinks are checked against, taken from every state as it goes by
+class recordingSink(object):
+    def __init__(self):
+        self.states = []
+        self.rows   = []
+    def consume(self, state):
+        self.states.append(state)
+        self.rows.append((state.power, state.potential, [getattr(state, name).alarm for name in alarmSink.components]))
+    def close(self):
+        return self.rows
+
+@pytest.fixture
+def streamed(spec):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state    = machineState(temperatures[0], spec)
+    recorder = recordingSink()
+    results  = runPipeline(simulationSteps(state, winds, temperatures, 0.9, 0.925, steps),
+                           [windowMaxSink(1), windowMaxSink(factor), aepSink(), alarmSink(), recorder])
+    return [state, recorder] + results
+
+# The stream yields one machineState advanced in place: memory does not grow with the steps
+def test_oneStateAdvanced(streamed):
+    [state, recorder] = streamed[:2]
+    assert len(recorder.states) == steps + 1
+    assert all(yielded is state for yielded in recorder.states)
+
+# The incremental sinks give the figures of the whole recorded series
+def test_sinksMatchRecordedSeries(streamed):
+    [state, recorder, full, decimated, aep, alarms, rows] = streamed
+    power     = np.array([row[0] for row in rows])
+    potential = np.array([row[1] for row in rows])
+    assert aep['AEP']        == pytest.approx(potential.mean()*525600/1000/60, rel=1e-12)
+    assert aep['AEPderated'] == pytest.approx(power.mean()*525600/1000/60,     rel=1e-12)
+    for (i, component) in enumerate(alarmSink.components):
+        assert alarms[component] == sum(row[2][i] for row in rows)
+    assert alarms['derated'] == (power < potential).sum()
+    assert list(full.column('power')) == list(power)
+
+# Every decimated row is the maximum (any() for alarms) of factor consecutive states, power averaged, time the first
+def test_windowMaxMatchesLoop(streamed):
+    [full, decimated] = streamed[2:4]
+    assert len(decimated) == -(-(steps + 1)//factor)
+    for (name, dtype) in full.spec:
+        column = full.column(name)
+        for (w, value) in enumerate(decimated.column(name)):
+            window = column[w*factor:(w+1)*factor]
+            if name == 'time':
+                expected = window[0]
+            elif name == 'span':
+                expected = len(window)
+            elif name in windowMaxSink.averaged:
+                expected = pytest.approx(window.mean(), rel=1e-12)
+            elif window.dtype == np.bool_:
+                expected = window.any()
+            else:
+                expected = window.max()
+            assert value == expected, (name, w)
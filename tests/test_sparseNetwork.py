@@ -0,0 +1,60 @@
+import logging
+
+import numpy as np
+import pytest
+
+# Flows, pressures, exterior flows and temperatures of the instance, in the order of its sets
+def solution(GBM):
+    instance = GBM.instance
+    return dict((name, np.array([getattr(instance, name)[index].value for index in getattr(instance, name)]))
+                for name in ('flow', 'pressure', 'exterior', 'temper'))
+def solvedNetwork(spec, backend):
+    from graphBondModel import air_volume_GBM
+    GBM = air_volume_GBM(spec.replace(gbmBackend=backend, gbmCacheSize=0))
+    GBM.loadModelData('nodes.tab', 'bonds.tab')
+    GBM.solve()
+    return GBM
+
+def test_shippedNetworkWithinBounds(spec):
+    GBM = solvedNetwork(spec, 'sparse')
+    assert not any(GBM.network.violations.values())
+    assert GBM.sparseInfeasible == 0
+
+# Without the nacelle fan the loop behind it runs backwards, against the flow >= 0 domain of the model
+def test_negativeFlowReported(spec, caplog):
+    from graphBondModel import air_volume_GBM
+    GBM = air_volume_GBM(spec.replace(gbmCacheSize=0))
+    GBM.loadModelData('nodes.tab', 'bonds.tab')
+    GBM.instance.forced[('Nacelle_top_rear', 'Nacelle_bottom_rear')] = 0
+    with caplog.at_level(logging.WARNING):
+        GBM.solve()
+    assert GBM.network.violations['flow'] != []
+    assert GBM.sparseInfeasible == 1
+    assert 'outside the model bounds' in caplog.text
+
+# With heat on every bond, a colder inlet and outlets exchanging air at tempPre the sparse solution zeroes the pyomo
+# objective: the heat balance of the native solver is the one of obj_rule
+def test_heatedSolutionZeroesObjective(spec):
+    import pyomo.environ as pyoenv
+    from graphBondModel import air_volume_GBM
+    GBM = air_volume_GBM(spec.replace(gbmCacheSize=0))
+    GBM.loadModelData('nodes.tab', 'bonds.tab')
+    for (k, bond) in enumerate(GBM.instance.bond_set):
+        GBM.instance.heatFlow[bond] = 500.0*(k % 5)
+    GBM.instance.tempExt['Air_treatment_system'] = 10
+    for (k, node) in enumerate(GBM.instance.node_set):
+        GBM.instance.tempPre[node] = 20 + k
+    GBM.solve()
+    assert not any(GBM.network.violations.values())
+    assert len(set(temperatures for temperatures in solution(GBM)['temper'])) > 10
+    assert pyoenv.value(GBM.instance.OBJ) < 1e-12
+
+# Temperatures below the NonNegativeReals domain are reported instead of clipped, the energy balance is kept
+def test_freezingAirReported(spec):
+    GBM = solvedNetwork(spec, 'sparse')
+    GBM.instance.tempExt['Air_treatment_system'] = -40
+    for node in GBM.instance.node_set:
+        GBM.instance.tempPre[node] = -10
+    GBM.solve()
+    assert GBM.network.violations['temper'] != []
+    assert GBM.network.temper.min() < 0
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from stepProfiler          import stageTiming, stepProfiler
+from machineBehaviour      import machineState
+from thermal_inertia_tools import loadWindTemperatureSeries
+
+steps = 30
+
+# Steps of machineTimeStep (the deepcopy loop) with the profiler of the spec
+def profiledRun(spec):
+    [winds, temperatures] = loadWindTemperatureSeries(spec=spec)
+    state = machineState(temperatures[0], spec)
+    for k in range(steps):
+        state = state.machineTimeStep(winds[k], 0.9, 0.925, temperatures[k])
+    return state.context.profiler
+
+# Every duration falls in the bin of its decade quarter, the ones outside the range in the first and last bins
+def test_histogramBins():
+    timing = stageTiming()
+    for seconds in [2e-6, 2e-6, 0.5, 1e-9, 1e3, 0]:
+        timing.add(seconds)
+    edges = timing.edges()
+    assert timing.histogram[[i for i in range(len(edges) - 1) if edges[i] <= 2e-6 < edges[i+1]][0]] == 2
+    assert timing.histogram[[i for i in range(len(edges) - 1) if edges[i] <= 0.5 < edges[i+1]][0]] == 1
+    assert timing.histogram[0] == 2 and timing.histogram[-1] == 1
+    assert (timing.calls, timing.max) == (6, 1e3)
+    assert timing.total == pytest.approx(1e3 + 0.5 + 4e-6 + 1e-9)
+
+# Each stage of the step is timed once per step, the air network stages when the scheduler solves it
+def test_stagesOfTheStep(spec):
+    profiler = profiledRun(spec.replace(profileSteps=True))
+    stages   = profiler.toDictionary()
+    for name in ['deepcopy', 'powerFunction', 'derateIfNeeded', 'transformer', 'converter', 'generator', 'gearbox',
+                 'dump_GBM_to_store']:
+        assert stages[name]['calls'] == steps, name
+    for name in ['solve', 'advanceTemperatures', 'updateHeatFlows', 'updateAirFlows']:
+        assert 0 < stages[name]['calls'] <= steps, name
+        assert sum(stages[name]['histogram']) == stages[name]['calls']
+
+def test_savedAsJson(spec, tmp_path):
+    profiler = profiledRun(spec.replace(profileSteps=True))
+    filename = os.path.join(str(tmp_path), 'profile.json')
+    profiler.save(filename)
+    with open(filename) as profileFile:
+        assert json.load(profileFile) == {'stages': profiler.toDictionary()}
+
+def test_disabledRecordsNothing(spec):
+    assert profiledRun(spec.replace(profileSteps=False)).stages == {}
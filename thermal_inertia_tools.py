@@ -1,16 +1,21 @@
+import os
 import csv
 import math
+import hashlib
+import tempfile
 import datetime
 import numpy as np
 
 import config
+from runSpec       import resolveSpec
+from columnarState import rowSpans
 
 # Reads the power curve present in the folder and limits it to the rated power expressed in kW
-def loadPowerCurve( ratedPower ):
+def loadPowerCurve( ratedPower, filename = None, spec = None ):
 
     powerCurve=[[],[]]
 
-    with open('/home/govejero/Documents/AD8/thermal-inertia-python/PowerCurve.csv', 'r') as csvfile:
+    with open(filename or resolveSpec(spec).currentLocation+'PowerCurve.csv', 'r') as csvfile:
         powerCurveReader = csv.reader(csvfile, delimiter=';', quotechar='|')
         for row in powerCurveReader:
             powerCurve[0].append(float(row[0]))
@@ -20,23 +25,72 @@ def loadPowerCurve( ratedPower ):
                 powerCurve[1].append(ratedPower)
     return powerCurve
 # Reads the wind and temperature dataset and returns them in separate lists for dummy conditions testing = true
-def loadWindTemperatureSeries( testing = False  ):
+# The csv series are parsed once into a cached binary array and stretched virtually: step k reads source row k//strechFactor
+def loadWindTemperatureSeries( testing = False, windFile = None, temperatureFile = None, spec = None ):
+    spec = resolveSpec(spec)
     temperatureSeries=[]
     windSeries=[]
     if testing:  # Returns constant temperature and a step function on wind
         temperatureSeries = [config.dummyTamb]*config.dataSetLength
-        windSeries        = [config.dummyWind]*(config.dataSetLength/2)
-        windSeries.extend([0]*(config.dataSetLength/2))
+        windSeries        = [config.dummyWind]*(config.dataSetLength//2)
+        windSeries.extend([0]*(config.dataSetLength//2))
     else:       # Returns the time series contained in the csv files specified
-        with open('/home/govejero/Documents/AD8/thermal-inertia-python/TemperatureBMHV.csv', 'r') as csvfile:
-            temperatureReader = csv.reader(csvfile, delimiter=';', quotechar='|')
-            for row in temperatureReader:
-                temperatureSeries.extend([float(row[0])]*config.strechFactor)
-        with open('/home/govejero/Documents/AD8/thermal-inertia-python/WindBMHV.csv', 'r') as csvfile:
-            windReader = csv.reader(csvfile, delimiter=';', quotechar='|')
-            for row in windReader:
-                windSeries.extend([float(row[0])]*config.strechFactor)
+        temperatureSeries = stretchedSeries(loadSeriesColumn(temperatureFile or spec.currentLocation+'TemperatureBMHV.csv'), spec.strechFactor)
+        windSeries        = stretchedSeries(loadSeriesColumn(windFile        or spec.currentLocation+'WindBMHV.csv'),        spec.strechFactor)
     return [windSeries, temperatureSeries]
+# Reads the first column of a ; separated series into a numpy array, cached as a .npy sidecar keyed on the file contents.
+# The sidecar is written to a temporary file of the cache folder and renamed into place: processes loading the same
+# series at once (multi-site runs) never read a partly written cache
+def loadSeriesColumn( filename ):
+    with open(filename, 'rb') as seriesFile:
+        digest = hashlib.sha1(seriesFile.read()).hexdigest()[:16]
+    cacheDir  = os.path.join(os.path.dirname(os.path.abspath(filename)), '.seriesCache')
+    cacheFile = os.path.join(cacheDir, '%s.%s.npy' % (os.path.basename(filename), digest))
+    if os.path.exists(cacheFile):
+        return np.load(cacheFile)
+    values = np.loadtxt(filename, delimiter=';', usecols=0, ndmin=1)
+    try:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+        [handle, temporary] = tempfile.mkstemp(suffix='.npy', dir=cacheDir)
+        try:
+            with os.fdopen(handle, 'wb') as temporaryFile:
+                np.save(temporaryFile, values)
+            os.replace(temporary, cacheFile)
+        except BaseException:
+            os.remove(temporary)
+            raise
+    except OSError:     # Read-only data folders just skip the cache
+        pass
+    return values
+# Read-only sequence that repeats every sample of a source array factor times without materialising the repetition
+class stretchedSeries(object):
+    def __init__(self, source, factor):
+        self.source = np.asarray(source)
+        self.factor = factor
+    def __len__(self):
+        return len(self.source)*self.factor
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.source[np.arange(*index.indices(len(self)))//self.factor]
+        if isinstance(index, np.ndarray):
+            index = np.where(index < 0, index + len(self), index)
+            return self.source[index//self.factor]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('stretchedSeries index out of range')
+        return self.source[index//self.factor]
+    def __iter__(self):
+        for value in self.source:
+            for repeat in range(self.factor):
+                yield value
+    # Source row of every step, the mapping used instead of physical repetition
+    def sourceRow(self, k):
+        return k//self.factor
+    # Materialised copy, only for consumers that really need a flat array
+    def asArray(self):
+        return np.repeat(self.source, self.factor)
 # Auxiliary function for the classical  y = C0 + C1*x + C2*x^2 + C3*x^3 ...
 def polynomial_from_coeffs( x, coeffs ):
     y=0
@@ -44,9 +98,23 @@ def polynomial_from_coeffs( x, coeffs ):
         y = y + coeffs[i]*x**i
     return y
 #
+# Prints and returns the expected AEP of a series, every row weighted by the steps it accounts for (span), the same
+# figures as simulationStream.aepSink
 def calculateAEP(stateSeries):
-    print('Expected AEP         :   %i MW h' % (sum(item.potential for item in stateSeries)*525600/len(stateSeries)/1000/60))
-    print('Expected AEP derated :   %i MW h' % (sum(item.power     for item in stateSeries)*525600/len(stateSeries)/1000/60))
+    if hasattr(stateSeries, 'column'):    # Columnar results are summed without rebuilding the per-step objects
+        spans     = rowSpans(stateSeries)
+        potential = np.dot(stateSeries.column('potential'), spans)
+        power     = np.dot(stateSeries.column('power'), spans)
+        steps     = spans.sum()
+    else:
+        potential = sum(item.potential*getattr(item, 'span', 1) for item in stateSeries)
+        power     = sum(item.power    *getattr(item, 'span', 1) for item in stateSeries)
+        steps     = sum(getattr(item, 'span', 1) for item in stateSeries)
+    result = {'AEP':        float(potential*525600/max(steps, 1)/1000/60),
+              'AEPderated': float(power    *525600/max(steps, 1)/1000/60)}
+    print('Expected AEP         :   %i MW h' % result['AEP'])
+    print('Expected AEP derated :   %i MW h' % result['AEPderated'])
+    return result
 class countcalls(object):
    "Decorator that keeps track of the number of times a function is called."
 